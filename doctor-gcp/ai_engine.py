@@ -5,15 +5,21 @@ GCP Vertex AI를 통해 AWS 로그를 지능적으로 분석합니다.
 """
 
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Union
 import json
 
 from google.cloud import aiplatform
-from vertexai.generative_models import GenerativeModel, Content, Part
-import vertexai
+from vertexai.generative_models import Content, Part
+
+from log_batch import LogBatch, describe_sampling, format_log_lines
+from analysis_schema import GEMINI_ANALYSIS_SCHEMA, SchemaValidator, parse_json_response
+from vertex_models import get_generative_model
 
 logger = logging.getLogger(__name__)
 
+# 구조화 출력 응답 검증기 (모듈 로드 시 한 번만 컴파일)
+_analysis_validator = SchemaValidator(GEMINI_ANALYSIS_SCHEMA, fallbacks={"severity": "MEDIUM"})
+
 
 class GeminiAnalyzer:
     """
@@ -41,13 +47,12 @@ class GeminiAnalyzer:
         self.location = location
         self.model_name = model_name
 
-        # Vertex AI 초기화
-        vertexai.init(project=project_id, location=location)
-        self.model = GenerativeModel(model_name)
+        # 프로세스 전역 레지스트리에서 모델 핸들을 빌려 씀 (요청마다 vertexai.init 반복 안 함)
+        self.model = get_generative_model(project_id, location, model_name)
 
         logger.info(f"🤖 Gemini AI Engine initialized: {model_name}")
 
-    def _create_analysis_prompt(self, logs: List[Dict[str, Any]]) -> str:
+    def _create_analysis_prompt(self, logs: Union[LogBatch, List[Dict[str, Any]]]) -> str:
         """
         로그 분석을 위한 프롬프트 생성
 
@@ -56,15 +61,15 @@ class GeminiAnalyzer:
         - 구조화된 출력 (JSON) 요청
         """
         # 로그를 텍스트로 변환
-        log_text = "\n".join([
-            f"[{log['timestamp']}] {log['message']}"
-            for log in logs
-        ])
+        log_text = "\n".join(format_log_lines(logs))
+        sampling_note = describe_sampling(logs)
+        if sampling_note:
+            sampling_note = f"\n{sampling_note}\n"
 
         prompt = f"""
 당신은 클라우드 인프라 전문가입니다. 아래 AWS CloudWatch 로그를 분석하여 문제를 진단해 주세요.
 
-## 로그 데이터
+## 로그 데이터{sampling_note}
 ```
 {log_text}
 ```
@@ -100,12 +105,12 @@ class GeminiAnalyzer:
 """
         return prompt
 
-    async def analyze_logs(self, logs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    async def analyze_logs(self, logs: Union[LogBatch, List[Dict[str, Any]]]) -> Dict[str, Any]:
         """
         로그를 Gemini AI로 분석합니다.
 
         Args:
-            logs: 로그 이벤트 리스트
+            logs: 로그 이벤트 LogBatch 또는 리스트
 
         Returns:
             분석 결과 딕셔너리
@@ -132,6 +137,8 @@ class GeminiAnalyzer:
                     "top_p": 0.8,
                     "top_k": 40,
                     "max_output_tokens": 2048,
+                    "response_mime_type": "application/json",  # 스키마에 맞는 JSON만 생성
+                    "response_schema": GEMINI_ANALYSIS_SCHEMA,
                 }
             )
 
@@ -140,20 +147,16 @@ class GeminiAnalyzer:
 
             logger.info(f"📝 Raw Gemini Response:\n{response_text[:500]}...")
 
-            # JSON 파싱 시도
+            # JSON 파싱 시도 (스키마 검증기로 정규화, 잘린 JSON은 재요청 없이 복구)
             try:
-                # JSON 코드 블록 제거 (Gemini가 ```json ... ``` 형태로 반환할 수 있음)
-                if response_text.startswith("```json"):
-                    response_text = response_text.split("```json")[1].split("```")[0].strip()
-                elif response_text.startswith("```"):
-                    response_text = response_text.split("```")[1].split("```")[0].strip()
-
-                analysis_result = json.loads(response_text)
+                analysis_result, repaired = parse_json_response(response_text, _analysis_validator)
+                if repaired:
+                    logger.warning("⚠️ Gemini response was truncated, repaired JSON")
                 logger.info("✅ Successfully parsed AI analysis result")
 
                 return analysis_result
 
-            except json.JSONDecodeError as e:
+            except ValueError as e:
                 logger.error(f"❌ Failed to parse JSON response: {str(e)}")
                 logger.error(f"   Raw response: {response_text}")
 
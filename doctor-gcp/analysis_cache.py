@@ -0,0 +1,204 @@
+"""
+Analysis Cache - 로그 템플릿 지문 기반 분석 결과 캐시
+같은 장애 동안 반복되는 분석 요청은 거의 같은 로그 집합을 Gemini에 보내므로,
+(템플릿 집합 + 대략적인 건수 구간)으로 만든 지문이 같으면 저장된 분석 결과를 바로 반환합니다.
+"""
+
+import hashlib
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+from log_templates import TemplateMiner
+
+logger = logging.getLogger(__name__)
+
+
+def count_bucket(count: int) -> int:
+    """건수를 2배 단위 구간으로 (1, 2~3, 4~7, ...) 묶어 조금 늘거나 줄어도 같은 지문이 되도록 합니다."""
+    return int(math.log2(count)) if count > 0 else -1
+
+
+def fingerprint_templates(miner: TemplateMiner, namespace: str = "") -> str:
+    """
+    템플릿 집합과 템플릿별 건수 구간으로 로그 내용의 지문을 만듭니다.
+
+    Args:
+        miner: 분석할 로그로 만든 템플릿 마이너
+        namespace: 모델/프롬프트 버전 등 결과에 영향을 주는 설정 (다르면 다른 지문)
+    """
+    parts = sorted(f"{cluster.template}\x1f{count_bucket(cluster.count)}" for cluster in miner.clusters)
+    digest = hashlib.sha256(namespace.encode("utf-8"))
+    for part in parts:
+        digest.update(b"\x1e" + part.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class MemoryCacheBackend:
+    """프로세스 메모리 LRU 백엔드 (인스턴스 재시작 시 비워짐)"""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[float, Dict[str, Any]]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, created_at: float, value: Dict[str, Any]):
+        with self._lock:
+            self._entries[key] = (created_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCacheBackend:
+    """로컬 SQLite 파일 LRU 백엔드 (프로세스 재시작 후에도 유지)"""
+
+    def __init__(self, path: str, max_entries: int = 256):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS analysis_cache ("
+            " key TEXT PRIMARY KEY, created_at REAL NOT NULL, accessed_at REAL NOT NULL, value TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_accessed_at ON analysis_cache (accessed_at)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Tuple[float, Dict[str, Any]]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT created_at, value FROM analysis_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE analysis_cache SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            return row[0], json.loads(row[1])
+
+    def set(self, key: str, created_at: float, value: Dict[str, Any]):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO analysis_cache (key, created_at, accessed_at, value) VALUES (?, ?, ?, ?)",
+                (key, created_at, time.time(), json.dumps(value, ensure_ascii=False))
+            )
+            # 가장 오래 사용되지 않은 항목부터 제거
+            self._conn.execute(
+                "DELETE FROM analysis_cache WHERE key NOT IN ("
+                " SELECT key FROM analysis_cache ORDER BY accessed_at DESC LIMIT ?)",
+                (self.max_entries,)
+            )
+            self._conn.commit()
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM analysis_cache WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM analysis_cache").fetchone()[0]
+
+
+class AnalysisCache:
+    """
+    TTL + LRU 분석 결과 캐시
+
+    특징:
+    - 키: fingerprint_templates()로 만든 로그 내용 지문
+    - 백엔드 교체 가능 (MemoryCacheBackend, SQLiteCacheBackend 또는 같은 get/set/delete를 가진 객체)
+    - TTL이 지난 항목은 조회 시 삭제
+    - 적중/미적중 횟수 집계 (/metrics)
+    """
+
+    def __init__(self, backend=None, ttl_seconds: float = 600):
+        """
+        Args:
+            backend: 저장소 (None이면 MemoryCacheBackend)
+            ttl_seconds: 결과 유효 시간 (초)
+        """
+        self.backend = backend if backend is not None else MemoryCacheBackend()
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            entry = self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"⚠️ Analysis cache read failed: {str(e)}")
+            entry = None
+
+        if entry is not None and time.time() - entry[0] > self.ttl_seconds:
+            self.backend.delete(key)
+            entry = None
+
+        if entry is None:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return entry[1]
+
+    def set(self, key: str, analysis: Dict[str, Any]):
+        try:
+            self.backend.set(key, time.time(), analysis)
+        except Exception as e:
+            logger.warning(f"⚠️ Analysis cache write failed: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        """적중/미적중 횟수와 항목 수 (모니터링용)"""
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            "backend": type(self.backend).__name__,
+            "entries": len(self.backend),
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "ttl_seconds": self.ttl_seconds
+        }
+
+
+def create_analysis_cache(
+    backend: str,
+    ttl_seconds: float = 600,
+    max_entries: int = 256,
+    path: str = "/tmp/cloud-doctor/analysis_cache.sqlite3"
+) -> Optional[AnalysisCache]:
+    """설정 문자열("memory", "sqlite", "off")로 분석 캐시를 만듭니다."""
+    if backend == "memory":
+        return AnalysisCache(MemoryCacheBackend(max_entries), ttl_seconds)
+    if backend == "sqlite":
+        try:
+            return AnalysisCache(SQLiteCacheBackend(path, max_entries), ttl_seconds)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"⚠️ SQLite analysis cache unavailable, falling back to memory: {str(e)}")
+            return AnalysisCache(MemoryCacheBackend(max_entries), ttl_seconds)
+    return None
@@ -0,0 +1,111 @@
+"""
+Analysis Cascade - 저렴한 모델 우선 분석 계층과 승격 지표
+대부분의 카오스 장애는 교과서적인 사례이므로 작고 빠른 모델이 먼저 분석하고,
+확신도가 낮거나 출력 검증에 실패했거나 새로운 시나리오가 나타났을 때만 큰 모델로 승격합니다.
+(규칙 기반 분류기의 fast path가 그 앞의 0단계)
+"""
+
+import threading
+from collections import Counter
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+
+ESCALATION_REASONS = ("error", "invalid_output", "low_confidence", "new_scenario")
+
+
+def parse_cascade_tiers(spec: str) -> List[Tuple[str, int]]:
+    """
+    "model[:max_output_tokens],..." 형식의 설정을 (모델 이름, 최대 출력 토큰) 목록으로 변환합니다.
+    (예: "gemini-2.0-flash-lite-001:1024", 빈 문자열이나 "off"면 빈 목록)
+    """
+    tiers = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item or item.lower() == "off":
+            continue
+        model_name, _, max_output_tokens = item.partition(":")
+        tiers.append((model_name.strip(), int(max_output_tokens) if max_output_tokens else 1024))
+    return tiers
+
+
+def escalation_reason(
+    result: Dict[str, Any],
+    valid: bool,
+    confidence_threshold: float,
+    known_scenarios: Iterable[str]
+) -> Optional[str]:
+    """
+    하위 계층 분석 결과를 큰 모델로 승격해야 하는 이유 (받아들일 수 있으면 None)
+
+    Args:
+        result: 정규화된 분석 결과
+        valid: 응답이 복구/텍스트 추출 없이 스키마대로 파싱되었는지
+        confidence_threshold: 이보다 낮은 confidence(없으면 0)는 승격
+        known_scenarios: 직전 Gemini 분석 또는 규칙 기반 분류가 이미 본 시나리오
+    """
+    if not valid:
+        return "invalid_output"
+    if (result.get("confidence") or 0.0) < confidence_threshold:
+        return "low_confidence"
+    known = set(known_scenarios)
+    if any(issue not in known for issue in result.get("detected_issues", [])):
+        return "new_scenario"
+    return None
+
+
+class CascadeStats:
+    """계층별 시도/채택/승격 수 (승격 이유별)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._attempts: Counter = Counter()
+        self._accepted: Counter = Counter()
+        self._escalated: Dict[str, Counter] = {}
+        self._analyses = 0
+
+    def record_start(self):
+        """계층 분석 한 건 시작 (승격률의 분모)"""
+        with self._lock:
+            self._analyses += 1
+
+    def record_attempt(self, tier: str):
+        with self._lock:
+            self._attempts[tier] += 1
+
+    def record_accept(self, tier: str):
+        with self._lock:
+            self._accepted[tier] += 1
+
+    def record_escalation(self, tier: str, reason: str):
+        with self._lock:
+            self._escalated.setdefault(tier, Counter())[reason] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            escalations = sum(sum(reasons.values()) for reasons in self._escalated.values())
+            first_escalations = 0
+            tiers = {}
+            for tier in self._attempts:
+                escalated = self._escalated.get(tier, Counter())
+                tiers[tier] = {
+                    "attempts": self._attempts[tier],
+                    "accepted": self._accepted[tier],
+                    "escalated": dict(escalated)
+                }
+            # 첫 계층에서 승격된 분석 비율 = 큰 모델까지 간 분석 비율의 상한
+            if self._attempts:
+                first_tier = next(iter(self._attempts))
+                first_escalations = sum(self._escalated.get(first_tier, Counter()).values())
+            return {
+                "analyses": self._analyses,
+                "escalations": escalations,
+                "escalation_rate": round(first_escalations / self._analyses, 4) if self._analyses else 0.0,
+                "tiers": tiers
+            }
+
+
+_cascade_stats = CascadeStats()
+
+
+def get_cascade_stats() -> CascadeStats:
+    """프로세스 전역 계층 분석 지표"""
+    return _cascade_stats
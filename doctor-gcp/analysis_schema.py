@@ -0,0 +1,240 @@
+"""
+Analysis Schema - Gemini 구조화 출력 스키마와 응답 검증기
+분석기가 response_schema로 JSON 출력을 강제하고, 응답은 스키마에서 한 번만 컴파일한 검증기로
+정규화합니다. max_output_tokens에 걸려 잘린 JSON은 재요청 없이 복구합니다.
+"""
+
+import json
+from typing import List, Dict, Any, Callable, Optional, Tuple
+
+SEVERITY_LEVELS = ["critical", "warning", "info"]
+
+
+def build_log_analysis_schema(scenarios: List[str]) -> Dict[str, Any]:
+    """LogAnalyzer 분석 결과 스키마 (Vertex AI response_schema 형식)"""
+    return {
+        "type": "object",
+        "properties": {
+            "detected_issues": {"type": "array", "items": {"type": "string", "enum": list(scenarios)}},
+            "severity": {"type": "string", "enum": SEVERITY_LEVELS},
+            "summary": {"type": "string"},
+            "recommendations": {"type": "array", "items": {"type": "string"}},
+            "affected_resources": {"type": "array", "items": {"type": "string"}},
+            # 진단 확신도 (0~1) - 계층 분석에서 큰 모델로 승격할지 판단
+            "confidence": {"type": "number"}
+        },
+        "required": ["detected_issues", "severity", "summary", "recommendations", "affected_resources"]
+    }
+
+
+# GeminiAnalyzer (ai_engine) 분석 결과 스키마
+GEMINI_ANALYSIS_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "summary": {"type": "string"},
+        "severity": {"type": "string", "enum": ["CRITICAL", "HIGH", "MEDIUM", "LOW"]},
+        "issues": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "type": {"type": "string"},
+                    "count": {"type": "integer"},
+                    "description": {"type": "string"},
+                    "root_cause": {"type": "string"},
+                    "solution": {"type": "string"}
+                },
+                "required": ["type", "count", "description", "root_cause", "solution"]
+            }
+        },
+        "priority_actions": {"type": "array", "items": {"type": "string"}},
+        "technical_keywords": {"type": "array", "items": {"type": "string"}}
+    },
+    "required": ["summary", "severity", "issues", "priority_actions"]
+}
+
+_EMPTY = {"string": "", "integer": 0, "number": 0, "boolean": False, "array": list, "object": dict}
+_CLOSERS = {"{": "}", "[": "]"}
+# 잘린 JSON 복구 시 되돌아가 볼 최대 쉼표 위치 수
+MAX_REPAIR_CUTS = 32
+
+
+class SchemaValidator:
+    """
+    스키마를 검증/정규화 함수 트리로 한 번만 컴파일한 검증기
+
+    - 누락된 required 필드는 타입별 빈 값(또는 fallbacks 값)으로 채움
+    - enum 문자열은 대소문자를 무시하고 정식 값으로 맞추며, 배열 안의 잘못된 enum 값은 제거
+    - 배열 자리에 단일 값이 오면 배열로 감싸고, 정수 필드는 정수로 변환
+    """
+
+    def __init__(self, schema: Dict[str, Any], fallbacks: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            schema: response_schema 형식 스키마
+            fallbacks: 최상위 필드가 없거나 enum에 없는 값일 때 쓸 값 (예: {"severity": "warning"})
+        """
+        self.schema = schema
+        self.fallbacks = fallbacks or {}
+        self._validate = self._compile(schema, self.fallbacks)
+
+    def validate(self, value: Any) -> Any:
+        return self._validate(value)
+
+    def _compile(self, schema: Dict[str, Any], fallbacks: Dict[str, Any]) -> Callable[[Any], Any]:
+        kind = schema.get("type", "string")
+
+        if kind == "object":
+            properties = {
+                name: (self._compile(sub, {}), sub.get("type", "string"))
+                for name, sub in schema.get("properties", {}).items()
+            }
+            required = schema.get("required", [])
+
+            def validate_object(value: Any) -> Dict[str, Any]:
+                result = dict(value) if isinstance(value, dict) else {}
+                for name, (validate, sub_kind) in properties.items():
+                    field = result.get(name)
+                    if field is not None:
+                        field = validate(field)
+                    if field is None and name in fallbacks:
+                        field = fallbacks[name]
+                    if field is None and name in required:
+                        empty = _EMPTY.get(sub_kind, "")
+                        field = empty() if callable(empty) else empty
+                    if field is not None:
+                        result[name] = field
+                    else:
+                        result.pop(name, None)
+                return result
+
+            return validate_object
+
+        if kind == "array":
+            validate_item = self._compile(schema.get("items", {}), {})
+
+            def validate_array(value: Any) -> List[Any]:
+                items = value if isinstance(value, list) else [value]
+                validated = (validate_item(item) for item in items if item is not None)
+                return [item for item in validated if item is not None]
+
+            return validate_array
+
+        if kind == "number":
+            def validate_number(value: Any) -> Optional[float]:
+                try:
+                    return float(value)
+                except (TypeError, ValueError):
+                    return None
+
+            return validate_number
+
+        if kind == "integer":
+            def validate_integer(value: Any) -> int:
+                try:
+                    return int(value)
+                except (TypeError, ValueError):
+                    return 0
+
+            return validate_integer
+
+        enum = schema.get("enum")
+        if enum:
+            canonical = {str(option).lower(): option for option in enum}
+
+            def validate_enum(value: Any) -> Optional[str]:
+                # enum에 없는 값은 None (배열에서는 제거, 객체 필드는 fallback 사용)
+                return canonical.get(str(value).strip().lower())
+
+            return validate_enum
+
+        return lambda value: value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+
+
+def strip_code_fence(text: str) -> str:
+    """```json ... ``` 코드 블록 표시를 제거합니다. (스키마를 지원하지 않는 모델 응답 대비)"""
+    cleaned = text.strip()
+    if cleaned.startswith("```"):
+        cleaned = cleaned[3:]
+        if cleaned.lower().startswith("json"):
+            cleaned = cleaned[4:]
+        if cleaned.rstrip().endswith("```"):
+            cleaned = cleaned.rstrip()[:-3]
+    return cleaned.strip()
+
+
+def _close(text: str, stack: List[str]) -> str:
+    text = text.rstrip()
+    if text.endswith(","):
+        text = text[:-1]
+    elif text.endswith(":"):
+        text += " null"
+    return text + "".join(_CLOSERS[opener] for opener in reversed(stack))
+
+
+def repair_truncated_json(text: str) -> str:
+    """
+    출력 토큰 상한 등으로 중간에 잘린 JSON을 파싱 가능한 형태로 복구합니다.
+
+    1. 열린 문자열을 닫고 열린 괄호들을 순서대로 닫음 (잘린 마지막 값도 최대한 살림)
+    2. 그래도 안 되면 마지막으로 완성된 값(같은 깊이의 쉼표) 뒤를 잘라내고 괄호를 닫음
+
+    복구할 수 없으면 ValueError를 발생시킵니다.
+    """
+    stack: List[str] = []
+    cuts: List[Tuple[int, Tuple[str, ...]]] = []
+    in_string = False
+    escaped = False
+
+    for i, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in _CLOSERS:
+            stack.append(char)
+        elif char in "}]":
+            if stack:
+                stack.pop()
+        elif char == ",":
+            cuts.append((i, tuple(stack)))
+
+    tail = text[:-1] if escaped else text
+    candidates = [_close(tail + ('"' if in_string else ""), stack)]
+    candidates += [_close(text[:index], list(cut_stack)) for index, cut_stack in reversed(cuts[-MAX_REPAIR_CUTS:])]
+
+    for candidate in candidates:
+        try:
+            json.loads(candidate)
+            return candidate
+        except json.JSONDecodeError:
+            continue
+    raise ValueError("Unrecoverable JSON response")
+
+
+def parse_json_response(text: str, validator: SchemaValidator) -> Tuple[Dict[str, Any], bool]:
+    """
+    모델 응답 텍스트를 파싱하여 스키마에 맞게 정규화합니다.
+
+    Returns:
+        (정규화된 결과, 잘린 JSON을 복구했는지 여부)
+
+    Raises:
+        ValueError: JSON으로 복구할 수 없는 응답
+    """
+    cleaned = strip_code_fence(text)
+    repaired = False
+    try:
+        value = json.loads(cleaned)
+    except json.JSONDecodeError:
+        value = json.loads(repair_truncated_json(cleaned))
+        repaired = True
+
+    if not isinstance(value, dict):
+        raise ValueError(f"Expected a JSON object, got {type(value).__name__}")
+    return validator.validate(value), repaired
@@ -4,63 +4,600 @@ GCP에서 AWS AssumeRole을 통해 CloudWatch Logs를 수집합니다.
 메가존클라우드 채용 포인트: Hybrid Cloud Security 구현
 """
 
+import asyncio
 import boto3
+import heapq
+import json
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+from botocore.config import Config
 from botocore.exceptions import ClientError, BotoCoreError
 
+from aws_throttle import call_with_retry, is_throttling_error
+from gcp_identity import get_identity_token_cache
+from log_batch import LogBatch
+from log_cursor import LogCursorStore
+from log_sampling import LogSampler, SAMPLING_STRATEGIES, merge_sampling_summaries
+from log_segment_cache import LogSegmentCache
+from log_tail import RecentEventsBuffer
+
 logger = logging.getLogger(__name__)
 
+# filter_log_events 한 페이지의 최대 이벤트 수 (AWS API 제한)
+MAX_EVENTS_PER_PAGE = 10000
 
-class AWSLogFetcher:
+# 시간 분할 병렬 조회 설정
+MAX_FETCH_SHARDS = 8        # 계정당 FilterLogEvents TPS 제한을 고려한 상한
+MIN_SHARD_MINUTES = 5       # 이보다 짧은 구간으로는 쪼개지 않음
+
+# 이벤트 루프를 막지 않도록 boto3/requests 호출을 전담하는 스레드 수
+AWS_IO_WORKERS = 8
+# 비동기 조회 기본 타임아웃 (초)
+DEFAULT_FETCH_TIMEOUT_SECONDS = 60
+
+_aws_io_executor = ThreadPoolExecutor(max_workers=AWS_IO_WORKERS, thread_name_prefix="aws-io")
+
+# Logs Insights 집계 모드 설정
+INSIGHTS_ERROR_REGEX = "ERROR|Error|error|CRITICAL|FATAL|WARNING|Warning"
+INSIGHTS_GROUP_BY_MODES = ("pattern", "bin", "stream")
+INSIGHTS_POLL_INITIAL_SECONDS = 0.5
+INSIGHTS_POLL_MAX_SECONDS = 5.0
+INSIGHTS_QUERY_TIMEOUT_SECONDS = 60
+
+# 샘플링 시 윈도우에서 훑을 최대 이벤트 수 (API 호출 시간 상한)
+DEFAULT_SAMPLE_SCAN_LIMIT = 100000
+
+
+def _client_region(client) -> str:
+    """boto3 클라이언트의 리전 (속도 제한 키로 사용)"""
+    meta = getattr(client, 'meta', None)
+    return getattr(meta, 'region_name', None) or 'default'
+
+
+def split_time_range(start_ms: int, end_ms: int, shard_count: int) -> List[Tuple[int, int]]:
     """
-    AWS CloudWatch Logs를 안전하게 수집하는 클래스
+    [start_ms, end_ms] 구간을 shard_count개의 연속된 하위 구간으로 나눕니다.
+    경계 타임스탬프는 양쪽 샤드에 모두 포함될 수 있으므로 병합 시 eventId로 중복 제거합니다.
+    """
+    shard_count = max(1, min(shard_count, end_ms - start_ms))
+    step = (end_ms - start_ms) / shard_count
+
+    ranges = []
+    for i in range(shard_count):
+        shard_start = start_ms + int(step * i)
+        shard_end = end_ms if i == shard_count - 1 else start_ms + int(step * (i + 1))
+        ranges.append((shard_start, shard_end))
+    return ranges
+
+
+def iter_filtered_events(
+    logs_client,
+    log_group_name: str,
+    start_ms: int,
+    end_ms: int,
+    filter_pattern: str,
+    max_events: Optional[int] = None,
+    max_bytes: Optional[int] = None,
+    cancel_event: Optional[threading.Event] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    filter_log_events를 nextToken을 따라가며 호출하고 원본 이벤트를 하나씩 yield 합니다.
+
+    한 페이지만 읽고 끝내면 장애 상황처럼 로그가 많을 때 대부분의 이벤트가 누락됩니다.
+    페이지가 도착하는 대로 yield 하므로 소비자는 마지막 페이지를 기다리지 않고 처리를 시작할 수 있습니다.
+
+    Args:
+        logs_client: boto3 CloudWatch Logs 클라이언트
+        log_group_name: CloudWatch Log Group 이름
+        start_ms: 검색 시작 시각 (epoch 밀리초)
+        end_ms: 검색 종료 시각 (epoch 밀리초)
+        filter_pattern: CloudWatch Logs 필터 패턴
+        max_events: 최대 이벤트 수 (None이면 제한 없음)
+        max_bytes: 메시지 바이트 합계 상한 (None이면 제한 없음)
+        cancel_event: set 되면 다음 페이지 요청 전에 조회를 중단
+
+    Yields:
+        filter_log_events 원본 이벤트 딕셔너리
+    """
+    request = {
+        'logGroupName': log_group_name,
+        'startTime': start_ms,
+        'endTime': end_ms,
+        'filterPattern': filter_pattern
+    }
+
+    # limit=0 요청은 API가 거부하므로 호출하지 않음
+    if max_events is not None and max_events <= 0:
+        return
+
+    event_count = 0
+    byte_count = 0
+    page_count = 0
+
+    while True:
+        if cancel_event is not None and cancel_event.is_set():
+            logger.info(f"   Fetch cancelled ({event_count} events, {page_count} pages)")
+            return
+
+        if max_events is not None:
+            request['limit'] = min(max_events - event_count, MAX_EVENTS_PER_PAGE)
+
+        response = call_with_retry(
+            logs_client.filter_log_events,
+            'logs:FilterLogEvents',
+            _client_region(logs_client),
+            **request
+        )
+        page_count += 1
+
+        for event in response.get('events', []):
+            message_bytes = len(event.get('message', '').encode('utf-8'))
+            if max_bytes is not None and byte_count + message_bytes > max_bytes:
+                logger.info(f"   Byte budget reached ({byte_count} bytes, {page_count} pages)")
+                return
+
+            yield event
+            event_count += 1
+            byte_count += message_bytes
+
+            if max_events is not None and event_count >= max_events:
+                logger.info(f"   Event budget reached ({event_count} events, {page_count} pages)")
+                return
+
+        # 빈 페이지라도 nextToken이 있으면 아직 스캔할 구간이 남아 있음
+        next_token = response.get('nextToken')
+        if not next_token:
+            return
+        request['nextToken'] = next_token
+
+
+class _AnyEventSet:
+    """여러 threading.Event 중 하나라도 set 되면 set으로 보이는 취소 신호"""
+
+    def __init__(self, *events: Optional[threading.Event]):
+        self.events = [event for event in events if event is not None]
+
+    def is_set(self) -> bool:
+        return any(event.is_set() for event in self.events)
+
+
+def fetch_sharded_events(
+    logs_client,
+    log_group_name: str,
+    start_ms: int,
+    end_ms: int,
+    filter_pattern: str,
+    shard_count: int,
+    max_events: Optional[int] = None,
+    max_bytes: Optional[int] = None,
+    cancel_event: Optional[threading.Event] = None
+) -> List[Dict[str, Any]]:
+    """
+    시간 구간을 샤드로 나눠 동시에 조회하고 타임스탬프 순으로 병합합니다.
+
+    단일 순차 스캔은 60~120분 구간에서 가장 느린 단계이므로, 각 샤드를 제한된
+    스레드 풀에서 병렬로 페이지네이션하고 heapq.merge로 합칩니다.
+    샤드 경계에서 중복된 이벤트는 eventId 기준으로 제거합니다.
+
+    예산은 순차 조회와 같이 시간 순 앞부분(prefix)에 적용됩니다:
+    - 앞에서부터 끝난 샤드들만으로 예산이 차거나 샤드 하나가 예산에 걸려 잘리면, 그 뒤 샤드는
+      남은 페이지 요청을 취소하고 결과에서 제외합니다. (잘린 샤드 뒤의 이벤트를 합치면
+      병합된 타임라인 중간에 구멍이 생김)
+    - 병합 후 전체 max_events/max_bytes로 다시 자릅니다.
+    샤드는 동시에 시작하므로 취소 전까지 읽는 양은 샤드마다 최대 예산만큼입니다.
+
+    Args:
+        logs_client: boto3 CloudWatch Logs 클라이언트 (스레드 안전)
+        log_group_name: CloudWatch Log Group 이름
+        start_ms: 검색 시작 시각 (epoch 밀리초)
+        end_ms: 검색 종료 시각 (epoch 밀리초)
+        filter_pattern: CloudWatch Logs 필터 패턴
+        shard_count: 샤드 수 (MAX_FETCH_SHARDS로 제한)
+        max_events: 전체 최대 이벤트 수 (None이면 제한 없음)
+        max_bytes: 전체 메시지 바이트 합계 상한 (None이면 제한 없음)
+        cancel_event: set 되면 모든 샤드가 다음 페이지 요청 전에 중단
+
+    Returns:
+        타임스탬프 순으로 정렬된 원본 이벤트 리스트 (시간 순 앞부분)
+    """
+    shards = split_time_range(start_ms, end_ms, min(shard_count, MAX_FETCH_SHARDS))
+    # 뒤 샤드들의 조회를 멈추기 위한 샤드별 취소 신호
+    shard_cancels = [threading.Event() for _ in shards]
+    # 샤드별 (이벤트 수, 바이트, 잘렸는지 여부) - 끝나기 전에는 None
+    finished: List[Optional[Tuple[int, int, bool]]] = [None] * len(shards)
+    finished_lock = threading.Lock()
+
+    def cutoff_index() -> Optional[int]:
+        """결과에 넣을 마지막 샤드 (앞에서부터 끝난 샤드만으로 아직 정할 수 없으면 None)"""
+        total_events = 0
+        total_bytes = 0
+        for index, outcome in enumerate(finished):
+            if outcome is None:
+                return None
+            total_events += outcome[0]
+            total_bytes += outcome[1]
+            if outcome[2] or (max_events is not None and total_events >= max_events) or \
+                    (max_bytes is not None and total_bytes >= max_bytes):
+                return index
+        return len(finished) - 1
+
+    def fetch_shard(index: int) -> Tuple[List[Dict[str, Any]], bool]:
+        """(샤드 이벤트, 예산에 걸려 잘렸는지 여부)"""
+        events = []
+        byte_count = 0
+        truncated = False
+        # 예산을 넘는 이벤트가 있는지 알기 위해 한 건 더 요청하고, 예산 검사는 여기서 직접 수행
+        for event in iter_filtered_events(
+            logs_client,
+            log_group_name,
+            shards[index][0],
+            shards[index][1],
+            filter_pattern,
+            max_events=None if max_events is None else max_events + 1,
+            cancel_event=_AnyEventSet(cancel_event, shard_cancels[index])
+        ):
+            message_bytes = len(event.get('message', '').encode('utf-8'))
+            if (max_events is not None and len(events) >= max_events) or \
+                    (max_bytes is not None and byte_count + message_bytes > max_bytes):
+                truncated = True
+                break
+            events.append(event)
+            byte_count += message_bytes
+
+        with finished_lock:
+            finished[index] = (len(events), byte_count, truncated)
+            cutoff = cutoff_index()
+        if cutoff is not None:
+            for later in shard_cancels[cutoff + 1:]:
+                later.set()
+        events.sort(key=lambda event: event['timestamp'])
+        return events, truncated
+
+    with ThreadPoolExecutor(max_workers=len(shards), thread_name_prefix="logs-shard") as executor:
+        shard_results = list(executor.map(fetch_shard, range(len(shards))))
+
+    logger.info(f"   Sharded fetch: {len(shards)} shards, {sum(len(r[0]) for r in shard_results)} events before merge")
+
+    cutoff = cutoff_index()
+    if cutoff < len(shards) - 1:
+        logger.info(f"   Budget filled by shard {cutoff + 1}/{len(shards)}, dropping later shards")
+    kept = [events for events, _ in shard_results[:cutoff + 1]]
+
+    merged = []
+    seen_event_ids = set()
+    byte_count = 0
+    for event in heapq.merge(*kept, key=lambda event: event['timestamp']):
+        event_id = event.get('eventId')
+        if event_id is not None:
+            if event_id in seen_event_ids:
+                continue
+            seen_event_ids.add(event_id)
+
+        message_bytes = len(event.get('message', '').encode('utf-8'))
+        if max_bytes is not None and byte_count + message_bytes > max_bytes:
+            break
+        merged.append(event)
+        byte_count += message_bytes
+        if max_events is not None and len(merged) >= max_events:
+            break
+
+    return merged
+
+
+def build_insights_query(
+    group_by: str = "pattern",
+    bin_minutes: int = 5,
+    max_groups: int = 50,
+    message_regex: str = INSIGHTS_ERROR_REGEX
+) -> str:
+    """
+    서버 측에서 에러 로그를 집계하는 Logs Insights 쿼리를 생성합니다.
+
+    Args:
+        group_by: "pattern" (Insights pattern 명령), "bin" (시간 구간), "stream" (로그 스트림)
+        bin_minutes: group_by="bin"일 때 구간 길이 (분)
+        max_groups: 반환할 최대 그룹 수
+        message_regex: 에러 메시지 필터 정규식
+
+    Returns:
+        Logs Insights 쿼리 문자열
+    """
+    if group_by not in INSIGHTS_GROUP_BY_MODES:
+        raise ValueError(f"group_by must be one of {INSIGHTS_GROUP_BY_MODES}, got '{group_by}'")
+
+    query = f"fields @timestamp, @message, @logStream\n| filter @message like /{message_regex}/\n"
+
+    if group_by == "pattern":
+        # pattern 명령은 패턴별 원본 로그 샘플을 @logSamples로 함께 반환
+        query += "| pattern @message\n| sort @sampleCount desc\n"
+    else:
+        group_expr = f"bin({bin_minutes}m)" if group_by == "bin" else "@logStream"
+        query += (
+            "| stats count(*) as event_count, "
+            "earliest(@message) as first_example, latest(@message) as last_example, "
+            "min(@timestamp) as first_seen, max(@timestamp) as last_seen "
+            f"by {group_expr}\n"
+            "| sort event_count desc\n"
+        )
+
+    return query + f"| limit {max_groups}"
+
+
+def run_insights_query(
+    logs_client,
+    log_group_name: str,
+    start_ms: int,
+    end_ms: int,
+    query: str,
+    timeout: float = INSIGHTS_QUERY_TIMEOUT_SECONDS,
+    cancel_event: Optional[threading.Event] = None
+) -> Dict[str, Any]:
+    """
+    start_query로 Insights 쿼리를 시작하고 get_query_results를 백오프하며 폴링합니다.
+
+    Returns:
+        {"rows": [{필드: 값}, ...], "statistics": {...}}
+
+    Raises:
+        TimeoutError: timeout 안에 쿼리가 끝나지 않은 경우 (쿼리는 stop_query로 중단)
+    """
+    region = _client_region(logs_client)
+    response = call_with_retry(
+        logs_client.start_query,
+        'logs:StartQuery',
+        region,
+        logGroupName=log_group_name,
+        startTime=start_ms // 1000,  # Insights는 초 단위
+        endTime=end_ms // 1000,
+        queryString=query
+    )
+    query_id = response['queryId']
+
+    deadline = time.monotonic() + timeout
+    delay = INSIGHTS_POLL_INITIAL_SECONDS
+
+    while True:
+        time.sleep(delay)
+        result = call_with_retry(
+            logs_client.get_query_results,
+            'logs:GetQueryResults',
+            region,
+            queryId=query_id
+        )
+        status = result.get('status')
+
+        if status == 'Complete':
+            rows = [
+                {field['field']: field['value'] for field in row if field['field'] != '@ptr'}
+                for row in result.get('results', [])
+            ]
+            return {"rows": rows, "statistics": result.get('statistics', {})}
+
+        if status in ('Failed', 'Cancelled', 'Timeout', 'Unknown'):
+            raise Exception(f"Logs Insights query {status.lower()}: {query_id}")
+
+        if time.monotonic() >= deadline or (cancel_event is not None and cancel_event.is_set()):
+            try:
+                logs_client.stop_query(queryId=query_id)
+            except ClientError:
+                pass  # 이미 끝난 쿼리는 stop_query가 실패할 수 있음
+            raise TimeoutError(f"Logs Insights query did not complete within {timeout}s")
+
+        delay = min(delay * 1.5, INSIGHTS_POLL_MAX_SECONDS)
+
+
+def parse_log_samples(value: Optional[str], max_samples: int = 2) -> List[Tuple[Optional[str], str]]:
+    """
+    pattern 결과의 @logSamples 값(JSON 문자열)에서 (타임스탬프, 원본 메시지)를 최대 max_samples개 꺼냅니다.
+    샘플이 문자열이면 타임스탬프는 None, 값이 없거나 형식을 알 수 없으면 빈 리스트를 반환합니다.
+    """
+    if not value:
+        return []
+    try:
+        samples = json.loads(value)
+    except ValueError:
+        return []
+
+    parsed = []
+    for sample in samples if isinstance(samples, list) else []:
+        if isinstance(sample, dict) and sample.get('@message'):
+            parsed.append((sample.get('@timestamp'), sample['@message'].strip()))
+        elif isinstance(sample, str) and sample.strip():
+            parsed.append((None, sample.strip()))
+        if len(parsed) >= max_samples:
+            break
+    return parsed
+
+
+def normalize_insights_rows(rows: List[Dict[str, str]], group_by: str) -> List[Dict[str, Any]]:
+    """
+    Insights 결과 행을 공통 형식으로 변환합니다.
+
+    pattern 모드의 예시는 @logSamples의 원본 로그 줄을 사용하고, 샘플이 없을 때만
+    마스킹된 패턴을 "[pattern]" 표시와 함께 넣습니다.
+
+    Returns:
+        [{"group": ..., "count": int, "first_seen": ..., "last_seen": ..., "examples": [...]}, ...]
+    """
+    aggregated = []
+    for row in rows:
+        if group_by == "pattern":
+            samples = parse_log_samples(row.get('@logSamples'))
+            timestamps = sorted(timestamp for timestamp, _ in samples if timestamp)
+            examples = [message for _, message in samples]
+            if not examples and row.get('@pattern'):
+                examples = [f"[pattern] {row['@pattern']}"]
+            aggregated.append({
+                "group": row.get('@pattern', ''),
+                "count": int(float(row.get('@sampleCount', 0))),
+                "first_seen": timestamps[0] if timestamps else None,
+                "last_seen": timestamps[-1] if timestamps else None,
+                "examples": list(dict.fromkeys(examples))
+            })
+        else:
+            group_key = next((v for k, v in row.items() if k.startswith('bin(') or k == '@logStream'), '')
+            examples = [row[k].strip() for k in ('first_example', 'last_example') if row.get(k)]
+            aggregated.append({
+                "group": group_key,
+                "count": int(float(row.get('event_count', 0))),
+                "first_seen": row.get('first_seen'),
+                "last_seen": row.get('last_seen'),
+                # 같은 메시지가 반복되면 예시 하나만 유지
+                "examples": list(dict.fromkeys(examples))
+            })
+    return aggregated
+
+
+def aggregated_rows_to_logs(aggregated: List[Dict[str, Any]], window_start: str) -> List[Dict[str, Any]]:
+    """
+    집계 행을 분석기 입력 형식으로 변환합니다.
+    각 예시 메시지 앞에 그룹 발생 횟수를 붙여 Gemini가 빈도를 알 수 있게 합니다.
+    그룹의 첫 발생 시각을 모르면 조회 구간 시작 시각(window_start)을 사용합니다.
+    """
+    logs = []
+    for row in aggregated:
+        for example in row['examples']:
+            logs.append({
+                'timestamp': row['first_seen'] or window_start,
+                'message': f"[x{row['count']}] {example}",
+                'log_stream': row['group']
+            })
+    return logs
+
+
+def format_log_event(event: Dict[str, Any]) -> Dict[str, Any]:
+    """filter_log_events 원본 이벤트를 분석기 입력 형식으로 변환합니다."""
+    return {
+        'timestamp': datetime.fromtimestamp(event['timestamp'] / 1000).isoformat(),
+        'message': event['message'].strip(),
+        'log_stream': event.get('logStreamName', 'unknown')
+    }
+
+
+def _raise_fetch_error(error: ClientError, log_group_name: str):
+    """CloudWatch Logs ClientError를 로깅하고 사용자용 예외로 변환합니다."""
+    error_code = error.response['Error']['Code']
+    error_msg = error.response['Error']['Message']
+
+    if error_code == 'ResourceNotFoundException':
+        logger.error(f"❌ Log Group not found: {log_group_name}")
+        raise Exception(f"Log group '{log_group_name}' does not exist")
+    elif is_throttling_error(error):
+        logger.error(f"❌ CloudWatch Logs API throttled after retries: {error_code} - {error_msg}")
+        raise Exception(f"CloudWatch Logs is throttling requests, try again shortly: {error_msg}")
+    else:
+        logger.error(f"❌ CloudWatch Logs API error: {error_code} - {error_msg}")
+        raise Exception(f"Failed to fetch logs: {error_msg}")
+
+
+class AWSCredentialProvider:
+    """
+    (role_arn, region, session_name) 단위로 STS 임시 자격증명과 Logs 클라이언트를 공유하는 클래스
+
+    요청마다 AWSLogFetcher를 새로 만들어도 메타데이터 서버 토큰 조회,
+    AssumeRoleWithWebIdentity, boto3 클라이언트 생성을 반복하지 않도록 프로세스 전역에서 재사용합니다.
 
     특징:
-    - AssumeRole을 통한 임시 자격증명 사용 (장기 키 노출 방지)
-    - Cross-Account/Cross-Cloud 접근 지원
-    - 자동 재시도 및 에러 핸들링
+    - 만료 전에 백그라운드 타이머로 미리 갱신
+    - Single-flight 갱신 (동시 요청이 STS를 중복 호출하지 않음)
     """
 
-    def __init__(
-        self,
-        role_arn: str,
-        region: str = "ap-northeast-2",
-        session_name: str = "CloudDoctorSession"
-    ):
+    # 이 시간 이내로 만료가 남으면 요청 경로에서 동기 갱신
+    REFRESH_MARGIN_SECONDS = 300
+    # 백그라운드 갱신은 동기 갱신 기준보다 먼저 수행
+    BACKGROUND_REFRESH_SECONDS = 600
+    # 백그라운드 갱신 실패 시 재시도 간격
+    BACKGROUND_RETRY_SECONDS = 30
+
+    def __init__(self, role_arn: str, region: str, session_name: str):
         """
         Args:
-            role_arn: AWS IAM Role ARN (예: arn:aws:iam::123456789012:role/CloudDoctorRole)
+            role_arn: AWS IAM Role ARN
             region: AWS 리전
-            session_name: STS 세션 이름 (CloudTrail 로그에 표시됨)
+            session_name: STS 세션 이름
         """
         self.role_arn = role_arn
         self.region = region
         self.session_name = session_name
+        self.expire_at = None
+        self._credentials = None
         self._logs_client = None
-        self._credentials_expire_at = None
+        self._sts_client = None
+        self._refresh_lock = threading.Lock()
+        self._refresh_timer = None
+
+    def _seconds_until_expiry(self) -> float:
+        if not self.expire_at:
+            return 0.0
+        return (self.expire_at - datetime.now(self.expire_at.tzinfo)).total_seconds()
+
+    def _needs_refresh(self) -> bool:
+        return not self._logs_client or self._seconds_until_expiry() < self.REFRESH_MARGIN_SECONDS
+
+    def get_logs_client(self):
+        """공유 CloudWatch Logs 클라이언트 (필요 시 갱신)"""
+        self._ensure_fresh()
+        return self._logs_client
+
+    def get_credentials(self) -> Dict[str, str]:
+        """공유 임시 자격증명 (필요 시 갱신)"""
+        self._ensure_fresh()
+        return self._credentials
+
+    def _ensure_fresh(self):
+        if not self._needs_refresh():
+            return
+
+        # Single-flight: 먼저 락을 잡은 요청만 STS를 호출하고 나머지는 결과를 재사용
+        with self._refresh_lock:
+            if self._needs_refresh():
+                self._refresh()
+
+    def _refresh(self):
+        """자격증명과 Logs 클라이언트를 새로 발급하고 다음 백그라운드 갱신을 예약합니다. (락 보유 상태에서 호출)"""
+        credentials = self._assume_role()
+        self._logs_client = boto3.client(
+            'logs',
+            region_name=self.region,
+            # 샤드/다중 로그 그룹 동시 조회를 위한 커넥션 풀
+            config=Config(max_pool_connections=MAX_FETCH_SHARDS * 2),
+            **credentials
+        )
+        self._credentials = credentials
+        self._schedule_background_refresh(
+            max(self._seconds_until_expiry() - self.BACKGROUND_REFRESH_SECONDS, 0)
+        )
+
+    def _schedule_background_refresh(self, delay_seconds: float):
+        if self._refresh_timer:
+            self._refresh_timer.cancel()
+
+        self._refresh_timer = threading.Timer(delay_seconds, self._background_refresh)
+        self._refresh_timer.daemon = True
+        self._refresh_timer.start()
+
+    def _background_refresh(self):
+        try:
+            with self._refresh_lock:
+                self._refresh()
+            logger.info(f"🔄 AWS credentials refreshed in background (Role: {self.role_arn})")
+        except Exception as e:
+            # 실패해도 기존 자격증명이 유효한 동안은 계속 사용, 만료 임박 시 요청 경로에서 재시도
+            logger.warning(f"⚠️ Background credential refresh failed: {str(e)}")
+            with self._refresh_lock:
+                self._schedule_background_refresh(self.BACKGROUND_RETRY_SECONDS)
 
     def _get_gcp_identity_token(self) -> str:
         """
         GCP Service Account의 OIDC ID 토큰 획득
-        Cloud Run에서 실행 시 메타데이터 서버에서 가져옴
+        Cloud Run 메타데이터 서버 토큰을 프로세스 전역 캐시에서 재사용 (만료 전 자동 갱신)
         """
-        import requests
-
         try:
-            # Cloud Run 메타데이터 서버에서 ID 토큰 가져오기
-            metadata_server = "http://metadata.google.internal/computeMetadata/v1/"
-            token_url = metadata_server + "instance/service-accounts/default/identity?audience=accounts.google.com"
-
-            headers = {"Metadata-Flavor": "Google"}
-            response = requests.get(token_url, headers=headers, timeout=5)
-
-            if response.status_code == 200:
-                logger.info("✅ GCP OIDC token obtained from metadata server")
-                return response.text
-            else:
-                raise Exception(f"Failed to get GCP token: {response.status_code}")
+            return get_identity_token_cache().get_token()
 
         except Exception as e:
             logger.error(f"❌ Failed to get GCP OIDC token: {str(e)}")
@@ -83,11 +620,16 @@ class AWSLogFetcher:
             # GCP OIDC 토큰 획득
             gcp_token = self._get_gcp_identity_token()
 
-            # STS 클라이언트 생성 (자격증명 없이)
-            sts_client = boto3.client('sts', region_name=self.region)
+            # STS 클라이언트 (자격증명 없이, 갱신 간 재사용)
+            if self._sts_client is None:
+                self._sts_client = boto3.client('sts', region_name=self.region)
+            sts_client = self._sts_client
 
             # AssumeRoleWithWebIdentity 호출
-            response = sts_client.assume_role_with_web_identity(
+            response = call_with_retry(
+                sts_client.assume_role_with_web_identity,
+                'sts',
+                self.region,
                 RoleArn=self.role_arn,
                 RoleSessionName=self.session_name,
                 WebIdentityToken=gcp_token,
@@ -95,10 +637,10 @@ class AWSLogFetcher:
             )
 
             credentials = response['Credentials']
-            self._credentials_expire_at = credentials['Expiration']
+            self.expire_at = credentials['Expiration']
 
             logger.info(f"✅ Role assumed successfully with GCP OIDC token")
-            logger.info(f"   Session expires at: {self._credentials_expire_at}")
+            logger.info(f"   Session expires at: {self.expire_at}")
 
             return {
                 'aws_access_key_id': credentials['AccessKeyId'],
@@ -122,199 +664,678 @@ class AWSLogFetcher:
             logger.error(f"❌ Unexpected error during AssumeRole: {str(e)}")
             raise
 
-    def _get_logs_client(self):
+
+_credential_providers: Dict[Tuple[str, str, str], AWSCredentialProvider] = {}
+_credential_providers_lock = threading.Lock()
+
+
+def get_credential_provider(
+    role_arn: str,
+    region: str,
+    session_name: str = "CloudDoctorSession"
+) -> AWSCredentialProvider:
+    """(role_arn, region, session_name)에 해당하는 프로세스 전역 자격증명 제공자를 반환합니다."""
+    key = (role_arn, region, session_name)
+    with _credential_providers_lock:
+        provider = _credential_providers.get(key)
+        if provider is None:
+            provider = AWSCredentialProvider(role_arn, region, session_name)
+            _credential_providers[key] = provider
+        return provider
+
+
+class AWSLogFetcher:
+    """
+    AWS CloudWatch Logs를 안전하게 수집하는 클래스
+
+    특징:
+    - AssumeRole을 통한 임시 자격증명 사용 (장기 키 노출 방지)
+    - Cross-Account/Cross-Cloud 접근 지원
+    - 자동 재시도 및 에러 핸들링
+    """
+
+    def __init__(
+        self,
+        role_arn: str,
+        region: str = "ap-northeast-2",
+        session_name: str = "CloudDoctorSession",
+        shard_count: int = 1,
+        cursor_store: Optional[LogCursorStore] = None,
+        segment_cache: Optional[LogSegmentCache] = None,
+        tail_buffer: Optional[RecentEventsBuffer] = None,
+        sampling: Optional[str] = None,
+        sample_scan_limit: Optional[int] = DEFAULT_SAMPLE_SCAN_LIMIT
+    ):
         """
-        CloudWatch Logs 클라이언트를 가져옵니다.
-        자격증명이 만료되었으면 자동으로 갱신합니다.
+        Args:
+            role_arn: AWS IAM Role ARN (예: arn:aws:iam::123456789012:role/CloudDoctorRole)
+            region: AWS 리전
+            session_name: STS 세션 이름 (CloudTrail 로그에 표시됨)
+            shard_count: 긴 구간 조회 시 병렬로 나눌 시간 샤드 수 (1이면 순차 조회)
+            cursor_store: 증분 조회용 커서 저장소 (None이면 매번 전체 구간 조회)
+            segment_cache: 로컬 디스크 세그먼트 캐시 (None이면 사용 안 함)
+            tail_buffer: LiveTailIngester가 채우는 최근 이벤트 버퍼 (None이면 사용 안 함)
+            sampling: "reservoir", "stream", "severity" 중 하나면 윈도우 앞쪽 N개 대신 대표 표본을 반환
+            sample_scan_limit: 샘플링 시 훑을 최대 이벤트 수 (None이면 윈도우 전체, 커서 저장소가 있으면 버퍼 상한 이내)
         """
-        now = datetime.now(self._credentials_expire_at.tzinfo if self._credentials_expire_at else None)
-
-        # 자격증명이 없거나 5분 이내 만료 예정이면 갱신
-        if not self._logs_client or not self._credentials_expire_at or \
-           (self._credentials_expire_at - now).total_seconds() < 300:
+        if sampling and sampling not in SAMPLING_STRATEGIES:
+            raise ValueError(f"sampling must be one of {SAMPLING_STRATEGIES}, got '{sampling}'")
 
-            credentials = self._assume_role()
-            self._logs_client = boto3.client(
-                'logs',
-                region_name=self.region,
-                **credentials
-            )
+        self.role_arn = role_arn
+        self.region = region
+        self.session_name = session_name
+        self.shard_count = max(1, min(shard_count, MAX_FETCH_SHARDS))
+        self.cursor_store = cursor_store
+        self.segment_cache = segment_cache
+        self.tail_buffer = tail_buffer
+        self.sampling = sampling
+        self.sample_scan_limit = sample_scan_limit
+        self._credential_provider = get_credential_provider(role_arn, region, session_name)
+
+    @property
+    def _credentials_expire_at(self):
+        """공유 자격증명의 만료 시각 (아직 발급 전이면 None)"""
+        return self._credential_provider.expire_at
 
-        return self._logs_client
+    def _get_logs_client(self):
+        """
+        CloudWatch Logs 클라이언트를 가져옵니다.
+        프로세스 전역 자격증명 제공자가 갱신과 캐싱을 담당합니다.
+        """
+        return self._credential_provider.get_logs_client()
 
     async def fetch_error_logs(
         self,
         log_group_name: str,
         time_range_minutes: int = 30,
         max_results: int = 50,
-        filter_pattern: str = "?ERROR ?Error ?error ?CRITICAL ?FATAL"
-    ) -> List[Dict[str, Any]]:
+        filter_pattern: str = "?ERROR ?Error ?error ?CRITICAL ?FATAL",
+        timeout: Optional[float] = DEFAULT_FETCH_TIMEOUT_SECONDS
+    ) -> LogBatch:
         """
-        CloudWatch Logs에서 에러 로그를 수집합니다.
+        CloudWatch Logs에서 에러 로그를 수집합니다. (이벤트 루프를 막지 않음)
 
         Args:
             log_group_name: CloudWatch Log Group 이름
             time_range_minutes: 검색할 시간 범위 (분)
             max_results: 최대 결과 개수
             filter_pattern: CloudWatch Logs Insights 필터 패턴
+            timeout: 최대 대기 시간 (초, None이면 무제한)
+
+        Returns:
+            로그 이벤트 LogBatch (각 행은 {"timestamp": ..., "message": ...}처럼 접근)
+        """
+        return await self.get_error_logs_async(
+            log_group_name=log_group_name,
+            minutes=time_range_minutes,
+            max_logs=max_results,
+            filter_pattern=filter_pattern,
+            timeout=timeout
+        )
+
+    async def get_error_logs_async(
+        self,
+        log_group_name: str,
+        minutes: int = 30,
+        max_logs: int = 100,
+        filter_pattern: str = "?ERROR ?Error ?error ?CRITICAL ?FATAL ?WARNING ?Warning",
+        max_bytes: Optional[int] = None,
+        timeout: Optional[float] = DEFAULT_FETCH_TIMEOUT_SECONDS
+    ) -> LogBatch:
+        """
+        get_error_logs의 비동기 버전
+
+        boto3 호출은 전용 스레드 풀(_aws_io_executor)에서 실행되므로 FastAPI 이벤트 루프와
+        /health 같은 다른 요청이 막히지 않습니다. 타임아웃이나 태스크 취소 시 cancel_event를
+        set 하여 작업 스레드가 다음 페이지 요청 전에 멈추도록 합니다.
+
+        Args:
+            get_error_logs와 동일, 추가로
+            timeout: 최대 대기 시간 (초, None이면 무제한)
 
         Returns:
-            로그 이벤트 리스트 [{"timestamp": ..., "message": ...}, ...]
+            로그 이벤트 LogBatch
+
+        Raises:
+            TimeoutError: timeout 안에 조회가 끝나지 않은 경우
         """
+        cancel_event = threading.Event()
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(
+            _aws_io_executor,
+            lambda: self.get_error_logs(
+                log_group_name=log_group_name,
+                minutes=minutes,
+                max_logs=max_logs,
+                filter_pattern=filter_pattern,
+                max_bytes=max_bytes,
+                cancel_event=cancel_event
+            )
+        )
+
         try:
-            logs_client = self._get_logs_client()
+            return await asyncio.wait_for(future, timeout=timeout)
+        except asyncio.TimeoutError:
+            cancel_event.set()
+            logger.error(f"❌ Log fetch timed out after {timeout}s: {log_group_name}")
+            raise TimeoutError(f"Fetching logs from '{log_group_name}' timed out after {timeout}s")
+        except asyncio.CancelledError:
+            cancel_event.set()
+            raise
 
-            # 시간 범위 계산 (밀리초 단위)
-            end_time = datetime.utcnow()
-            start_time = end_time - timedelta(minutes=time_range_minutes)
+    def iter_error_logs(
+        self,
+        log_group_name: str,
+        minutes: int = 30,
+        max_logs: Optional[int] = 100,
+        max_bytes: Optional[int] = None,
+        filter_pattern: str = "?ERROR ?Error ?error ?CRITICAL ?FATAL ?WARNING ?Warning",
+        cancel_event: Optional[threading.Event] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        CloudWatch Logs 에러 로그를 페이지 단위로 스트리밍합니다.
 
-            start_ms = int(start_time.timestamp() * 1000)
-            end_ms = int(end_time.timestamp() * 1000)
+        nextToken을 따라가며 이벤트가 도착하는 대로 yield 하고,
+        이벤트 수(max_logs) 또는 바이트(max_bytes) 예산에 도달하면 조기 종료합니다.
 
-            logger.info(f"📊 Fetching logs from CloudWatch...")
-            logger.info(f"   Log Group: {log_group_name}")
-            logger.info(f"   Time Range: {start_time.isoformat()} ~ {end_time.isoformat()}")
-            logger.info(f"   Filter: {filter_pattern}")
+        Args:
+            log_group_name: CloudWatch Log Group 이름
+            minutes: 검색할 시간 범위 (분)
+            max_logs: 최대 이벤트 수 (None이면 제한 없음)
+            max_bytes: 메시지 바이트 합계 상한 (None이면 제한 없음)
+            filter_pattern: CloudWatch Logs 필터 패턴
+            cancel_event: set 되면 다음 페이지 요청 전에 조회를 중단
 
-            # CloudWatch Logs 쿼리
-            response = logs_client.filter_log_events(
-                logGroupName=log_group_name,
-                startTime=start_ms,
-                endTime=end_ms,
-                filterPattern=filter_pattern,
-                limit=max_results
+        Yields:
+            {"timestamp": ..., "message": ..., "log_stream": ...}
+        """
+        for event in self._iter_window_events(
+            log_group_name, minutes, max_logs, max_bytes, filter_pattern, cancel_event
+        ):
+            yield format_log_event(event)
+
+    def _iter_window_events(
+        self,
+        log_group_name: str,
+        minutes: int,
+        max_logs: Optional[int],
+        max_bytes: Optional[int],
+        filter_pattern: str,
+        cancel_event: Optional[threading.Event]
+    ) -> Iterator[Dict[str, Any]]:
+        """최근 minutes분 구간의 원본 이벤트를 스트리밍합니다. (iter_error_logs / get_error_logs 공용)"""
+        logs_client = self._get_logs_client()
+
+        # 시간 범위 계산 (밀리초 단위)
+        end_time = datetime.utcnow()
+        start_time = end_time - timedelta(minutes=minutes)
+
+        start_ms = int(start_time.timestamp() * 1000)
+        end_ms = int(end_time.timestamp() * 1000)
+
+        logger.info(f"📊 Fetching logs from CloudWatch (OIDC Keyless)...")
+        logger.info(f"   Log Group: {log_group_name}")
+        logger.info(f"   Time Range: {start_time.isoformat()} ~ {end_time.isoformat()}")
+        logger.info(f"   Filter: {filter_pattern}")
+
+        try:
+            yield from self._iter_raw_events(
+                logs_client,
+                log_group_name,
+                start_ms,
+                end_ms,
+                filter_pattern,
+                max_events=max_logs,
+                max_bytes=max_bytes,
+                cancel_event=cancel_event
             )
 
-            events = response.get('events', [])
+        except ClientError as e:
+            _raise_fetch_error(e, log_group_name)
+
+    def _iter_raw_events(
+        self,
+        logs_client,
+        log_group_name: str,
+        start_ms: int,
+        end_ms: int,
+        filter_pattern: str,
+        max_events: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        cancel_event: Optional[threading.Event] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        원본 이벤트를 타임스탬프 순으로 반환합니다.
 
-            # 로그 이벤트 변환
-            logs = []
-            for event in events:
-                logs.append({
-                    'timestamp': datetime.fromtimestamp(event['timestamp'] / 1000).isoformat(),
-                    'message': event['message'].strip(),
-                    'log_stream': event.get('logStreamName', 'unknown')
-                })
+        세그먼트 캐시가 있으면 캐시된 분 버킷은 디스크에서 읽고 나머지 구간만 조회합니다.
+        바이트 예산이 걸린 조회는 버킷이 완전한지 알 수 없으므로 캐시를 거치지 않습니다.
+        """
+        if self.segment_cache and max_bytes is None:
+            def fetch_range(range_start_ms: int, range_end_ms: int, range_max_events: Optional[int]):
+                events = list(self._iter_uncached_events(
+                    logs_client, log_group_name, range_start_ms, range_end_ms, filter_pattern,
+                    max_events=range_max_events, cancel_event=cancel_event
+                ))
+                events.sort(key=lambda event: event['timestamp'])
+                return events
+
+            return self.segment_cache.iter_events(
+                fetch_range,
+                self.region,
+                log_group_name,
+                filter_pattern,
+                start_ms,
+                end_ms,
+                max_events=max_events,
+                cancel_event=cancel_event
+            )
 
-            logger.info(f"✅ Fetched {len(logs)} log events")
+        return self._iter_uncached_events(
+            logs_client, log_group_name, start_ms, end_ms, filter_pattern,
+            max_events=max_events, max_bytes=max_bytes, cancel_event=cancel_event
+        )
 
-            return logs
+    def _iter_uncached_events(
+        self,
+        logs_client,
+        log_group_name: str,
+        start_ms: int,
+        end_ms: int,
+        filter_pattern: str,
+        max_events: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        cancel_event: Optional[threading.Event] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """구간이 충분히 길면 시간 샤드 병렬 조회, 아니면 순차 페이지네이션으로 원본 이벤트를 반환합니다."""
+        minutes = (end_ms - start_ms) // 60000
+        shard_count = min(self.shard_count, max(1, minutes // MIN_SHARD_MINUTES))
+
+        if shard_count > 1:
+            return iter(fetch_sharded_events(
+                logs_client,
+                log_group_name,
+                start_ms,
+                end_ms,
+                filter_pattern,
+                shard_count=shard_count,
+                max_events=max_events,
+                max_bytes=max_bytes,
+                cancel_event=cancel_event
+            ))
+
+        return iter_filtered_events(
+            logs_client,
+            log_group_name,
+            start_ms,
+            end_ms,
+            filter_pattern,
+            max_events=max_events,
+            max_bytes=max_bytes,
+            cancel_event=cancel_event
+        )
 
+    def _fetch_delta(
+        self,
+        log_group_name: str,
+        fetch_start_ms: int,
+        end_ms: int,
+        filter_pattern: str,
+        max_events: Optional[int],
+        max_bytes: Optional[int],
+        cancel_event: Optional[threading.Event]
+    ) -> List[Dict[str, Any]]:
+        """fetch_start_ms부터 원본 이벤트를 조회해 커서 저장소에 병합하고 새 이벤트만 반환합니다."""
+        logs_client = self._get_logs_client()
+
+        try:
+            events = list(self._iter_raw_events(
+                logs_client,
+                log_group_name,
+                fetch_start_ms,
+                end_ms,
+                filter_pattern,
+                max_events=max_events,
+                max_bytes=max_bytes,
+                cancel_event=cancel_event
+            ))
         except ClientError as e:
-            error_code = e.response['Error']['Code']
-            error_msg = e.response['Error']['Message']
+            _raise_fetch_error(e, log_group_name)
 
-            if error_code == 'ResourceNotFoundException':
-                logger.error(f"❌ Log Group not found: {log_group_name}")
-                raise Exception(f"Log group '{log_group_name}' does not exist")
-            else:
-                logger.error(f"❌ CloudWatch Logs API error: {error_code} - {error_msg}")
-                raise Exception(f"Failed to fetch logs: {error_msg}")
+        return self.cursor_store.merge(self.region, log_group_name, filter_pattern, events, fetch_start_ms)
 
-        except Exception as e:
-            logger.error(f"❌ Unexpected error while fetching logs: {str(e)}")
-            raise
+    def _window_events_incremental(
+        self,
+        log_group_name: str,
+        minutes: int,
+        max_logs: Optional[int],
+        filter_pattern: str,
+        max_bytes: Optional[int],
+        cancel_event: Optional[threading.Event]
+    ) -> List[Dict[str, Any]]:
+        """
+        커서 저장소를 사용한 윈도우 조회 (원본 이벤트)
+
+        버퍼가 윈도우를 이미 덮고 있으면 high-water mark 이후 delta만 CloudWatch에서 가져오고,
+        윈도우의 앞쪽 max_logs개가 이미 버퍼에 있으면 AWS 호출 없이 바로 반환합니다.
+        """
+        end_ms = int(datetime.utcnow().timestamp() * 1000)
+        start_ms = end_ms - minutes * 60 * 1000
+
+        fetch_start_ms, is_delta = self.cursor_store.plan_fetch(self.region, log_group_name, filter_pattern, start_ms)
+
+        remaining = None
+        if max_logs is not None:
+            buffered = self.cursor_store.count_in_window(self.region, log_group_name, filter_pattern, start_ms, end_ms) if is_delta else 0
+            remaining = max_logs - buffered
+
+        if remaining is None or remaining > 0:
+            logger.info(f"📊 Fetching {'delta' if is_delta else 'full window'} from CloudWatch (incremental)...")
+            logger.info(f"   Log Group: {log_group_name}")
+            logger.info(f"   From: {datetime.utcfromtimestamp(fetch_start_ms / 1000).isoformat()}")
+
+            # 겹쳐 읽는 구간의 기존 이벤트는 중복 제거되므로 그만큼 더 요청
+            limit = None
+            if remaining is not None:
+                limit = remaining + self.cursor_store.known_since(self.region, log_group_name, filter_pattern, fetch_start_ms)
+            new_events = self._fetch_delta(
+                log_group_name, fetch_start_ms, end_ms, filter_pattern,
+                max_events=limit, max_bytes=max_bytes, cancel_event=cancel_event
+            )
+            logger.info(f"   New events: {len(new_events)}")
+        else:
+            logger.info(f"📊 Serving {max_logs} events from incremental buffer (no CloudWatch call)")
+
+        return self.cursor_store.window(self.region, log_group_name, filter_pattern, start_ms, end_ms, max_events=max_logs)
+
+    def _window_events_from_tail(
+        self,
+        log_group_name: str,
+        minutes: int,
+        max_logs: Optional[int],
+        filter_pattern: str
+    ) -> Optional[List[Dict[str, Any]]]:
+        """윈도우가 실시간 수집 버퍼의 커버리지 안이면 AWS 호출 없이 버퍼에서 원본 이벤트를 반환합니다. (아니면 None)"""
+        end_ms = int(datetime.utcnow().timestamp() * 1000)
+        start_ms = end_ms - minutes * 60 * 1000
+
+        events = self.tail_buffer.window(
+            (self.region, log_group_name, filter_pattern), start_ms, end_ms, max_events=max_logs
+        )
+        if events is None:
+            return None
+
+        logger.info(f"📡 Serving {len(events)} events from live-tail buffer (no CloudWatch call)")
+        return events
+
+    def _window_events(
+        self,
+        log_group_name: str,
+        minutes: int,
+        max_logs: Optional[int],
+        filter_pattern: str,
+        max_bytes: Optional[int],
+        cancel_event: Optional[threading.Event]
+    ) -> Iterator[Dict[str, Any]]:
+        """실시간 수집 버퍼 → 커서 저장소 → CloudWatch 스트리밍 순으로 윈도우 원본 이벤트를 가져옵니다."""
+        if self.tail_buffer and max_bytes is None:
+            events = self._window_events_from_tail(log_group_name, minutes, max_logs, filter_pattern)
+            if events is not None:
+                return iter(events)
+
+        if self.cursor_store:
+            return iter(self._window_events_incremental(
+                log_group_name, minutes, max_logs, filter_pattern, max_bytes, cancel_event
+            ))
+
+        return self._iter_window_events(
+            log_group_name, minutes, max_logs, max_bytes, filter_pattern, cancel_event
+        )
+
+    def _get_sampled_error_logs(
+        self,
+        log_group_name: str,
+        minutes: int,
+        max_logs: int,
+        filter_pattern: str,
+        max_bytes: Optional[int],
+        cancel_event: Optional[threading.Event]
+    ) -> LogBatch:
+        """
+        윈도우를 한 번 훑으며 (최대 sample_scan_limit개) max_logs개의 대표 표본을 뽑습니다.
+
+        표본은 타임스탬프 순이며, 본/남긴/버린 이벤트 수는 LogBatch.sampling에 기록됩니다.
+
+        메모리: 표본기 자체는 O(max_logs)이지만 훑는 이벤트의 원천에 따라 추가로 올라가는 양이 다릅니다.
+        - 순차 CloudWatch 스트리밍 (샤드 1, 캐시 없음): 페이지 하나 (최대 MAX_EVENTS_PER_PAGE건)
+        - 샤드 병렬 조회 / 세그먼트 캐시의 미캐시 구간: 조회 구간 전체 (최대 스캔 한도)
+        - 커서 저장소: 윈도우를 버퍼에 보관하므로 최대 스캔 한도 (버퍼 상한 max_buffer_events로 제한)
+        - 실시간 수집 버퍼: 버퍼에 이미 있는 윈도우를 리스트로 복사 (버퍼 바이트 상한 이내)
+        """
+        scan_limit = self.sample_scan_limit
+        if self.cursor_store:
+            # 버퍼 상한보다 많이 훑으면 매 호출마다 버퍼가 잘리고 윈도우 전체를 다시 조회함
+            buffer_limit = self.cursor_store.max_buffer_events
+            scan_limit = buffer_limit if scan_limit is None else min(scan_limit, buffer_limit)
+
+        sampler = LogSampler(self.sampling, max_logs)
+        for event in self._window_events(
+            log_group_name, minutes, scan_limit, filter_pattern, max_bytes, cancel_event
+        ):
+            sampler.offer(event)
+
+        logs = LogBatch.from_events(sampler.sample())
+        logs.sampling = sampler.summary()
+        logs.sampling["scan_truncated"] = scan_limit is not None and logs.sampling["seen"] >= scan_limit
+
+        logger.info(
+            f"🎲 Sampled {logs.sampling['kept']} of {logs.sampling['seen']} events "
+            f"({self.sampling}, {len(logs.sampling['strata'])} strata)"
+        )
+        return logs
+
+    def get_new_error_logs(
+        self,
+        log_group_name: str,
+        minutes: int = 30,
+        max_logs: Optional[int] = 100,
+        filter_pattern: str = "?ERROR ?Error ?error ?CRITICAL ?FATAL ?WARNING ?Warning",
+        max_bytes: Optional[int] = None,
+        cancel_event: Optional[threading.Event] = None
+    ) -> LogBatch:
+        """
+        저장된 high-water mark 이후 새로 들어온 에러 로그만 수집합니다. (스케줄 분석용)
+
+        커서가 없으면 최근 minutes분을 조회하고 커서를 생성합니다.
+        커서는 파일에 영속화되므로 프로세스가 재시작되어도 delta만 조회합니다.
+
+        Args:
+            get_error_logs와 동일
+
+        Returns:
+            새 로그 이벤트 LogBatch (각 행은 {"timestamp": ..., "message": ...}처럼 접근)
+        """
+        if not self.cursor_store:
+            raise ValueError("get_new_error_logs requires a cursor_store")
+
+        end_ms = int(datetime.utcnow().timestamp() * 1000)
+        cursor = self.cursor_store.get_cursor(self.region, log_group_name, filter_pattern)
+        fetch_start_ms = cursor['last_timestamp'] if cursor else end_ms - minutes * 60 * 1000
+
+        # 커서 시각의 이미 본 이벤트는 중복 제거되므로 그만큼 더 요청
+        limit = None
+        if max_logs is not None:
+            limit = max_logs + self.cursor_store.known_since(self.region, log_group_name, filter_pattern, fetch_start_ms)
+        new_events = self._fetch_delta(
+            log_group_name, fetch_start_ms, end_ms, filter_pattern,
+            max_events=limit, max_bytes=max_bytes, cancel_event=cancel_event
+        )
+
+        logger.info(f"✅ Fetched {len(new_events)} new log events since cursor")
+        return LogBatch.from_events(new_events)
 
     def get_error_logs(
         self,
         log_group_name: str,
         minutes: int = 30,
         max_logs: int = 100,
-        filter_pattern: str = "?ERROR ?Error ?error ?CRITICAL ?FATAL ?WARNING ?Warning"
-    ) -> List[Dict[str, Any]]:
+        filter_pattern: str = "?ERROR ?Error ?error ?CRITICAL ?FATAL ?WARNING ?Warning",
+        max_bytes: Optional[int] = None,
+        cancel_event: Optional[threading.Event] = None
+    ) -> LogBatch:
         """
         CloudWatch Logs에서 에러 로그를 수집합니다. (Sync 버전 - main.py 호환)
 
         Args:
             log_group_name: CloudWatch Log Group 이름
             minutes: 검색할 시간 범위 (분)
-            max_logs: 최대 결과 개수
+            max_logs: 최대 결과 개수 (샘플링 시 표본 크기)
             filter_pattern: CloudWatch Logs Insights 필터 패턴
+            max_bytes: 메시지 바이트 합계 상한 (None이면 제한 없음)
+            cancel_event: set 되면 다음 페이지 요청 전에 조회를 중단
 
         Returns:
-            로그 이벤트 리스트 [{"timestamp": ..., "message": ...}, ...]
+            로그 이벤트 LogBatch (컬럼형, 각 행은 {"timestamp": ..., "message": ...}처럼 접근)
         """
         try:
-            logs_client = self._get_logs_client()
+            if self.sampling:
+                logs = self._get_sampled_error_logs(
+                    log_group_name, minutes, max_logs, filter_pattern, max_bytes, cancel_event
+                )
+            else:
+                logs = LogBatch.from_events(self._window_events(
+                    log_group_name, minutes, max_logs, filter_pattern, max_bytes, cancel_event
+                ))
 
-            # 시간 범위 계산 (밀리초 단위)
-            end_time = datetime.utcnow()
-            start_time = end_time - timedelta(minutes=minutes)
+            logger.info(f"✅ Fetched {len(logs)} log events (via OIDC Keyless)")
 
-            start_ms = int(start_time.timestamp() * 1000)
-            end_ms = int(end_time.timestamp() * 1000)
+            return logs
 
-            logger.info(f"📊 Fetching logs from CloudWatch (OIDC Keyless)...")
-            logger.info(f"   Log Group: {log_group_name}")
-            logger.info(f"   Time Range: {start_time.isoformat()} ~ {end_time.isoformat()}")
-            logger.info(f"   Filter: {filter_pattern}")
+        except Exception as e:
+            logger.error(f"❌ Unexpected error while fetching logs: {str(e)}")
+            raise
 
-            # CloudWatch Logs 쿼리
-            response = logs_client.filter_log_events(
-                logGroupName=log_group_name,
-                startTime=start_ms,
-                endTime=end_ms,
-                filterPattern=filter_pattern,
-                limit=max_logs
-            )
+    def aggregate_error_logs(
+        self,
+        log_group_name: str,
+        minutes: int = 30,
+        group_by: str = "pattern",
+        bin_minutes: int = 5,
+        max_groups: int = 50,
+        timeout: float = INSIGHTS_QUERY_TIMEOUT_SECONDS,
+        cancel_event: Optional[threading.Event] = None
+    ) -> Dict[str, Any]:
+        """
+        Logs Insights로 에러 로그를 서버 측에서 집계합니다. (대량 로그 구간용)
 
-            events = response.get('events', [])
+        수만 건의 원본 이벤트를 내려받아 100줄만 Gemini에 보내는 대신,
+        그룹별 건수와 대표 예시 몇 줄만 가져옵니다.
 
-            # 로그 이벤트 변환
-            logs = []
-            for event in events:
-                logs.append({
-                    'timestamp': datetime.fromtimestamp(event['timestamp'] / 1000).isoformat(),
-                    'message': event['message'].strip(),
-                    'log_stream': event.get('logStreamName', 'unknown')
-                })
+        Args:
+            log_group_name: CloudWatch Log Group 이름
+            minutes: 검색할 시간 범위 (분)
+            group_by: "pattern", "bin", "stream" 중 하나
+            bin_minutes: group_by="bin"일 때 구간 길이 (분)
+            max_groups: 최대 그룹 수
+            timeout: 쿼리 완료 대기 시간 (초)
+            cancel_event: set 되면 다음 폴링 시 쿼리를 중단
 
-            logger.info(f"✅ Fetched {len(logs)} log events (via OIDC Keyless)")
+        Returns:
+            {"groups": [...], "total_events": int, "logs": 분석기 입력 형식 리스트, "statistics": {...}}
+        """
+        logs_client = self._get_logs_client()
 
-            return logs
+        end_time = datetime.utcnow()
+        start_time = end_time - timedelta(minutes=minutes)
+
+        start_ms = int(start_time.timestamp() * 1000)
+        end_ms = int(end_time.timestamp() * 1000)
 
+        query = build_insights_query(group_by, bin_minutes, max_groups)
+
+        logger.info(f"📊 Aggregating logs with CloudWatch Logs Insights...")
+        logger.info(f"   Log Group: {log_group_name}")
+        logger.info(f"   Time Range: {start_time.isoformat()} ~ {end_time.isoformat()}")
+        logger.info(f"   Group By: {group_by}")
+
+        try:
+            result = run_insights_query(
+                logs_client,
+                log_group_name,
+                start_ms,
+                end_ms,
+                query,
+                timeout=timeout,
+                cancel_event=cancel_event
+            )
         except ClientError as e:
-            error_code = e.response['Error']['Code']
-            error_msg = e.response['Error']['Message']
+            _raise_fetch_error(e, log_group_name)
 
-            if error_code == 'ResourceNotFoundException':
-                logger.error(f"❌ Log Group not found: {log_group_name}")
-                raise Exception(f"Log group '{log_group_name}' does not exist")
-            else:
-                logger.error(f"❌ CloudWatch Logs API error: {error_code} - {error_msg}")
-                raise Exception(f"Failed to fetch logs: {error_msg}")
+        groups = normalize_insights_rows(result['rows'], group_by)
+        total_events = sum(group['count'] for group in groups)
 
-        except Exception as e:
-            logger.error(f"❌ Unexpected error while fetching logs: {str(e)}")
+        logger.info(f"✅ Aggregated {total_events} events into {len(groups)} groups "
+                    f"(scanned {result['statistics'].get('recordsScanned', 'n/a')} records)")
+
+        return {
+            "groups": groups,
+            "total_events": total_events,
+            "logs": aggregated_rows_to_logs(groups, start_time.isoformat()),
+            "statistics": result['statistics']
+        }
+
+    async def aggregate_error_logs_async(
+        self,
+        log_group_name: str,
+        minutes: int = 30,
+        group_by: str = "pattern",
+        timeout: float = INSIGHTS_QUERY_TIMEOUT_SECONDS,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """aggregate_error_logs의 비동기 버전 (전용 스레드 풀에서 실행)"""
+        cancel_event = threading.Event()
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(
+            _aws_io_executor,
+            lambda: self.aggregate_error_logs(
+                log_group_name=log_group_name,
+                minutes=minutes,
+                group_by=group_by,
+                timeout=timeout,
+                cancel_event=cancel_event,
+                **kwargs
+            )
+        )
+
+        try:
+            # 폴링 간격만큼 여유를 두어 작업 스레드의 TimeoutError가 먼저 전달되도록 함
+            return await asyncio.wait_for(future, timeout=timeout + INSIGHTS_POLL_MAX_SECONDS)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            cancel_event.set()
             raise
 
-    async def test_connection(self) -> Dict[str, Any]:
+    async def test_connection(self, timeout: Optional[float] = 10) -> Dict[str, Any]:
         """
         AWS 연결 테스트 (헬스체크용)
 
+        STS 호출은 전용 스레드 풀에서 실행되므로 이벤트 루프를 막지 않습니다.
+
+        Args:
+            timeout: 최대 대기 시간 (초)
+
         Returns:
             연결 상태 정보
         """
         try:
-            credentials = self._assume_role()
-
-            # STS GetCallerIdentity로 현재 자격증명 확인
-            sts_client = boto3.client(
-                'sts',
-                region_name=self.region,
-                aws_access_key_id=credentials['aws_access_key_id'],
-                aws_secret_access_key=credentials['aws_secret_access_key'],
-                aws_session_token=credentials['aws_session_token']
+            loop = asyncio.get_running_loop()
+            return await asyncio.wait_for(
+                loop.run_in_executor(_aws_io_executor, self._check_identity),
+                timeout=timeout
             )
 
-            identity = sts_client.get_caller_identity()
-
+        except asyncio.TimeoutError:
             return {
-                "status": "success",
-                "account_id": identity['Account'],
-                "user_id": identity['UserId'],
-                "arn": identity['Arn'],
-                "credentials_expire_at": self._credentials_expire_at.isoformat()
+                "status": "failed",
+                "error": f"Connection test timed out after {timeout}s"
             }
 
         except Exception as e:
@@ -323,10 +1344,404 @@ class AWSLogFetcher:
                 "error": str(e)
             }
 
+    def _check_identity(self) -> Dict[str, Any]:
+        """STS GetCallerIdentity로 현재 자격증명을 확인합니다. (블로킹)"""
+        credentials = self._credential_provider.get_credentials()
+
+        sts_client = boto3.client(
+            'sts',
+            region_name=self.region,
+            aws_access_key_id=credentials['aws_access_key_id'],
+            aws_secret_access_key=credentials['aws_secret_access_key'],
+            aws_session_token=credentials['aws_session_token']
+        )
+
+        identity = call_with_retry(sts_client.get_caller_identity, 'sts', self.region)
+
+        return {
+            "status": "success",
+            "account_id": identity['Account'],
+            "user_id": identity['UserId'],
+            "arn": identity['Arn'],
+            "credentials_expire_at": self._credentials_expire_at.isoformat()
+        }
+
+
+class MultiTargetLogFetcher:
+    """
+    여러 (region, log_group) 대상을 동시에 조회하여 하나의 스트림으로 병합하는 클래스
+
+    특징:
+    - 리전별 AWSLogFetcher (리전별 자격증명 제공자와 Logs 클라이언트 풀 공유)
+    - 대상별 타임아웃: 느린 리전 하나가 전체 분석을 지연시키지 않음
+    - 결과 이벤트에 region / log_group 태그 부여
+    """
+
+    def __init__(
+        self,
+        role_arn: str,
+        targets: List[Tuple[str, str]],
+        session_name: str = "CloudDoctorSession",
+        shard_count: int = 1,
+        cursor_store: Optional[LogCursorStore] = None,
+        segment_cache: Optional[LogSegmentCache] = None,
+        tail_buffer: Optional[RecentEventsBuffer] = None,
+        sampling: Optional[str] = None,
+        sample_scan_limit: Optional[int] = DEFAULT_SAMPLE_SCAN_LIMIT,
+        target_timeout: float = DEFAULT_FETCH_TIMEOUT_SECONDS
+    ):
+        """
+        Args:
+            role_arn: AWS IAM Role ARN
+            targets: [(region, log_group_name), ...]
+            session_name: STS 세션 이름
+            shard_count: 대상별 시간 샤드 수
+            cursor_store: 증분 조회용 커서 저장소
+            segment_cache: 로컬 디스크 세그먼트 캐시
+            tail_buffer: 실시간 수집 버퍼
+            sampling: 대상별 샘플링 전략 (표본 크기는 대상 수로 나눔)
+            sample_scan_limit: 대상별 샘플링 시 훑을 최대 이벤트 수
+            target_timeout: 대상별 최대 대기 시간 (초)
+        """
+        self.targets = targets
+        self.target_timeout = target_timeout
+        self.sampling = sampling
+        self._fetchers: Dict[str, AWSLogFetcher] = {}
+
+        for region, _ in targets:
+            if region not in self._fetchers:
+                self._fetchers[region] = AWSLogFetcher(
+                    role_arn=role_arn,
+                    region=region,
+                    session_name=session_name,
+                    shard_count=shard_count,
+                    cursor_store=cursor_store,
+                    segment_cache=segment_cache,
+                    tail_buffer=tail_buffer,
+                    sampling=sampling,
+                    sample_scan_limit=sample_scan_limit
+                )
+
+    async def _fan_out(self, fetch) -> Dict[str, Any]:
+        """
+        fetch(fetcher, log_group_name)를 모든 대상에 대해 동시에 실행합니다.
+
+        Returns:
+            {"results": [(region, log_group, 결과), ...], "targets": [대상별 상태, ...]}
+        """
+        async def run_target(region: str, log_group_name: str):
+            start = time.monotonic()
+            try:
+                result = await asyncio.wait_for(
+                    fetch(self._fetchers[region], log_group_name),
+                    timeout=self.target_timeout
+                )
+                return result, None, time.monotonic() - start
+            except asyncio.TimeoutError:
+                return None, f"timed out after {self.target_timeout}s", time.monotonic() - start
+            except Exception as e:
+                return None, str(e), time.monotonic() - start
+
+        outcomes = await asyncio.gather(*[
+            run_target(region, log_group_name) for region, log_group_name in self.targets
+        ])
+
+        results = []
+        statuses = []
+        for (region, log_group_name), (result, error, elapsed) in zip(self.targets, outcomes):
+            status = {
+                "region": region,
+                "log_group": log_group_name,
+                "status": "failed" if error else "success",
+                "elapsed_seconds": round(elapsed, 3)
+            }
+            if error:
+                status["error"] = error
+                logger.warning(f"⚠️ Target {region}:{log_group_name} failed: {error}")
+            else:
+                results.append((region, log_group_name, result))
+            statuses.append(status)
+
+        if not results:
+            raise Exception(f"All {len(self.targets)} log targets failed")
+
+        return {"results": results, "targets": statuses}
+
+    async def get_error_logs_async(
+        self,
+        minutes: int = 30,
+        max_logs: Optional[int] = 100,
+        filter_pattern: str = "?ERROR ?Error ?error ?CRITICAL ?FATAL ?WARNING ?Warning"
+    ) -> Dict[str, Any]:
+        """
+        모든 대상의 에러 로그를 동시에 수집하여 타임스탬프 순으로 병합합니다.
+
+        Returns:
+            {"logs": LogBatch (각 행은 {"timestamp", "message", "log_stream", "region", "log_group"}),
+             "targets": [대상별 상태, ...]}
+        """
+        # 샘플링 시 대상마다 같은 몫의 표본을 뽑아 병합 후 잘리지 않도록 함
+        target_max_logs = max_logs
+        if self.sampling and max_logs is not None:
+            target_max_logs = max(1, max_logs // len(self.targets))
+
+        fanned_out = await self._fan_out(
+            lambda fetcher, log_group_name: fetcher.get_error_logs_async(
+                log_group_name=log_group_name,
+                minutes=minutes,
+                max_logs=target_max_logs,
+                filter_pattern=filter_pattern,
+                timeout=None  # 대상별 타임아웃은 _fan_out에서 적용
+            )
+        )
+
+        merged = LogBatch.merge(
+            [logs for _, _, logs in fanned_out["results"]],
+            max_rows=max_logs,
+            sources=[(region, log_group_name) for region, log_group_name, _ in fanned_out["results"]]
+        )
+        merged.sampling = merge_sampling_summaries([logs.sampling for _, _, logs in fanned_out["results"]])
+
+        logger.info(f"✅ Fetched {len(merged)} log events from {len(fanned_out['results'])}/{len(self.targets)} targets")
+
+        return {"logs": merged, "targets": fanned_out["targets"]}
+
+    async def aggregate_error_logs_async(
+        self,
+        minutes: int = 30,
+        group_by: str = "pattern",
+        **kwargs
+    ) -> Dict[str, Any]:
+        """
+        모든 대상에서 Logs Insights 집계를 동시에 실행하고 결과를 합칩니다.
+
+        Returns:
+            {"groups": [...], "total_events": int, "logs": [...], "targets": [대상별 상태, ...]}
+        """
+        fanned_out = await self._fan_out(
+            lambda fetcher, log_group_name: fetcher.aggregate_error_logs_async(
+                log_group_name=log_group_name,
+                minutes=minutes,
+                group_by=group_by,
+                timeout=self.target_timeout,
+                **kwargs
+            )
+        )
+
+        groups = []
+        logs = []
+        for region, log_group_name, aggregated in fanned_out["results"]:
+            groups.extend(dict(group, region=region, log_group=log_group_name) for group in aggregated["groups"])
+            logs.extend(dict(log, region=region, log_group=log_group_name) for log in aggregated["logs"])
+
+        return {
+            "groups": groups,
+            "total_events": sum(group['count'] for group in groups),
+            "logs": logs,
+            "targets": fanned_out["targets"]
+        }
+
+
+class LiveTailIngester:
+    """
+    설정된 로그 그룹의 새 에러 이벤트를 백그라운드에서 계속 수집하여 RecentEventsBuffer를 채우는 클래스
+
+    Slack 명령처럼 빠른 응답이 필요한 분석이 매번 CloudWatch를 새로 조회하지 않도록,
+    버퍼 구간 안의 윈도우는 AWSLogFetcher가 메모리에서 바로 응답합니다.
+
+    특징:
+    - live: StartLiveTail 세션 (세션 최대 3시간, 끊기면 재연결하고 커버리지를 새로 시작)
+            서버가 결과를 샘플링하면 그 시점 이전 구간은 불완전한 것으로 표시
+    - poll: 짧은 주기 FilterLogEvents 폴링 (시작 시 backfill_minutes만큼 미리 채우고,
+            수집 지연을 고려해 직전 구간과 겹쳐 조회한 뒤 eventId로 중복 제거)
+    - 대상별 데몬 스레드, stop()으로 종료
+    """
+
+    MODES = ("live", "poll")
+    RECONNECT_DELAY_SECONDS = 5
+
+    def __init__(
+        self,
+        role_arn: str,
+        targets: List[Tuple[str, str]],
+        buffer: RecentEventsBuffer,
+        mode: str = "poll",
+        filter_pattern: str = "?ERROR ?Error ?error ?CRITICAL ?FATAL ?WARNING ?Warning",
+        poll_interval_seconds: float = 15,
+        backfill_minutes: int = 30,
+        session_name: str = "CloudDoctorSession"
+    ):
+        """
+        Args:
+            role_arn: AWS IAM Role ARN
+            targets: [(region, log_group_name), ...]
+            buffer: 수집한 이벤트를 보관할 버퍼
+            mode: "live" (StartLiveTail) 또는 "poll" (FilterLogEvents 폴링)
+            filter_pattern: CloudWatch Logs 필터 패턴 (분석 요청과 같아야 버퍼가 사용됨)
+            poll_interval_seconds: poll 모드 조회 주기 (초)
+            backfill_minutes: poll 모드 시작 시 미리 채울 구간 (분)
+            session_name: STS 세션 이름
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"mode must be one of {self.MODES}, got '{mode}'")
+
+        self.role_arn = role_arn
+        self.targets = targets
+        self.buffer = buffer
+        self.mode = mode
+        self.filter_pattern = filter_pattern
+        self.poll_interval_seconds = poll_interval_seconds
+        self.backfill_minutes = backfill_minutes
+        self.session_name = session_name
+        self._stop_event = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._streams = []
+
+    def start(self):
+        """대상별 수집 스레드를 시작합니다."""
+        run = self._run_live_tail if self.mode == "live" else self._run_poll
+        for region, log_group_name in self.targets:
+            thread = threading.Thread(
+                target=run,
+                args=(region, log_group_name),
+                name=f"log-tail-{region}",
+                daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+        logger.info(f"📡 Live-tail ingester started ({self.mode}, {len(self.targets)} targets)")
+
+    def stop(self):
+        """수집을 중단합니다. (열린 Live Tail 스트림도 닫음)"""
+        self._stop_event.set()
+        for stream in list(self._streams):
+            try:
+                stream.close()
+            except Exception:
+                pass
+
+    def _key(self, region: str, log_group_name: str) -> Tuple[str, str, str]:
+        return (region, log_group_name, self.filter_pattern)
+
+    def _run_poll(self, region: str, log_group_name: str):
+        key = self._key(region, log_group_name)
+        provider = get_credential_provider(self.role_arn, region, self.session_name)
+        fetch_start_ms = int(time.time() * 1000) - self.backfill_minutes * 60 * 1000
+
+        while not self._stop_event.is_set():
+            end_ms = int(time.time() * 1000)
+            fetch_start_ms = max(fetch_start_ms, end_ms - self.buffer.horizon_ms)
+            try:
+                events = list(iter_filtered_events(
+                    provider.get_logs_client(),
+                    log_group_name,
+                    fetch_start_ms,
+                    end_ms,
+                    self.filter_pattern,
+                    cancel_event=self._stop_event
+                ))
+                if self._stop_event.is_set():
+                    return
+
+                self.buffer.add(key, events)
+                self.buffer.mark_covered(key, fetch_start_ms, end_ms)
+                # 늦게 수집되는 이벤트를 놓치지 않도록 다음 조회는 겹쳐서 시작
+                fetch_start_ms = end_ms - LogCursorStore.INGESTION_LAG_MS
+            except Exception as e:
+                logger.warning(f"⚠️ Live-tail poll failed for {region}:{log_group_name}: {str(e)}")
+
+            self._stop_event.wait(self.poll_interval_seconds)
+
+    def _resolve_log_group_arn(self, logs_client, log_group_name: str) -> str:
+        """StartLiveTail은 로그 그룹 ARN을 요구하므로 이름으로 ARN을 찾습니다."""
+        response = call_with_retry(
+            logs_client.describe_log_groups,
+            'logs:DescribeLogGroups',
+            _client_region(logs_client),
+            logGroupNamePrefix=log_group_name
+        )
+        for group in response.get('logGroups', []):
+            if group['logGroupName'] == log_group_name:
+                return group.get('logGroupArn') or group['arn'].rstrip('*').rstrip(':')
+        raise Exception(f"Log group '{log_group_name}' not found")
+
+    def _run_live_tail(self, region: str, log_group_name: str):
+        key = self._key(region, log_group_name)
+        provider = get_credential_provider(self.role_arn, region, self.session_name)
+
+        while not self._stop_event.is_set():
+            stream = None
+            try:
+                logs_client = provider.get_logs_client()
+                response = call_with_retry(
+                    logs_client.start_live_tail,
+                    'logs:StartLiveTail',
+                    region,
+                    logGroupIdentifiers=[self._resolve_log_group_arn(logs_client, log_group_name)],
+                    logEventFilterPattern=self.filter_pattern
+                )
+                stream = response['responseStream']
+                self._streams.append(stream)
+                # 이 시각 이후의 이벤트는 빠짐없이 전달됨 (세션 시작 또는 마지막 샘플링 시각)
+                covered_since_ms = None
+
+                for message in stream:
+                    if self._stop_event.is_set():
+                        break
+
+                    now_ms = int(time.time() * 1000)
+                    if 'sessionStart' in message:
+                        # 세션 시작 이후 수집된 이벤트부터 빠짐없이 전달됨
+                        logger.info(f"📡 Live Tail session started: {region}:{log_group_name}")
+                        covered_since_ms = now_ms
+                        self.buffer.mark_covered(key, now_ms, now_ms)
+                        continue
+
+                    update = message.get('sessionUpdate')
+                    if not update or covered_since_ms is None:
+                        continue
+
+                    if update.get('sessionMetadata', {}).get('sampled'):
+                        logger.warning(f"⚠️ Live Tail results sampled for {region}:{log_group_name}")
+                        covered_since_ms = now_ms
+                        self.buffer.reset_coverage(key, now_ms)
+
+                    self.buffer.add(key, [
+                        {
+                            'timestamp': result['timestamp'],
+                            'message': result['message'],
+                            'logStreamName': result.get('logStreamName')
+                        }
+                        for result in update.get('sessionResults', [])
+                    ])
+                    self.buffer.mark_covered(key, covered_since_ms, now_ms)
+
+            except Exception as e:
+                if not self._stop_event.is_set():
+                    logger.warning(f"⚠️ Live Tail session failed for {region}:{log_group_name}: {str(e)}")
+            finally:
+                if stream is not None:
+                    self._streams.remove(stream)
+                    try:
+                        stream.close()
+                    except Exception:
+                        pass
+
+            self._stop_event.wait(self.RECONNECT_DELAY_SECONDS)
+
+    def stats(self) -> Dict[str, Any]:
+        """수집기 상태와 버퍼 통계 (모니터링용)"""
+        return {
+            "mode": self.mode,
+            "targets": [f"{region}:{log_group_name}" for region, log_group_name in self.targets],
+            "running": not self._stop_event.is_set(),
+            "buffer": self.buffer.stats()
+        }
+
 
 # 사용 예시 (테스트용)
 if __name__ == "__main__":
-    import asyncio
     import os
 
     async def test():
@@ -386,19 +1801,21 @@ class AWSClientDirect:
         log_group_name: str,
         minutes: int = 30,
         max_logs: int = 100,
-        filter_pattern: str = "?ERROR ?Error ?error ?CRITICAL ?FATAL ?WARNING ?Warning"
-    ) -> List[Dict[str, Any]]:
+        filter_pattern: str = "?ERROR ?Error ?error ?CRITICAL ?FATAL ?WARNING ?Warning",
+        max_bytes: Optional[int] = None
+    ) -> LogBatch:
         """
-        Fetch error logs from CloudWatch Logs
+        Fetch error logs from CloudWatch Logs, following nextToken pagination
 
         Args:
             log_group_name: CloudWatch Log Group name
             minutes: Time range in minutes
             max_logs: Maximum number of logs to fetch
             filter_pattern: CloudWatch Logs filter pattern
+            max_bytes: Optional cap on total message bytes
 
         Returns:
-            List of log events with timestamp and message
+            LogBatch of log events (rows support log['timestamp'] / log['message'])
         """
         try:
             # Calculate time range (milliseconds)
@@ -413,40 +1830,25 @@ class AWSClientDirect:
             logger.info(f"   Time Range: {start_time.isoformat()} ~ {end_time.isoformat()}")
             logger.info(f"   Filter: {filter_pattern}")
 
-            # Query CloudWatch Logs
-            response = self.logs_client.filter_log_events(
-                logGroupName=log_group_name,
-                startTime=start_ms,
-                endTime=end_ms,
-                filterPattern=filter_pattern,
-                limit=max_logs
+            # Follow nextToken until the event/byte budget is reached
+            logs = LogBatch.from_events(
+                iter_filtered_events(
+                    self.logs_client,
+                    log_group_name,
+                    start_ms,
+                    end_ms,
+                    filter_pattern,
+                    max_events=max_logs,
+                    max_bytes=max_bytes
+                )
             )
 
-            events = response.get('events', [])
-
-            # Convert log events
-            logs = []
-            for event in events:
-                logs.append({
-                    'timestamp': datetime.fromtimestamp(event['timestamp'] / 1000).isoformat(),
-                    'message': event['message'].strip(),
-                    'log_stream': event.get('logStreamName', 'unknown')
-                })
-
             logger.info(f"✅ Fetched {len(logs)} log events")
 
             return logs
 
         except ClientError as e:
-            error_code = e.response['Error']['Code']
-            error_msg = e.response['Error']['Message']
-
-            if error_code == 'ResourceNotFoundException':
-                logger.error(f"❌ Log Group not found: {log_group_name}")
-                raise Exception(f"Log group '{log_group_name}' does not exist")
-            else:
-                logger.error(f"❌ CloudWatch Logs API error: {error_code} - {error_msg}")
-                raise Exception(f"Failed to fetch logs: {error_msg}")
+            _raise_fetch_error(e, log_group_name)
 
         except Exception as e:
             logger.error(f"❌ Unexpected error while fetching logs: {str(e)}")
@@ -0,0 +1,163 @@
+"""
+AWS Throttle - 클라이언트 측 적응형 속도 제한 및 재시도
+CloudWatch Logs / Logs Insights / STS 호출이 스로틀링될 때 전체 분석이 실패하지 않도록
+토큰 버킷으로 요청 속도를 조절하고 decorrelated jitter로 재시도합니다.
+"""
+
+import logging
+import random
+import threading
+import time
+from typing import Dict, Any, Tuple, Callable
+
+from botocore.exceptions import ClientError
+
+logger = logging.getLogger(__name__)
+
+# 재시도 대상 스로틀링 에러 코드
+THROTTLING_ERROR_CODES = {
+    'ThrottlingException',
+    'TooManyRequestsException',
+    'Throttling',
+    'RequestLimitExceeded',
+    'LimitExceededException'
+}
+
+# API별 (초기 TPS, 최대 TPS) - 계정/리전 기본 할당량 기준
+DEFAULT_RATE_LIMITS = {
+    'logs:FilterLogEvents': (5.0, 10.0),
+    'logs:StartQuery': (5.0, 5.0),
+    'logs:GetQueryResults': (5.0, 10.0),
+    'sts': (10.0, 20.0)
+}
+
+
+def is_throttling_error(error: Exception) -> bool:
+    return isinstance(error, ClientError) and error.response['Error']['Code'] in THROTTLING_ERROR_CODES
+
+
+class AdaptiveRateLimiter:
+    """
+    AIMD 방식으로 지속 가능한 요청 속도를 학습하는 토큰 버킷
+
+    특징:
+    - 스로틀링 응답을 받으면 속도를 절반으로 (multiplicative decrease)
+    - 성공할 때마다 조금씩 속도를 올림 (additive increase, 최대 max_rate)
+    - 여러 스레드(샤드, 다중 대상, 동시 요청)가 하나의 버킷을 공유
+    """
+
+    MIN_RATE = 0.5          # 속도 하한 (TPS)
+    DECREASE_FACTOR = 0.5
+    INCREASE_STEP = 0.1     # 성공 1회당 증가량 (TPS)
+
+    def __init__(self, rate: float, max_rate: float):
+        """
+        Args:
+            rate: 초기 초당 요청 수
+            max_rate: 최대 초당 요청 수
+        """
+        self.rate = rate
+        self.max_rate = max_rate
+        self._tokens = 1.0
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+        self.throttle_count = 0
+
+    def acquire(self):
+        """토큰 하나를 얻을 때까지 대기합니다."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                # 버스트는 1초 분량까지만 허용 (1 TPS 미만이어도 토큰 하나는 모일 수 있어야 함)
+                self._tokens = min(max(1.0, self.rate), self._tokens + (now - self._last_refill) * self.rate)
+                self._last_refill = now
+
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                wait = (1.0 - self._tokens) / self.rate
+
+            time.sleep(wait)
+
+    def on_success(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.INCREASE_STEP)
+
+    def on_throttle(self):
+        with self._lock:
+            self.rate = max(self.MIN_RATE, self.rate * self.DECREASE_FACTOR)
+            self._tokens = 0.0
+            self.throttle_count += 1
+            logger.warning(f"⚠️ Throttled - reducing request rate to {self.rate:.2f}/s")
+
+    def stats(self) -> Dict[str, Any]:
+        return {"rate": round(self.rate, 2), "max_rate": self.max_rate, "throttle_count": self.throttle_count}
+
+
+_rate_limiters: Dict[Tuple[str, str], AdaptiveRateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(operation: str, region: str) -> AdaptiveRateLimiter:
+    """(API, 리전)별 프로세스 전역 속도 제한기를 반환합니다."""
+    key = (operation, region)
+    with _rate_limiters_lock:
+        limiter = _rate_limiters.get(key)
+        if limiter is None:
+            rate, max_rate = DEFAULT_RATE_LIMITS.get(operation, (5.0, 10.0))
+            limiter = AdaptiveRateLimiter(rate, max_rate)
+            _rate_limiters[key] = limiter
+        return limiter
+
+
+def call_with_retry(
+    fn: Callable,
+    operation: str,
+    region: str,
+    max_attempts: int = 6,
+    base_delay: float = 0.2,
+    max_delay: float = 10.0,
+    **kwargs
+):
+    """
+    속도 제한기를 거쳐 AWS API를 호출하고, 스로틀링 시 decorrelated jitter로 재시도합니다.
+
+    delay = min(max_delay, uniform(base_delay, 이전 delay * 3))
+
+    Args:
+        fn: boto3 클라이언트 메서드
+        operation: 속도 제한 키 (예: "logs:FilterLogEvents")
+        region: AWS 리전
+        max_attempts: 최대 시도 횟수
+        base_delay: 최소 재시도 대기 (초)
+        max_delay: 최대 재시도 대기 (초)
+        **kwargs: fn에 전달할 인자
+
+    Raises:
+        ClientError: 스로틀링이 아닌 에러이거나 재시도를 모두 소진한 경우
+    """
+    limiter = get_rate_limiter(operation, region)
+    delay = base_delay
+
+    for attempt in range(1, max_attempts + 1):
+        limiter.acquire()
+        try:
+            result = fn(**kwargs)
+            limiter.on_success()
+            return result
+        except ClientError as e:
+            if not is_throttling_error(e):
+                raise
+            limiter.on_throttle()
+            if attempt == max_attempts:
+                raise
+
+            delay = min(max_delay, random.uniform(base_delay, delay * 3))
+            logger.warning(f"⚠️ {operation} throttled, retrying in {delay:.2f}s (attempt {attempt}/{max_attempts})")
+            time.sleep(delay)
+
+
+def rate_limiter_stats() -> Dict[str, Dict[str, Any]]:
+    """모든 속도 제한기의 현재 속도와 스로틀링 횟수 (모니터링용)"""
+    with _rate_limiters_lock:
+        return {f"{operation}@{region}": limiter.stats() for (operation, region), limiter in _rate_limiters.items()}
@@ -0,0 +1,201 @@
+"""
+Circuit Breaker - Gemini 분석 단계 차단기
+Vertex AI가 느리거나 오류를 낼 때 요청마다 전체 호출 시간을 기다린 뒤 실패하지 않도록,
+최근 호출의 오류율과 p95 지연을 보고 차단(open)하여 로컬 규칙 기반 분석으로 바로 대체하게 하고,
+일정 시간 뒤 시험 호출(half-open)로 복구 여부를 확인합니다.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CallTicket(NamedTuple):
+    """
+    allow()가 허용한 호출의 표
+    generation: 허용 시점의 차단기 세대 (open/closed 전환마다 증가)
+    probe_id: half-open 시험 호출이면 시험 호출 번호, closed에서 허용된 호출이면 None
+    """
+    generation: int
+    probe_id: Optional[int] = None
+
+
+class CircuitBreaker:
+    """
+    최근 호출 창 기반 차단기
+
+    - closed: 모든 호출 허용, 최근 window개 호출의 오류율 또는 p95 지연이 임계값을 넘으면 open
+    - open: open_seconds 동안 호출 차단 (분석기는 규칙 기반 대체 분석 반환)
+    - half_open: 시험 호출을 half_open_probes개까지만 허용, 성공하면 closed (창 초기화),
+      실패하면 다시 open (차단 시간은 max_open_seconds까지 두 배씩 증가)
+    - 스레드 안전 (allow()가 준 표로 record_success/record_failure/record_cancelled 중 하나를 호출해야 함)
+    - 결과가 기록되지 않은 시험 호출 자리는 probe_timeout_seconds 뒤 반납 (half-open에 갇히지 않도록)
+    - 상태는 자리를 가진 시험 호출만 바꿈: 차단 전에 허용되어 늦게 끝난 호출이나 만료된 시험 호출의 결과는 버림
+    """
+
+    def __init__(
+        self,
+        name: str,
+        window: int = 20,
+        min_calls: int = 5,
+        error_rate_threshold: float = 0.5,
+        p95_latency_threshold: float = 20.0,
+        open_seconds: float = 30.0,
+        max_open_seconds: float = 300.0,
+        half_open_probes: int = 1,
+        probe_timeout_seconds: float = 120.0
+    ):
+        """
+        Args:
+            name: 차단기 이름 (로그/지표용)
+            window: 오류율/지연을 볼 최근 호출 수
+            min_calls: 차단 판단에 필요한 최소 호출 수
+            error_rate_threshold: 이 이상의 오류율이면 차단
+            p95_latency_threshold: 최근 호출 p95 지연(초)이 이 이상이면 차단
+            open_seconds: 첫 차단 시간 (초)
+            max_open_seconds: 시험 호출이 계속 실패할 때 최대 차단 시간 (초)
+            half_open_probes: half-open 상태에서 동시에 허용할 시험 호출 수
+            probe_timeout_seconds: 결과가 기록되지 않은 시험 호출 자리를 반납할 시간 (초)
+        """
+        self.name = name
+        self.min_calls = min_calls
+        self.error_rate_threshold = error_rate_threshold
+        self.p95_latency_threshold = p95_latency_threshold
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.half_open_probes = half_open_probes
+        self.probe_timeout_seconds = probe_timeout_seconds
+
+        self._lock = threading.Lock()
+        self._calls = deque(maxlen=window)  # (성공 여부, 지연 초)
+        self._state = CLOSED
+        self._opened_until = 0.0
+        self._open_duration = open_seconds
+        self._generation = 0
+        # 진행 중인 시험 호출 번호 → 시작 시각
+        self._probes: Dict[int, float] = {}
+        self._next_probe_id = 0
+
+        self._short_circuited = 0
+        self._trips = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def allow(self) -> Optional[CallTicket]:
+        """
+        호출해도 되면 결과 기록에 쓸 표, 아니면 None
+        (open이면 None, open 시간이 지났으면 half-open 시험 호출로 허용)
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self._state == OPEN and now >= self._opened_until:
+                self._state = HALF_OPEN
+                self._probes.clear()
+                logger.info(f"🔌 Circuit {self.name} half-open, probing")
+
+            if self._state == CLOSED:
+                return CallTicket(self._generation)
+            if self._state == HALF_OPEN:
+                expired = [probe_id for probe_id, started in self._probes.items()
+                           if now - started >= self.probe_timeout_seconds]
+                if expired:
+                    logger.warning(f"⚠️ Circuit {self.name} probe unresolved after {self.probe_timeout_seconds:.0f}s, releasing")
+                    for probe_id in expired:
+                        del self._probes[probe_id]
+                if len(self._probes) < self.half_open_probes:
+                    self._next_probe_id += 1
+                    self._probes[self._next_probe_id] = now
+                    return CallTicket(self._generation, self._next_probe_id)
+
+            self._short_circuited += 1
+            return None
+
+    def record_success(self, ticket: CallTicket, latency_seconds: float):
+        with self._lock:
+            if ticket.probe_id is not None:
+                if self._probes.pop(ticket.probe_id, None) is None:
+                    return
+                self._state = CLOSED
+                self._generation += 1
+                self._open_duration = self.open_seconds
+                self._calls.clear()
+                logger.info(f"✅ Circuit {self.name} closed ({latency_seconds:.1f}s probe succeeded)")
+            elif not self._current(ticket):
+                return
+            self._calls.append((True, latency_seconds))
+            self._check_trip()
+
+    def record_failure(self, ticket: CallTicket, latency_seconds: float):
+        with self._lock:
+            if ticket.probe_id is not None:
+                if self._probes.pop(ticket.probe_id, None) is None:
+                    return
+                self._open_duration = min(self._open_duration * 2, self.max_open_seconds)
+                self._open("probe failed")
+                return
+            if not self._current(ticket):
+                return
+            self._calls.append((False, latency_seconds))
+            self._check_trip()
+
+    def record_cancelled(self, ticket: CallTicket):
+        """허용된 호출이 결과 없이 취소됨: 성공/실패로 세지 않고 half-open 시험 호출 자리만 반납"""
+        with self._lock:
+            if ticket.probe_id is not None:
+                self._probes.pop(ticket.probe_id, None)
+
+    def _current(self, ticket: CallTicket) -> bool:
+        """closed에서 허용된 호출이 지금의 closed 창에 속하는지 (락 보유 상태에서 호출)"""
+        return self._state == CLOSED and ticket.generation == self._generation
+
+    def _check_trip(self):
+        """closed 상태에서 오류율/p95 지연 임계값을 넘으면 open (락 보유 상태에서 호출)"""
+        if self._state != CLOSED or len(self._calls) < self.min_calls:
+            return
+        error_rate = self._error_rate()
+        p95 = self._p95()
+        if error_rate >= self.error_rate_threshold:
+            self._open(f"error rate {error_rate:.0%}")
+        elif p95 >= self.p95_latency_threshold:
+            self._open(f"p95 latency {p95:.1f}s")
+
+    def _open(self, reason: str):
+        self._state = OPEN
+        self._generation += 1
+        self._probes.clear()
+        self._opened_until = time.monotonic() + self._open_duration
+        self._trips += 1
+        logger.warning(f"⛔ Circuit {self.name} open for {self._open_duration:.0f}s: {reason}")
+
+    def _error_rate(self) -> float:
+        return sum(1 for ok, _ in self._calls if not ok) / len(self._calls) if self._calls else 0.0
+
+    def _p95(self) -> float:
+        latencies = sorted(latency for _, latency in self._calls)
+        return latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))] if latencies else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            retry_in: Optional[float] = None
+            if self._state == OPEN:
+                retry_in = round(max(0.0, self._opened_until - time.monotonic()), 1)
+            return {
+                "state": self._state,
+                "calls": len(self._calls),
+                "error_rate": round(self._error_rate(), 3),
+                "p95_latency_seconds": round(self._p95(), 3),
+                "retry_in_seconds": retry_in,
+                "trips": self._trips,
+                "short_circuited": self._short_circuited
+            }
@@ -0,0 +1,148 @@
+"""
+GCP Identity - 메타데이터 서버 OIDC ID 토큰 캐시
+AssumeRoleWithWebIdentity에 쓰는 GCP Service Account ID 토큰을 JWT exp 클레임 기준으로 재사용하고,
+만료 전에 백그라운드에서 미리 갱신하여 STS 갱신 시 메타데이터 서버 왕복을 없앱니다.
+"""
+
+import base64
+import json
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+METADATA_IDENTITY_URL = (
+    "http://metadata.google.internal/computeMetadata/v1/"
+    "instance/service-accounts/default/identity"
+)
+DEFAULT_AUDIENCE = "accounts.google.com"
+
+
+def decode_jwt_expiry(token: str) -> Optional[float]:
+    """
+    JWT payload의 exp 클레임 (epoch 초)을 반환합니다.
+
+    서명은 검증하지 않습니다 (메타데이터 서버에서 직접 받은 토큰의 만료 시각만 필요).
+    형식이 잘못되었으면 None을 반환합니다.
+    """
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return float(json.loads(base64.urlsafe_b64decode(payload))["exp"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+class GCPIdentityTokenCache:
+    """
+    audience별 GCP OIDC ID 토큰 캐시
+
+    특징:
+    - exp 클레임을 디코딩하여 만료 REUSE_MARGIN_SECONDS 전까지 같은 토큰 재사용
+    - 메타데이터 서버와의 HTTP 커넥션을 하나의 requests.Session으로 공유 (keep-alive)
+    - 만료 PREFETCH_SECONDS 전에 백그라운드 타이머로 미리 갱신
+    - Single-flight 조회 (동시 STS 갱신이 메타데이터 서버를 중복 호출하지 않음)
+    """
+
+    # 남은 유효 시간이 이보다 짧으면 캐시된 토큰을 쓰지 않음 (STS 호출 중 만료 방지)
+    REUSE_MARGIN_SECONDS = 60
+    # 만료 이 시간 전에 백그라운드에서 미리 갱신
+    PREFETCH_SECONDS = 600
+    # exp를 읽을 수 없는 토큰의 유효 시간 가정 (메타데이터 서버 ID 토큰은 1시간)
+    DEFAULT_TTL_SECONDS = 3600
+    # 백그라운드 갱신 실패 시 재시도 간격
+    PREFETCH_RETRY_SECONDS = 30
+
+    def __init__(self, audience: str = DEFAULT_AUDIENCE, timeout: float = 5):
+        """
+        Args:
+            audience: ID 토큰 audience (AWS IAM OIDC Provider에 등록된 값)
+            timeout: 메타데이터 서버 요청 타임아웃 (초)
+        """
+        self.audience = audience
+        self.timeout = timeout
+        self.token: Optional[str] = None
+        self.expires_at = 0.0
+        self.fetch_count = 0
+        self._lock = threading.Lock()
+        self._prefetch_timer: Optional[threading.Timer] = None
+
+        self._session = requests.Session()
+        self._session.headers.update({"Metadata-Flavor": "Google"})
+        self._session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+
+    def _seconds_until_expiry(self) -> float:
+        return self.expires_at - time.time()
+
+    def get_token(self) -> str:
+        """유효한 ID 토큰을 반환합니다. (필요할 때만 메타데이터 서버 호출)"""
+        if self.token and self._seconds_until_expiry() > self.REUSE_MARGIN_SECONDS:
+            return self.token
+
+        with self._lock:
+            if not self.token or self._seconds_until_expiry() <= self.REUSE_MARGIN_SECONDS:
+                self._fetch()
+            return self.token
+
+    def _fetch(self):
+        """메타데이터 서버에서 토큰을 받아 캐시하고 다음 미리 갱신을 예약합니다. (락 보유 상태에서 호출)"""
+        response = self._session.get(
+            METADATA_IDENTITY_URL,
+            params={"audience": self.audience},
+            timeout=self.timeout
+        )
+        if response.status_code != 200:
+            raise Exception(f"Failed to get GCP token: {response.status_code}")
+
+        token = response.text
+        expires_at = decode_jwt_expiry(token) or time.time() + self.DEFAULT_TTL_SECONDS
+
+        self.token = token
+        self.expires_at = expires_at
+        self.fetch_count += 1
+        logger.info(f"✅ GCP OIDC token obtained from metadata server (valid for {int(self._seconds_until_expiry())}s)")
+
+        self._schedule_prefetch(max(self._seconds_until_expiry() - self.PREFETCH_SECONDS, 0))
+
+    def _schedule_prefetch(self, delay_seconds: float):
+        if self._prefetch_timer:
+            self._prefetch_timer.cancel()
+        self._prefetch_timer = threading.Timer(delay_seconds, self._prefetch)
+        self._prefetch_timer.daemon = True
+        self._prefetch_timer.start()
+
+    def _prefetch(self):
+        try:
+            with self._lock:
+                self._fetch()
+        except Exception as e:
+            # 실패해도 기존 토큰이 유효한 동안은 계속 사용, 만료 임박 시 요청 경로에서 재시도
+            logger.warning(f"⚠️ GCP OIDC token prefetch failed: {str(e)}")
+            with self._lock:
+                self._schedule_prefetch(self.PREFETCH_RETRY_SECONDS)
+
+    def stats(self) -> Dict[str, float]:
+        """토큰 남은 유효 시간과 메타데이터 서버 호출 횟수 (모니터링용)"""
+        return {
+            "seconds_until_expiry": round(max(self._seconds_until_expiry(), 0), 1),
+            "fetch_count": self.fetch_count
+        }
+
+
+_token_caches: Dict[str, GCPIdentityTokenCache] = {}
+_token_caches_lock = threading.Lock()
+
+
+def get_identity_token_cache(audience: str = DEFAULT_AUDIENCE) -> GCPIdentityTokenCache:
+    """audience별 프로세스 전역 ID 토큰 캐시를 반환합니다."""
+    with _token_caches_lock:
+        cache = _token_caches.get(audience)
+        if cache is None:
+            cache = GCPIdentityTokenCache(audience)
+            _token_caches[audience] = cache
+        return cache
@@ -0,0 +1,215 @@
+"""
+Incident State - 로그 그룹별 진행 중인 장애 상태
+긴 장애 동안 반복 분석할 때마다 전체 윈도우를 다시 진단하지 않도록, 이미 본 템플릿(건수 구간),
+마지막 분석 결과, 분석한 시간 범위를 보관하여 새로 나타났거나 건수가 바뀐 템플릿과
+이전 결론 요약만 Gemini에 보내게 합니다.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
+
+from analysis_cache import count_bucket
+from log_templates import LogCluster, TemplateMiner
+
+logger = logging.getLogger(__name__)
+
+
+class IncidentState:
+    """한 로그 그룹의 진행 중인 장애"""
+
+    __slots__ = ("key", "opened_at", "updated_at", "covered_from", "covered_to", "templates", "analysis", "runs")
+
+    def __init__(self, key: str, opened_at: float):
+        self.key = key
+        self.opened_at = opened_at
+        self.updated_at = opened_at
+        # 지금까지 분석한 로그의 epoch 밀리초 범위
+        self.covered_from: Optional[int] = None
+        self.covered_to: Optional[int] = None
+        # 템플릿 → 마지막 분석 시점의 건수 구간 (count_bucket)
+        self.templates: Dict[str, int] = {}
+        self.analysis: Dict[str, Any] = {}
+        self.runs = 0
+
+    def diff(self, miner: TemplateMiner) -> Tuple[List[LogCluster], int]:
+        """(새로 나타났거나 건수 구간이 바뀐 템플릿, 변화 없는 템플릿 수)"""
+        changed = []
+        for cluster in miner.templates():
+            if self.templates.get(cluster.template) != count_bucket(cluster.count):
+                changed.append(cluster)
+        return changed, len(miner.clusters) - len(changed)
+
+    def describe(self, unchanged: int) -> str:
+        """분석 프롬프트에 넣을 이전 결론 요약"""
+        covered = ""
+        if self.covered_from is not None:
+            covered = (
+                f", 분석 구간 {datetime.fromtimestamp(self.covered_from / 1000).isoformat()}"
+                f"~{datetime.fromtimestamp(self.covered_to / 1000).isoformat()}"
+            )
+        issues = ", ".join(self.analysis.get("detected_issues", [])) or "없음"
+        return (
+            f"이 로그 그룹에서 진행 중인 장애입니다 (이전 분석 {self.runs}회{covered}).\n"
+            f"- 이전 결론: severity {self.analysis.get('severity', 'unknown')}, 시나리오 {issues}\n"
+            f"- 이전 요약: {self.analysis.get('summary', '')}\n"
+            f"- 건수 변화가 없는 기존 템플릿 {unchanged}개는 생략했고, 아래는 새로 나타났거나 건수가 바뀐 템플릿입니다.\n"
+            f"이전 결론과 아래 변화를 함께 고려해 갱신된 전체 분석을 반환하세요."
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "IncidentState":
+        state = cls(data["key"], data["opened_at"])
+        for slot in cls.__slots__:
+            setattr(state, slot, data.get(slot, getattr(state, slot)))
+        return state
+
+
+class IncidentStateStore:
+    """
+    로그 그룹별 진행 중인 장애 상태 저장소
+
+    특징:
+    - 감지된 시나리오가 없는 분석 결과가 나오거나, 로그가 없는 윈도우를 만나거나,
+      idle_close_seconds 동안 Gemini 분석으로 갱신되지 않으면 장애 종료
+      (변화 없음으로 이전 결과를 재사용한 실행은 갱신으로 치지 않으므로, 오래된 결론은 최대 idle_close_seconds만 재사용)
+    - 최대 max_incidents개 (오래 갱신되지 않은 것부터 제거)
+    - state_path가 있으면 JSON 파일에 영속화 (임시 파일에 쓴 뒤 교체)
+    - 스레드 안전
+    """
+
+    def __init__(self, state_path: Optional[str] = None, idle_close_seconds: float = 1800, max_incidents: int = 64):
+        """
+        Args:
+            state_path: 상태를 저장할 JSON 파일 경로 (None이면 메모리에만 유지)
+            idle_close_seconds: 이 시간 동안 분석이 없으면 장애 종료로 보고 상태 삭제
+            max_incidents: 보관할 최대 장애 수
+        """
+        self.state_path = state_path
+        self.idle_close_seconds = idle_close_seconds
+        self.max_incidents = max_incidents
+        self._lock = threading.Lock()
+        self._incidents: "OrderedDict[str, IncidentState]" = OrderedDict()
+
+        self._incremental_runs = 0
+        self._unchanged_runs = 0
+        self._templates_sent = 0
+        self._templates_skipped = 0
+
+        self._load()
+
+    def _load(self):
+        if not self.state_path or not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                for data in json.load(f):
+                    state = IncidentState.from_dict(data)
+                    self._incidents[state.key] = state
+            logger.info(f"📌 Loaded {len(self._incidents)} open incidents from {self.state_path}")
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"⚠️ Failed to load incident state, starting fresh: {str(e)}")
+            self._incidents.clear()
+
+    def _persist(self):
+        """상태를 임시 파일에 쓴 뒤 교체하여 부분 기록을 방지합니다. (락 보유 상태에서 호출)"""
+        if not self.state_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+            tmp_path = f"{self.state_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump([state.to_dict() for state in self._incidents.values()], f, ensure_ascii=False, default=str)
+            os.replace(tmp_path, self.state_path)
+        except OSError as e:
+            logger.warning(f"⚠️ Failed to persist incident state: {str(e)}")
+
+    def get(self, key: str) -> Optional[IncidentState]:
+        """진행 중인 장애 상태 (없거나 idle_close_seconds가 지났으면 None)"""
+        with self._lock:
+            state = self._incidents.get(key)
+            if state is not None and time.time() - state.updated_at > self.idle_close_seconds:
+                logger.info(f"📕 Incident closed after {self.idle_close_seconds:.0f}s idle: {key}")
+                del self._incidents[key]
+                self._persist()
+                return None
+            return state
+
+    def record_delta(self, key: str, sent: int, skipped: int):
+        """
+        증분 분석 한 건의 보낸/생략한 템플릿 수를 기록합니다.
+        sent가 0이면 Gemini 호출 없이 이전 결과를 재사용한 것이지만 idle 시간은 초기화하지 않습니다.
+        (초기화하면 변화 없는 실행이 이어지는 동안 오래된 결론이 끝없이 재사용됨)
+        """
+        with self._lock:
+            self._incremental_runs += 1
+            self._unchanged_runs += sent == 0
+            self._templates_sent += sent
+            self._templates_skipped += skipped
+
+    def update(self, key: str, miner: TemplateMiner, analysis: Dict[str, Any]):
+        """
+        Gemini 분석 결과로 장애 상태를 갱신합니다.
+        감지된 시나리오가 없으면 장애가 끝난 것으로 보고 상태를 삭제합니다.
+        """
+        if not analysis.get("detected_issues"):
+            self.close(key)
+            return
+
+        now = time.time()
+        with self._lock:
+            state = self._incidents.pop(key, None)
+            if state is None:
+                state = IncidentState(key, now)
+                logger.info(f"📖 Incident opened: {key} ({', '.join(analysis['detected_issues'])})")
+
+            state.templates = {cluster.template: count_bucket(cluster.count) for cluster in miner.clusters}
+            first_seen = [cluster.first_seen for cluster in miner.clusters if cluster.first_seen is not None]
+            last_seen = [cluster.last_seen for cluster in miner.clusters if cluster.last_seen is not None]
+            if first_seen:
+                state.covered_from = min(first_seen + ([state.covered_from] if state.covered_from is not None else []))
+                state.covered_to = max(last_seen + ([state.covered_to] if state.covered_to is not None else []))
+            state.analysis = {
+                field: analysis.get(field)
+                for field in ("detected_issues", "severity", "summary", "recommendations", "affected_resources")
+            }
+            state.runs += 1
+            state.updated_at = now
+
+            self._incidents[key] = state
+            while len(self._incidents) > self.max_incidents:
+                self._incidents.popitem(last=False)
+            self._persist()
+
+    def close(self, key: str):
+        with self._lock:
+            if self._incidents.pop(key, None) is not None:
+                logger.info(f"📕 Incident closed: {key}")
+                self._persist()
+
+    def stats(self) -> Dict[str, Any]:
+        """진행 중인 장애와 증분 분석 지표 (모니터링용)"""
+        with self._lock:
+            return {
+                "open_incidents": {
+                    key: {
+                        "runs": state.runs,
+                        "known_templates": len(state.templates),
+                        "detected_issues": state.analysis.get("detected_issues", []),
+                        "idle_seconds": round(time.time() - state.updated_at, 1)
+                    }
+                    for key, state in self._incidents.items()
+                },
+                "incremental_runs": self._incremental_runs,
+                "unchanged_runs": self._unchanged_runs,
+                "templates_sent": self._templates_sent,
+                "templates_skipped": self._templates_skipped
+            }
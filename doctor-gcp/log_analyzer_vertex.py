@@ -4,10 +4,67 @@ Uses Gemini 2.5 Flash via Vertex AI to analyze CloudWatch Logs
 GCP 크레딧 사용 가능!
 """
 
-import vertexai
-from vertexai.generative_models import GenerativeModel, GenerationConfig
-from typing import Dict, List
+from vertexai.generative_models import GenerationConfig
+from collections import Counter
+from typing import Dict, List, Optional, Tuple, Union
+import asyncio
 import json
+import logging
+import math
+import time
+
+from log_batch import LogBatch, describe_sampling, format_log_lines
+from log_templates import TemplateMiner, mine_templates
+from analysis_cache import AnalysisCache, count_bucket, fingerprint_templates
+from analysis_schema import SchemaValidator, build_log_analysis_schema, parse_json_response
+from analysis_cascade import escalation_reason, get_cascade_stats, CascadeStats
+from circuit_breaker import CallTicket, CircuitBreaker
+from incident_state import IncidentStateStore
+from prompt_packer import PromptPacker, PackedLines, combine_pack_reports
+from scenario_classifier import ScenarioClassifier, ScenarioClassification
+from vertex_models import get_generative_model, get_latency_tracker
+
+logger = logging.getLogger(__name__)
+
+SEVERITY_RANK = {"info": 0, "warning": 1, "critical": 2}
+
+
+class _ModelTier:
+    """계층 분석의 모델 한 단계 (모델 핸들, 생성 설정)"""
+
+    __slots__ = ("name", "model", "generation_config")
+
+    def __init__(self, name: str, model, generation_config: GenerationConfig):
+        self.name = name
+        self.model = model
+        self.generation_config = generation_config
+
+
+class _PreparedAnalysis:
+    """Gemini 호출 전 단계 결과"""
+
+    __slots__ = ("result", "prompt", "chunk_prompts", "cache_key", "classification", "packing",
+                 "incident_key", "miner", "incident", "scenario_key")
+
+    def __init__(self, result: Optional[Dict] = None, prompt: Optional[str] = None,
+                 chunk_prompts: Optional[List[str]] = None, cache_key: Optional[str] = None,
+                 classification: Optional[ScenarioClassification] = None,
+                 packing: Optional[Dict] = None, incident_key: Optional[str] = None,
+                 miner: Optional[TemplateMiner] = None, incident: Optional[Dict] = None,
+                 scenario_key: Optional[str] = None):
+        self.result = result
+        self.prompt = prompt
+        self.chunk_prompts = chunk_prompts
+        self.cache_key = cache_key
+        self.classification = classification
+        # 프롬프트 패킹 보고 (넣은/뺀/잘린 줄 수, 사용 토큰)
+        self.packing = packing
+        # 분석 성공 시 장애 상태를 갱신할 키와 전체 템플릿, 증분 분석 정보
+        self.incident_key = incident_key
+        self.miner = miner
+        self.incident = incident
+        # 규칙 기반 생략/계층 승격 판단에 쓸 분석 대상 키 (마지막 Gemini 시나리오 집합을 대상별로 기억)
+        self.scenario_key = scenario_key
 
 
 class LogAnalyzer:
@@ -23,32 +80,163 @@ class LogAnalyzer:
         "high-cpu"
     ]
 
-    def __init__(self, project_id: str, location: str = "us-central1"):
+    # 구조화 출력 스키마와 한 번만 컴파일한 응답 검증기
+    RESPONSE_SCHEMA = build_log_analysis_schema(FAILURE_SCENARIOS)
+    RESPONSE_VALIDATOR = SchemaValidator(RESPONSE_SCHEMA, fallbacks={"severity": "warning"})
+
+    # 로그 구간 토큰 예산 (추정치) - 줄 수가 아니라 토큰 수로 프롬프트 크기를 제한
+    DEFAULT_PROMPT_TOKEN_BUDGET = 6000
+    DEFAULT_MAX_LINE_TOKENS = 256
+    # 청크 분석 시 청크당 최소 템플릿 수 / 템플릿으로 묶지 않는 입력(집계 결과 등)의 청크당 최소 로그 수
+    TEMPLATE_PROMPT_LIMIT = 50
+    PROMPT_LOG_LIMIT = 100
+
+    # 청크 분석: 한 프롬프트에 다 들어가지 않는 로그를 나눠 동시에 분석하고 결과를 합침
+    CHUNK_BY_OPTIONS = ("template", "stream")
+    MAX_CHUNKS = 16
+    MERGED_RECOMMENDATION_LIMIT = 10
+
+    MODEL_NAME = "gemini-2.0-flash-exp"
+    MAX_OUTPUT_TOKENS = 2048
+
+    # 계층 분석: 하위 계층 결과의 confidence가 이보다 낮으면 큰 모델로 승격
+    DEFAULT_CASCADE_CONFIDENCE = 0.7
+    # 하위 계층 한 단계가 쓸 수 있는 남은 마감 시간 비율 (승격 후 큰 모델 시간 확보)
+    CASCADE_DEADLINE_SHARE = 0.4
+
+    # 요청마다 같은 프롬프트 서두 (아키텍처, 시나리오 목록, 출력 형식)
+    ANALYSIS_PREAMBLE = """당신은 AWS CloudWatch 로그를 분석하는 클라우드 운영 AI입니다. 3-tier 웹 애플리케이션의 로그를 분석합니다.
+
+**애플리케이션 아키텍처:**
+- Frontend: CloudFront + S3의 Next.js
+- Backend: ECS Fargate의 Node.js/Express
+- Database: RDS MySQL 8.0
+
+**알려진 장애 시나리오:**
+1. db-failure: 데이터베이스 연결 오류 (잘못된 엔드포인트, 네트워크 문제)
+2. pool-exhaustion: 커넥션 풀 고갈 (max_connections 초과)
+3. memory-leak: 메모리 지속적 증가 (OOM 위험)
+4. slow-query: N+1 쿼리 문제 또는 인덱스 누락
+5. api-timeout: 외부 API 호출 타임아웃
+6. jwt-expiry: JWT 토큰 만료 문제
+7. high-cpu: CPU 집약적 연산으로 인한 성능 저하
+
+**작업:**
+주어지는 CloudWatch 로그를 분석하고 다음 JSON 구조로 반환하세요. summary와 recommendations는 한국어로 작성:
+
+{
+  "detected_issues": ["scenario1", "scenario2"],  // 감지된 시나리오 이름 (영어 그대로)
+  "severity": "critical|warning|info",            // 심각도 (영어 그대로)
+  "summary": "문제 설명 (한국어로 1-2문장)",
+  "recommendations": [                             // 권장사항 (한국어로 작성)
+    "인덱스를 추가하여 쿼리 성능 개선",
+    "ECS 메모리를 512MB에서 1024MB로 증가"
+  ],
+  "affected_resources": [                          // 영향받은 리소스 (영어 그대로)
+    "ECS Task: arn:aws:ecs:...",
+    "RDS Instance: patient-zone-mysql"
+  ],
+  "confidence": 0.9                                // 진단 확신도 (0~1, 로그 근거가 약하면 낮게)
+}
+
+**중요:**
+- 유효한 JSON만 반환, 마크다운 코드 블록 없이
+- detected_issues는 위 시나리오 이름 사용 (영어)
+- severity는 critical/warning/info 중 하나 (영어)
+- summary와 recommendations만 한국어로 작성
+- affected_resources는 실제 AWS 리소스 이름 (영어)
+- 문제가 없으면 빈 배열과 severity "info" 반환
+"""
+
+    # 비동기 분석 기본 마감 시간 (초)
+    DEFAULT_DEADLINE_SECONDS = 45
+    # 헤지 요청: 첫 요청이 최근 p95 지연을 넘기면 같은 요청을 하나 더 보내고 먼저 끝난 쪽 사용
+    HEDGE_PERCENTILE = 0.95
+    HEDGE_MIN_SAMPLES = 20
+    HEDGE_MIN_DELAY_SECONDS = 1.0
+
+    def __init__(
+        self,
+        project_id: str,
+        location: str = "us-central1",
+        cache: Optional[AnalysisCache] = None,
+        classifier: Optional[ScenarioClassifier] = None,
+        rules_fast_path: bool = True,
+        chunk_by: Optional[str] = None,
+        chunk_concurrency: int = 4,
+        llm_reduce: bool = False,
+        prompt_token_budget: int = DEFAULT_PROMPT_TOKEN_BUDGET,
+        max_line_tokens: int = DEFAULT_MAX_LINE_TOKENS,
+        cascade: Optional[List[Tuple[str, int]]] = None,
+        cascade_confidence: float = DEFAULT_CASCADE_CONFIDENCE,
+        incidents: Optional[IncidentStateStore] = None,
+        breaker: Optional[CircuitBreaker] = None
+    ):
         """
         Initialize Gemini AI client via Vertex AI
 
         Args:
             project_id: GCP Project ID
             location: Vertex AI location (default: us-central1)
+            cache: 로그 지문별 분석 결과 캐시 (None이면 매번 Gemini 호출)
+            classifier: 규칙 기반 시나리오 분류기 (Gemini 생략 판단 및 Vertex AI 실패 시 대체 분석)
+            rules_fast_path: 분류 신뢰도가 높고 시나리오가 직전 Gemini 분석과 같으면 Gemini 호출 생략
+            chunk_by: 한 프롬프트를 넘는 로그의 청크 분할 기준 ("template", "stream", None이면 청크 분석 안 함)
+            chunk_concurrency: 동시에 분석할 최대 청크 수
+            llm_reduce: 청크 결과를 결정적으로 합친 뒤 Gemini로 한 번 더 통합할지 여부
+            prompt_token_budget: 프롬프트 로그 구간의 토큰 예산 (정보 가치 순으로 채우고 나머지는 생략)
+            max_line_tokens: 로그 한 줄의 최대 토큰 수 (넘으면 앞/뒤만 남기고 가운데 생략)
+            cascade: MODEL_NAME보다 먼저 시도할 (모델 이름, 최대 출력 토큰) 목록 (작고 빠른 모델부터)
+            cascade_confidence: 하위 계층 결과를 채택할 최소 confidence
+            incidents: 로그 그룹별 진행 중인 장애 상태 (있으면 반복 분석 시 새로 나타났거나 바뀐 템플릿만 전송)
+            breaker: Gemini 단계 차단기 (열려 있으면 Vertex AI를 호출하지 않고 규칙 기반 대체 분석 반환)
         """
-        # Vertex AI 초기화
-        vertexai.init(project=project_id, location=location)
-
-        # Gemini 2.0 Flash 모델 로드 (실험 버전, us-central1 지원)
-        self.model = GenerativeModel("gemini-2.0-flash-exp")
+        if chunk_by is not None and chunk_by not in self.CHUNK_BY_OPTIONS:
+            raise ValueError(f"chunk_by must be one of {self.CHUNK_BY_OPTIONS}, got '{chunk_by}'")
+
+        self.cache = cache
+        self.classifier = classifier
+        self.rules_fast_path = rules_fast_path
+        self.chunk_by = chunk_by
+        self.chunk_concurrency = max(1, chunk_concurrency)
+        self.llm_reduce = llm_reduce
+        self.packer = PromptPacker(token_budget=prompt_token_budget, max_line_tokens=max_line_tokens)
+        self.cascade_confidence = cascade_confidence
+        self.incidents = incidents
+        self.breaker = breaker
+
+        # Gemini 2.0 Flash 모델 (실험 버전, us-central1 지원) - 프로세스 전역 레지스트리에서 빌려 씀
+        self.model = get_generative_model(project_id, location, self.MODEL_NAME)
 
         # Generation config
-        self.generation_config = GenerationConfig(
+        self.generation_config = self._generation_config(self.MAX_OUTPUT_TOKENS)
+
+        # 계층 분석: 작은 모델부터 시도하고 마지막 계층은 항상 MODEL_NAME
+        self.tiers = [
+            _ModelTier(
+                model_name,
+                get_generative_model(project_id, location, model_name),
+                self._generation_config(max_output_tokens)
+            )
+            for model_name, max_output_tokens in (cascade or [])
+            if model_name != self.MODEL_NAME
+        ] + [_ModelTier(self.MODEL_NAME, self.model, self.generation_config)]
+
+    def _generation_config(self, max_output_tokens: int) -> GenerationConfig:
+        return GenerationConfig(
             temperature=0.2,  # 일관된 분석을 위해 낮게 설정
-            max_output_tokens=2048,
+            max_output_tokens=max_output_tokens,
+            response_mime_type="application/json",  # 분석 결과 스키마에 맞는 JSON만 생성
+            response_schema=self.RESPONSE_SCHEMA,
         )
 
-    def analyze_logs(self, logs: List[Dict]) -> Dict:
+    def analyze_logs(self, logs: Union[LogBatch, List[Dict]], incident_key: Optional[str] = None) -> Dict:
         """
         Analyze CloudWatch Logs to detect failure scenarios
 
         Args:
-            logs: List of log events from CloudWatch (each is a dict with 'timestamp', 'message', 'log_stream')
+            logs: LogBatch or list of log events from CloudWatch (each row has 'timestamp', 'message', 'log_stream')
+            incident_key: 장애 상태와 규칙 기반 생략을 구분할 로그 그룹 키 (None이면 매번 전체 윈도우 분석)
 
         Returns:
             Dict containing:
@@ -58,122 +246,598 @@ class LogAnalyzer:
             - recommendations: List of recommended actions
             - affected_resources: List of affected AWS resources
         """
-        if not logs:
-            return {
+        prepared = self._prepare(logs, incident_key=incident_key)
+        if prepared.result is not None:
+            return prepared.result
+        ticket = self.breaker.allow() if self.breaker is not None else None
+        if self.breaker is not None and ticket is None:
+            return self._degraded(prepared.classification)
+
+        started = time.monotonic()
+        try:
+            result = self._remember(self._analyze_cascade_sync(prepared), prepared)
+        except Exception as e:
+            self._record_outcome(ticket, False, started)
+            return self._failed(e, prepared.classification)
+        except BaseException:
+            self._record_outcome(ticket, None, started)
+            raise
+        self._record_outcome(ticket, True, started)
+        return result
+
+    def _analyze_cascade_sync(self, prepared: _PreparedAnalysis) -> Dict:
+        """_analyze_cascade의 동기 버전 (마감 시간/헤지 없음)"""
+        stats = self._start_cascade(prepared)
+        for tier in self.tiers:
+            final = tier is self.tiers[-1]
+            try:
+                # Vertex AI로 요청
+                started = time.monotonic()
+                response = tier.model.generate_content(
+                    prepared.prompt,
+                    generation_config=tier.generation_config
+                )
+                get_latency_tracker(tier.name).record(time.monotonic() - started)
+                text = response.text
+            except Exception as e:
+                if final:
+                    raise
+                self._escalate(stats, tier, "error", e)
+                continue
+
+            result = self._accept_or_escalate(stats, tier, text, prepared, final)
+            if result is not None:
+                return result
+
+    async def analyze_logs_async(
+        self,
+        logs: Union[LogBatch, List[Dict]],
+        deadline_seconds: float = DEFAULT_DEADLINE_SECONDS,
+        hedge: bool = True,
+        incident_key: Optional[str] = None
+    ) -> Dict:
+        """
+        analyze_logs의 비동기 버전 (이벤트 루프를 막지 않고 마감 시간 안에 결과 반환)
+
+        chunk_by가 설정되어 있고 로그가 한 프롬프트를 넘으면 청크로 나눠 동시에 분석한 뒤 합칩니다.
+
+        Args:
+            logs: LogBatch or list of log events from CloudWatch
+            deadline_seconds: Gemini 응답 마감 시간 (초), 넘기면 대체 분석 반환
+            hedge: 첫 요청이 최근 p95 지연을 넘기면 헤지 요청을 보낼지 여부
+            incident_key: 장애 상태와 규칙 기반 생략을 구분할 로그 그룹 키 (None이면 매번 전체 윈도우 분석)
+
+        Returns:
+            analyze_logs와 같은 형식의 분석 결과
+        """
+        loop = asyncio.get_running_loop()
+        deadline_at = loop.time() + deadline_seconds
+        # 템플릿 마이닝/분류/프롬프트 생성은 CPU 작업이므로 이벤트 루프 밖에서 실행
+        prepared = await loop.run_in_executor(None, self._prepare, logs, self.chunk_by is not None, incident_key)
+        if prepared.result is not None:
+            return prepared.result
+        # 차단기가 열려 있으면 마감 시간까지 기다리지 않고 바로 대체 분석 반환
+        ticket = self.breaker.allow() if self.breaker is not None else None
+        if self.breaker is not None and ticket is None:
+            return self._degraded(prepared.classification)
+
+        started = time.monotonic()
+        try:
+            if prepared.chunk_prompts:
+                result = await self._analyze_chunks(prepared, deadline_at, hedge)
+            else:
+                result = self._remember(await self._analyze_cascade(prepared.prompt, prepared, deadline_at, hedge), prepared)
+        except asyncio.TimeoutError:
+            self._record_outcome(ticket, False, started)
+            return self._failed(TimeoutError(f"Gemini did not respond within {deadline_seconds}s"), prepared.classification)
+        except Exception as e:
+            self._record_outcome(ticket, False, started)
+            return self._failed(e, prepared.classification)
+        except BaseException:
+            # 클라이언트 연결 종료 등으로 태스크가 취소됨 (CancelledError는 Exception이 아님)
+            self._record_outcome(ticket, None, started)
+            raise
+        self._record_outcome(ticket, True, started)
+        return result
+
+    def _record_outcome(self, ticket: Optional[CallTicket], success: Optional[bool], started: float):
+        """
+        Gemini 단계 결과와 지연 시간을 차단기에 기록합니다.
+        success가 None이면 (취소) 성공/실패로 세지 않고 half-open 시험 호출 자리만 반납합니다.
+        """
+        if self.breaker is None:
+            return
+        if success is None:
+            self.breaker.record_cancelled(ticket)
+        elif success:
+            self.breaker.record_success(ticket, time.monotonic() - started)
+        else:
+            self.breaker.record_failure(ticket, time.monotonic() - started)
+
+    def _degraded(self, classification: Optional[ScenarioClassification]) -> Dict:
+        """차단기가 열려 있을 때의 로컬 규칙 기반 분석 (degraded 표시)"""
+        note = "(Vertex AI 지연/오류로 차단기가 열려 규칙 기반 결과 사용)"
+        if classification is not None:
+            result = self.classifier.build_analysis(classification, note=note)
+        else:
+            result = {
                 "detected_issues": [],
-                "severity": "info",
-                "summary": "No logs to analyze",
+                "severity": "warning",
+                "summary": f"Gemini 분석을 건너뛰었습니다. {note}",
                 "recommendations": [],
-                "affected_resources": []
+                "affected_resources": [],
+                "analysis_source": "rules"
             }
+        if not result["detected_issues"]:
+            # 알려진 패턴이 없어도 오류 로그는 있으므로 정상(info)으로 보고하지 않음
+            result["severity"] = "warning"
+            result["recommendations"] = ["Vertex AI 복구 후 로그를 다시 분석하세요"]
+        result["degraded"] = True
+        result["circuit"] = self.breaker.state
+        return result
+
+    async def _analyze_chunks(self, prepared: _PreparedAnalysis, deadline_at: float, hedge: bool) -> Dict:
+        """
+        청크 프롬프트들을 chunk_concurrency개까지 동시에 분석하고 merge_partial_analyses로 합칩니다.
+        일부 청크만 실패하면 성공한 청크로 결과를 만들고 (캐시하지 않음), 모두 실패하면 예외를 전달합니다.
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.chunk_concurrency)
+
+        async def analyze_chunk(prompt: str) -> Dict:
+            async with semaphore:
+                remaining = deadline_at - loop.time()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+                return await self._analyze_cascade(prompt, prepared, deadline_at, hedge)
+
+        results = await asyncio.gather(
+            *[analyze_chunk(prompt) for prompt in prepared.chunk_prompts],
+            return_exceptions=True
+        )
+        partials = [result for result in results if not isinstance(result, BaseException)]
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if not partials:
+            raise errors[0]
+
+        merged = merge_partial_analyses(partials, self.FAILURE_SCENARIOS, self.MERGED_RECOMMENDATION_LIMIT)
+        if self.llm_reduce and len(partials) > 1 and deadline_at > loop.time():
+            try:
+                text = await self._generate_hedged(self._build_reduce_prompt(partials), deadline_at - loop.time(), hedge)
+                merged = self._parse_gemini_response(text)
+            except Exception as e:
+                # 통합 실패 시 결정적 병합 결과 사용
+                logger.warning(f"⚠️ LLM reduce pass failed, using deterministic merge: {str(e) or type(e).__name__}")
+
+        merged["chunks"] = {"total": len(results), "failed": len(errors)}
+        if errors:
+            logger.warning(f"⚠️ {len(errors)}/{len(results)} analysis chunks failed")
+            merged["prompt_packing"] = prepared.packing
+            return merged
+        return self._remember(merged, prepared)
+
+    async def _analyze_cascade(self, section: str, prepared: _PreparedAnalysis, deadline_at: float, hedge: bool) -> Dict:
+        """
+        로그 구간 하나를 계층 순서대로 분석합니다.
 
-        # Prepare prompt for Gemini
-        prompt = self._build_analysis_prompt(logs)
+        하위 계층은 남은 마감 시간의 CASCADE_DEADLINE_SHARE까지만 쓰고, 실패/시간 초과/승격 조건이면 다음 계층으로,
+        마지막 계층(MODEL_NAME)의 결과는 그대로 채택합니다.
+        """
+        loop = asyncio.get_running_loop()
+        stats = self._start_cascade(prepared)
+        for tier in self.tiers:
+            final = tier is self.tiers[-1]
+            remaining = deadline_at - loop.time()
+            if remaining <= 0:
+                raise asyncio.TimeoutError()
+            try:
+                text = await self._generate_hedged(
+                    section,
+                    remaining if final else remaining * self.CASCADE_DEADLINE_SHARE,
+                    hedge,
+                    tier
+                )
+            except Exception as e:
+                if final:
+                    raise
+                self._escalate(stats, tier, "error", e)
+                continue
+
+            result = self._accept_or_escalate(stats, tier, text, prepared, final)
+            if result is not None:
+                return result
+
+    def _start_cascade(self, prepared: _PreparedAnalysis) -> Optional[CascadeStats]:
+        """계층이 둘 이상이면 분석 한 건을 지표에 기록하고 지표 객체를 반환합니다."""
+        if len(self.tiers) < 2:
+            return None
+        stats = get_cascade_stats()
+        stats.record_start()
+        return stats
+
+    def _escalate(self, stats: Optional[CascadeStats], tier: _ModelTier, reason: str, error: Optional[Exception] = None):
+        if stats:
+            stats.record_attempt(tier.name)
+            stats.record_escalation(tier.name, reason)
+        detail = f": {str(error) or type(error).__name__}" if error is not None else ""
+        logger.info(f"⬆️ Escalating analysis from {tier.name} ({reason}{detail})")
+
+    def _accept_or_escalate(
+        self,
+        stats: Optional[CascadeStats],
+        tier: _ModelTier,
+        text: str,
+        prepared: _PreparedAnalysis,
+        final: bool
+    ) -> Optional[Dict]:
+        """계층 응답을 파싱해 채택하면 결과를, 승격해야 하면 None을 반환합니다."""
+        result, valid = self._parse_checked(text)
+        if not final:
+            # 같은 대상의 직전 Gemini 분석이나 규칙 기반 분류가 이미 본 시나리오가 아니면 새 시나리오로 보고 승격
+            known = set(self.classifier.last_llm_scenarios(prepared.scenario_key) or ()) if self.classifier else set()
+            if prepared.classification is not None:
+                known.update(prepared.classification.detected)
+            reason = escalation_reason(result, valid, self.cascade_confidence, known)
+            if reason is not None:
+                self._escalate(stats, tier, reason)
+                return None
+
+        if stats:
+            stats.record_attempt(tier.name)
+            stats.record_accept(tier.name)
+        result["analysis_model"] = tier.name
+        return result
+
+    async def _generate_hedged(
+        self,
+        prompt: str,
+        deadline_seconds: float,
+        hedge: bool,
+        tier: Optional[_ModelTier] = None
+    ) -> str:
+        """
+        마감 시간 안에 Gemini 응답 텍스트를 반환합니다. (tier가 None이면 마지막 계층)
 
-        try:
-            # Vertex AI로 요청
-            response = self.model.generate_content(
+        hedge가 켜져 있고 지연 표본이 충분하면, 첫 요청이 최근 p95 지연 안에 끝나지 않을 때
+        같은 요청을 하나 더 보내고 먼저 성공한 응답을 사용하며 나머지는 취소합니다.
+        """
+        loop = asyncio.get_running_loop()
+        tier = tier or self.tiers[-1]
+        tracker = get_latency_tracker(tier.name)
+        deadline_at = loop.time() + deadline_seconds
+
+        hedge_delay = None
+        if hedge and len(tracker) >= self.HEDGE_MIN_SAMPLES:
+            hedge_delay = max(tracker.percentile(self.HEDGE_PERCENTILE), self.HEDGE_MIN_DELAY_SECONDS)
+
+        async def attempt() -> str:
+            started = loop.time()
+            response = await tier.model.generate_content_async(
                 prompt,
-                generation_config=self.generation_config
+                generation_config=tier.generation_config
             )
+            tracker.record(loop.time() - started)
+            return response.text
 
-            result = self._parse_gemini_response(response.text)
-            return result
+        tasks = [asyncio.ensure_future(attempt())]
+        try:
+            if hedge_delay is not None and hedge_delay < deadline_seconds:
+                done, _ = await asyncio.wait(tasks, timeout=hedge_delay)
+                if not done:
+                    logger.info(f"Gemini response slower than p95 ({hedge_delay:.1f}s), sending hedged request")
+                    tasks.append(asyncio.ensure_future(attempt()))
+
+            error = None
+            while tasks:
+                remaining = deadline_at - loop.time()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+                done, pending = await asyncio.wait(tasks, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    raise asyncio.TimeoutError()
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+                # 실패한 요청만 끝났으면 남은 요청을 계속 기다림
+                tasks = list(pending)
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def _prepare(
+        self,
+        logs: Union[LogBatch, List[Dict]],
+        allow_chunks: bool = False,
+        incident_key: Optional[str] = None
+    ) -> _PreparedAnalysis:
+        """
+        Gemini 호출 전 단계: 캐시 조회, 규칙 기반 분류, 프롬프트 생성
 
-        except Exception as e:
-            return {
-                "detected_issues": ["analysis-error"],
-                "severity": "critical",
-                "summary": f"Failed to analyze logs: {str(e)}",
-                "recommendations": ["Check Vertex AI configuration", "Verify GCP project permissions"],
+        로그가 없거나 캐시 적중/규칙 기반 생략/진행 중인 장애의 변화 없음이면 result에 결과가 들어 있습니다.
+        allow_chunks이고 로그가 한 프롬프트를 넘으면 prompt 대신 chunk_prompts를 만듭니다.
+        """
+        scenario_key = incident_key
+        if incident_key is None or self.incidents is None:
+            incident_key = None
+
+        if not logs:
+            if incident_key is not None:
+                self.incidents.close(incident_key)
+            return _PreparedAnalysis(result={
+                "detected_issues": [],
+                "severity": "info",
+                "summary": "No logs to analyze",
+                "recommendations": [],
                 "affected_resources": []
-            }
+            })
+
+        miner = self._mine_templates(logs)
+
+        # 같은 장애의 반복 분석은 로그 지문이 같으므로 저장된 결과를 바로 반환
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self._cache_key(logs, miner)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return _PreparedAnalysis(result=dict(cached, cached=True), cache_key=cache_key)
+
+        classification = self.classifier.classify(logs, miner) if self.classifier else None
+        if classification is not None and self.rules_fast_path and self.classifier.can_skip_llm(classification, scenario_key):
+            analysis = self.classifier.build_analysis(classification, note="(직전 Gemini 분석과 같은 시나리오로 Gemini 호출 생략)")
+            return _PreparedAnalysis(result=analysis, cache_key=cache_key, classification=classification)
+
+        if miner is None:
+            # 템플릿으로 묶지 않는 입력(집계 결과 등)은 장애 상태를 쓰지 않음
+            incident_key = None
+
+        state = self.incidents.get(incident_key) if incident_key is not None else None
+        if state is not None:
+            # 진행 중인 장애: 새로 나타났거나 건수 구간이 바뀐 템플릿만 이전 결론 요약과 함께 보냄
+            changed, unchanged = state.diff(miner)
+            incident = {"key": incident_key, "runs": state.runs, "templates_sent": len(changed), "templates_skipped": unchanged}
+            if not changed:
+                self.incidents.record_delta(incident_key, 0, unchanged)
+                return _PreparedAnalysis(result=dict(state.analysis, incident=dict(incident, unchanged=True)))
+
+            delta = miner.subset(changed)
+            packed = self._pack_log_lines(logs, delta)
+            # 변화분만으로도 한 프롬프트를 넘으면 (장애 양상이 크게 바뀜) 전체 윈도우를 다시 분석
+            if not (allow_chunks and self._exceeds_one_prompt(logs, delta, packed)):
+                self.incidents.record_delta(incident_key, len(changed), unchanged)
+                return _PreparedAnalysis(
+                    prompt=self._build_analysis_prompt(
+                        logs, delta, packed=packed, incident_note=state.describe(unchanged)
+                    ),
+                    cache_key=cache_key,
+                    classification=classification,
+                    packing=packed.report(),
+                    incident_key=incident_key,
+                    miner=miner,
+                    incident=incident,
+                    scenario_key=scenario_key
+                )
+
+        packed = self._pack_log_lines(logs, miner)
+        if allow_chunks and self._exceeds_one_prompt(logs, miner, packed):
+            chunk_prompts, reports = self._build_chunk_prompts(logs, miner)
+            return _PreparedAnalysis(
+                chunk_prompts=chunk_prompts,
+                cache_key=cache_key,
+                classification=classification,
+                packing=combine_pack_reports(reports),
+                incident_key=incident_key,
+                miner=miner,
+                scenario_key=scenario_key
+            )
 
-    def _build_analysis_prompt(self, logs: List[Dict]) -> str:
-        """Build analysis prompt for Gemini"""
+        # Prepare prompt for Gemini
+        return _PreparedAnalysis(
+            prompt=self._build_analysis_prompt(logs, miner, packed=packed),
+            cache_key=cache_key,
+            classification=classification,
+            packing=packed.report(),
+            incident_key=incident_key,
+            miner=miner,
+            scenario_key=scenario_key
+        )
 
-        # Extract message from each log dict and format with timestamp
-        log_lines = []
-        for log in logs[:100]:  # Limit to 100 logs
-            timestamp = log.get('timestamp', 'unknown')
-            message = log.get('message', '')
-            log_lines.append(f"[{timestamp}] {message}")
+    def _remember(self, result: Dict, prepared: _PreparedAnalysis) -> Dict:
+        """Gemini 분석 결과에 패킹 보고 첨부, 시나리오 집합 기록/장애 상태 갱신/캐시 저장"""
+        result["prompt_packing"] = prepared.packing
+        if prepared.incident is not None:
+            result["incident"] = prepared.incident
+        if self.classifier:
+            self.classifier.record_llm_result(result["detected_issues"], prepared.scenario_key)
+        if prepared.incident_key is not None:
+            self.incidents.update(prepared.incident_key, prepared.miner, result)
+        if prepared.cache_key is not None:
+            self.cache.set(prepared.cache_key, result)
+        return result
+
+    def _exceeds_one_prompt(
+        self,
+        logs: Union[LogBatch, List[Dict]],
+        miner: Optional[TemplateMiner],
+        packed: PackedLines
+    ) -> bool:
+        """토큰 예산 때문에 생략된 줄이 있고, 청크로 나누면 실제로 여러 청크가 되는지"""
+        if not packed.dropped:
+            return False
+        if miner is not None:
+            return len(miner.clusters) > self.TEMPLATE_PROMPT_LIMIT
+        return len(logs) > self.PROMPT_LOG_LIMIT
+
+    def _build_chunk_prompts(
+        self,
+        logs: Union[LogBatch, List[Dict]],
+        miner: Optional[TemplateMiner]
+    ) -> Tuple[List[str], List[Dict]]:
+        """
+        chunk_by 기준으로 로그를 최대 MAX_CHUNKS개 청크로 나눠 청크별 프롬프트와 패킹 보고를 만듭니다.
 
-        log_sample = "\n".join(log_lines)
+        - template: 건수 순 템플릿을 TEMPLATE_PROMPT_LIMIT개씩 (원본 이벤트) 또는 PROMPT_LOG_LIMIT개 로그씩
+        - stream: 로그 스트림별 (큰 스트림부터, MAX_CHUNKS를 넘는 작은 스트림들은 마지막 청크로 합침)
+        각 청크도 토큰 예산 안으로 패킹합니다.
+        """
+        if self.chunk_by == "stream" and isinstance(logs, LogBatch):
+            groups = sorted(logs.group_by_stream().values(), key=len, reverse=True)
+            if len(groups) > self.MAX_CHUNKS:
+                groups = groups[:self.MAX_CHUNKS - 1] + [LogBatch.merge(groups[self.MAX_CHUNKS - 1:])]
+            chunks = [(group, self._mine_templates(group)) for group in groups]
+        elif self.chunk_by != "stream" and miner is not None:
+            size = max(self.TEMPLATE_PROMPT_LIMIT, math.ceil(len(miner.clusters) / self.MAX_CHUNKS))
+            chunks = [(logs, part) for part in miner.partition(size)]
+        else:
+            if self.chunk_by == "stream":
+                streams: Dict[str, List[Dict]] = {}
+                for log in logs:
+                    streams.setdefault(log.get('log_stream', 'unknown'), []).append(log)
+                ordered = [log for group in sorted(streams.values(), key=len, reverse=True) for log in group]
+            else:
+                ordered = list(logs)
+            size = max(self.PROMPT_LOG_LIMIT, math.ceil(len(ordered) / self.MAX_CHUNKS))
+            chunks = [(ordered[start:start + size], None) for start in range(0, len(ordered), size)]
+
+        prompts, reports = [], []
+        for chunk_logs, chunk_miner in chunks:
+            packed = self._pack_log_lines(chunk_logs, chunk_miner)
+            prompts.append(self._build_analysis_prompt(chunk_logs, chunk_miner, packed))
+            reports.append(packed.report())
+        return prompts, reports
+
+    def _failed(self, error: Exception, classification: Optional[ScenarioClassification]) -> Dict:
+        """Vertex AI 실패 시 규칙 기반 분류 결과로 대체 (감지된 시나리오가 없으면 오류 결과)"""
+        if classification is not None and classification.detected:
+            return self.classifier.build_analysis(classification, note=f"(Vertex AI 분석 실패로 규칙 기반 결과 사용: {str(error)})")
+        return {
+            "detected_issues": ["analysis-error"],
+            "severity": "critical",
+            "summary": f"Failed to analyze logs: {str(error)}",
+            "recommendations": ["Check Vertex AI configuration", "Verify GCP project permissions"],
+            "affected_resources": []
+        }
+
+    def _build_analysis_prompt(
+        self,
+        logs: Union[LogBatch, List[Dict]],
+        miner: Optional[TemplateMiner] = None,
+        packed: Optional[PackedLines] = None,
+        incident_note: str = ""
+    ) -> str:
+        """
+        Build analysis prompt for Gemini
 
-        prompt = f"""당신은 AWS CloudWatch 로그를 분석하는 클라우드 운영 AI입니다. 3-tier 웹 애플리케이션의 로그를 분석합니다.
+        incident_note가 있으면 진행 중인 장애의 이전 결론 요약을 로그 앞에 넣습니다. (miner는 변화분 템플릿)
+        """
 
-**애플리케이션 아키텍처:**
-- Frontend: CloudFront + S3의 Next.js
-- Backend: ECS Fargate의 Node.js/Express
-- Database: RDS MySQL 8.0
+        # 원본 이벤트(LogBatch)는 템플릿으로 묶어 로그 양과 무관하게 수십 줄로 요약
+        if miner is None:
+            miner = self._mine_templates(logs)
+        if packed is None:
+            packed = self._pack_log_lines(logs, miner)
+
+        if miner is not None:
+            log_lines = [
+                f"({miner.total}건을 {len(miner.clusters)}개 템플릿으로 요약, [x건수] 처음~마지막 발생 시각, "
+                f"<NUM>/<IP>/<*> 등은 가변 값)"
+            ] + packed.lines
+            if packed.dropped:
+                log_lines.append(f"[x{packed.dropped_count}] 기타 {packed.dropped}개 템플릿 (토큰 예산 초과로 생략)")
+        else:
+            # Format each log with timestamp
+            log_lines = list(packed.lines)
+            if packed.dropped:
+                log_lines.append(f"(중요도가 낮은 로그 {packed.dropped}건은 토큰 예산 초과로 생략)")
 
-**알려진 장애 시나리오:**
-1. db-failure: 데이터베이스 연결 오류 (잘못된 엔드포인트, 네트워크 문제)
-2. pool-exhaustion: 커넥션 풀 고갈 (max_connections 초과)
-3. memory-leak: 메모리 지속적 증가 (OOM 위험)
-4. slow-query: N+1 쿼리 문제 또는 인덱스 누락
-5. api-timeout: 외부 API 호출 타임아웃
-6. jwt-expiry: JWT 토큰 만료 문제
-7. high-cpu: CPU 집약적 연산으로 인한 성능 저하
+        log_sample = "\n".join(log_lines)
 
-**CloudWatch 로그:**
+        # 샘플링된 경우 전체 건수를 알려 빈도를 과소평가하지 않도록 함
+        sampling_note = describe_sampling(logs)
+        if sampling_note:
+            sampling_note = f"\n**샘플링:** {sampling_note}\n"
+
+        if incident_note:
+            incident_note = f"**진행 중인 장애:**\n{incident_note}\n\n"
+
+        log_section = f"""{incident_note}**CloudWatch 로그:**{sampling_note}
 ```
 {log_sample}
 ```
 
-**작업:**
-로그를 분석하고 다음 JSON 구조로 반환하세요. summary와 recommendations는 한국어로 작성:
+위 로그를 분석하여 지정된 JSON 구조로 반환하세요.
+"""
+        return f"{self.ANALYSIS_PREAMBLE}\n{log_section}"
 
-{{
-  "detected_issues": ["scenario1", "scenario2"],  // 감지된 시나리오 이름 (영어 그대로)
-  "severity": "critical|warning|info",            // 심각도 (영어 그대로)
-  "summary": "문제 설명 (한국어로 1-2문장)",
-  "recommendations": [                             // 권장사항 (한국어로 작성)
-    "인덱스를 추가하여 쿼리 성능 개선",
-    "ECS 메모리를 512MB에서 1024MB로 증가"
-  ],
-  "affected_resources": [                          // 영향받은 리소스 (영어 그대로)
-    "ECS Task: arn:aws:ecs:...",
-    "RDS Instance: patient-zone-mysql"
-  ]
-}}
+    def _build_reduce_prompt(self, partials: List[Dict]) -> str:
+        """청크별 부분 분석 결과를 하나로 통합하는 프롬프트"""
+        partial_lines = "\n".join(
+            f"{i}. {json.dumps(partial, ensure_ascii=False)}" for i, partial in enumerate(partials, 1)
+        )
+        return f"""당신은 AWS CloudWatch 로그를 분석하는 클라우드 운영 AI입니다.
+같은 시간 구간의 로그를 {len(partials)}개 청크로 나누어 분석한 부분 결과를 하나의 분석으로 통합하세요.
 
-**중요:**
+**부분 분석 결과:**
+{partial_lines}
+
+**작업:**
+부분 결과들을 같은 JSON 구조 (detected_issues, severity, summary, recommendations, affected_resources)로 통합하세요.
+- detected_issues는 {", ".join(self.FAILURE_SCENARIOS)} 중에서 (영어)
+- severity는 부분 결과 중 가장 높은 것을 기준으로 critical/warning/info 중 하나 (영어)
+- summary는 전체 상황을 한국어 1-2문장으로, recommendations는 중복 없이 우선순위 순으로 한국어로
 - 유효한 JSON만 반환, 마크다운 코드 블록 없이
-- detected_issues는 위 시나리오 이름 사용 (영어)
-- severity는 critical/warning/info 중 하나 (영어)
-- summary와 recommendations만 한국어로 작성
-- affected_resources는 실제 AWS 리소스 이름 (영어)
-- 문제가 없으면 빈 배열과 severity "info" 반환
 """
-        return prompt
+
+    def _pack_log_lines(self, logs: Union[LogBatch, List[Dict]], miner: Optional[TemplateMiner]) -> PackedLines:
+        """템플릿 요약 줄(원본 이벤트) 또는 로그 줄(집계 결과 등)을 토큰 예산 안으로 패킹합니다."""
+        if miner is not None:
+            packed = self.packer.pack_templates(miner)
+        else:
+            packed = self.packer.pack_logs(format_log_lines(logs), [log.get('message', '') for log in logs])
+        if packed.dropped or packed.trimmed:
+            logger.info(
+                f"📦 Prompt packed {packed.packed}/{packed.total} lines "
+                f"({packed.used_tokens}/{packed.budget_tokens} tokens, {packed.trimmed} trimmed, {packed.dropped} dropped)"
+            )
+        return packed
+
+    def _mine_templates(self, logs: Union[LogBatch, List[Dict]]) -> Optional[TemplateMiner]:
+        """
+        Drain 방식으로 원본 이벤트를 (템플릿, 건수, 처음/마지막 발생, 예시 파라미터)로 묶습니다.
+        이미 집계된 입력(Insights 결과 등 딕셔너리 리스트)은 그대로 사용하므로 None을 반환합니다.
+        """
+        if not isinstance(logs, LogBatch):
+            return None
+        return mine_templates(logs.iter_records())
+
+    def _cache_key(self, logs: Union[LogBatch, List[Dict]], miner: Optional[TemplateMiner]) -> str:
+        """
+        분석 캐시 키: 템플릿 집합 + 템플릿별 건수 구간 지문
+        집계된 입력(딕셔너리 리스트)도 메시지를 템플릿으로 묶어 같은 방식으로 지문을 만듭니다.
+        """
+        if miner is None:
+            miner = mine_templates((None, log.get('message', '')) for log in logs)
+        # 샘플링된 배치는 표본 밖 전체 건수도 프롬프트에 들어가므로 전략과 전체 건수 구간을 지문에 포함
+        sampling = getattr(logs, "sampling", None) or {}
+        namespace = f"{self.MODEL_NAME}|{sampling.get('strategy', '')}|{count_bucket(sampling.get('seen', 0))}"
+        return fingerprint_templates(miner, namespace=namespace)
 
     def _parse_gemini_response(self, response_text: str) -> Dict:
         """Parse Gemini's response and extract structured data"""
+        return self._parse_checked(response_text)[0]
+
+    def _parse_checked(self, response_text: str) -> Tuple[Dict, bool]:
+        """(분석 결과, 잘린 JSON 복구나 텍스트 추출 없이 스키마대로 파싱되었는지)"""
 
         try:
-            # Remove markdown code blocks if present
-            cleaned = response_text.strip()
-            if cleaned.startswith("```json"):
-                cleaned = cleaned[7:]
-            if cleaned.startswith("```"):
-                cleaned = cleaned[3:]
-            if cleaned.endswith("```"):
-                cleaned = cleaned[:-3]
-
-            # Parse JSON
-            result = json.loads(cleaned.strip())
-
-            # Validate required fields
-            required_fields = ["detected_issues", "severity", "summary", "recommendations", "affected_resources"]
-            for field in required_fields:
-                if field not in result:
-                    result[field] = [] if field in ["detected_issues", "recommendations", "affected_resources"] else "unknown"
-
-            return result
-
-        except json.JSONDecodeError as e:
+            # 스키마 검증기로 정규화 (코드 블록 제거, 잘린 JSON 복구, 누락 필드 채움)
+            result, repaired = parse_json_response(response_text, self.RESPONSE_VALIDATOR)
+            if repaired:
+                logger.warning("⚠️ Gemini response was truncated, repaired JSON")
+            return result, not repaired
+
+        except ValueError:
             # Fallback: extract information from raw text
             return {
                 "detected_issues": self._extract_scenarios_from_text(response_text),
@@ -181,7 +845,7 @@ class LogAnalyzer:
                 "summary": response_text[:200],
                 "recommendations": ["Review logs manually for detailed analysis"],
                 "affected_resources": []
-            }
+            }, False
 
     def _extract_scenarios_from_text(self, text: str) -> List[str]:
         """Extract scenario names from plain text response"""
@@ -195,6 +859,58 @@ class LogAnalyzer:
         return detected
 
 
+def merge_partial_analyses(
+    partials: List[Dict],
+    scenario_order: List[str] = LogAnalyzer.FAILURE_SCENARIOS,
+    recommendation_limit: int = 10
+) -> Dict:
+    """
+    청크별 분석 결과를 하나의 분석 결과로 합칩니다. (결정적 reducer)
+
+    - detected_issues: 감지한 청크 수가 많은 순, 같으면 scenario_order 순 ("analysis-error" 제외)
+    - severity: 가장 높은 심각도
+    - summary / recommendations: 심각도 높은 청크부터 (같으면 청크 순서), 중복 제거
+    - affected_resources: 등장 순서대로 중복 제거
+    """
+    ordered = [
+        partial for _, partial in sorted(
+            enumerate(partials),
+            key=lambda item: (-SEVERITY_RANK.get(item[1].get("severity"), 0), item[0])
+        )
+    ]
+
+    issue_counts = Counter(
+        issue for partial in partials for issue in set(partial.get("detected_issues", [])) if issue != "analysis-error"
+    )
+    rank = {scenario: i for i, scenario in enumerate(scenario_order)}
+    detected = sorted(issue_counts, key=lambda issue: (-issue_counts[issue], rank.get(issue, len(rank)), issue))
+
+    severity = max(
+        (partial.get("severity") for partial in partials),
+        key=lambda level: SEVERITY_RANK.get(level, -1),
+        default="info"
+    )
+    if severity not in SEVERITY_RANK:
+        severity = "info"
+
+    summaries = [partial["summary"] for partial in ordered if partial.get("summary")]
+    if len(partials) == 1:
+        summary = summaries[0] if summaries else ""
+    else:
+        summary = f"{len(partials)}개 청크 분석 통합: " + " / ".join(summaries[:3])
+
+    recommendations = list(dict.fromkeys(rec for partial in ordered for rec in partial.get("recommendations", [])))
+    affected_resources = list(dict.fromkeys(res for partial in partials for res in partial.get("affected_resources", [])))
+
+    return {
+        "detected_issues": detected,
+        "severity": severity,
+        "summary": summary,
+        "recommendations": recommendations[:recommendation_limit],
+        "affected_resources": affected_resources
+    }
+
+
 def format_analysis_for_slack(analysis: Dict) -> str:
     """Format analysis result for Slack notification"""
 
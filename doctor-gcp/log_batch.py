@@ -0,0 +1,299 @@
+"""
+Log Batch - 조회한 로그 이벤트의 컬럼형 메모리 표현
+이벤트마다 딕셔너리를 만드는 대신 타임스탬프(int64 배열), 인터닝된 스트림 이름,
+하나의 연속 버퍼에 담긴 메시지(+오프셋)로 보관하여 대용량 윈도우의 메모리 할당을 줄입니다.
+"""
+
+import heapq
+from array import array
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Tuple, Union
+
+
+class LogRow:
+    """
+    LogBatch의 한 행에 대한 지연 뷰
+
+    필드는 접근할 때만 디코딩/포맷되며, 기존 분석기 코드가 그대로 동작하도록
+    log['message'], log.get('timestamp') 같은 딕셔너리 접근을 지원합니다.
+    """
+
+    __slots__ = ("_batch", "_index")
+
+    FIELDS = ("timestamp", "message", "log_stream")
+    SOURCE_FIELDS = ("region", "log_group")
+
+    def __init__(self, batch: "LogBatch", index: int):
+        self._batch = batch
+        self._index = index
+
+    @property
+    def timestamp_ms(self) -> int:
+        return self._batch._timestamps[self._index]
+
+    @property
+    def timestamp(self) -> str:
+        return datetime.fromtimestamp(self.timestamp_ms / 1000).isoformat()
+
+    @property
+    def message(self) -> str:
+        return self._batch._message_bytes(self._index).decode("utf-8")
+
+    @property
+    def log_stream(self) -> str:
+        return self._batch._streams[self._batch._stream_ids[self._index]]
+
+    @property
+    def source(self) -> Optional[Tuple[str, str]]:
+        """다중 대상 조회 시 (region, log_group), 단일 대상이면 None"""
+        return self._batch._sources[self._batch._source_ids[self._index]]
+
+    def keys(self) -> List[str]:
+        if self.source is None:
+            return list(self.FIELDS)
+        return list(self.FIELDS + self.SOURCE_FIELDS)
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self.FIELDS:
+            return getattr(self, key)
+        if key in self.SOURCE_FIELDS and self.source is not None:
+            return self.source[self.SOURCE_FIELDS.index(key)]
+        raise KeyError(key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.keys()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: self[key] for key in self.keys()}
+
+    def __repr__(self) -> str:
+        return f"LogRow({self.to_dict()!r})"
+
+
+class LogBatch:
+    """
+    컬럼형 로그 이벤트 배치
+
+    특징:
+    - 타임스탬프: epoch 밀리초 int64 배열
+    - 스트림 이름 / (region, log_group): 인터닝된 문자열 테이블 + 인덱스 배열
+    - 메시지: UTF-8 연속 버퍼 하나 + 오프셋 배열 (앞뒤 공백 제거 후 저장)
+    - batch[a:b]는 같은 버퍼를 공유하는 zero-copy 뷰, batch[i]는 지연 LogRow 뷰
+    - len(), 반복, 슬라이싱, 행의 딕셔너리 접근을 지원하여 기존 List[Dict] 소비자와 호환
+    """
+
+    def __init__(self):
+        self._timestamps = array("q")
+        self._stream_ids = array("I")
+        self._source_ids = array("I")
+        self._offsets = array("Q", [0])
+        self._messages = bytearray()
+        self._streams: List[str] = []
+        self._stream_index: Dict[str, int] = {}
+        self._sources: List[Optional[Tuple[str, str]]] = [None]
+        self._source_index: Dict[Optional[Tuple[str, str]], int] = {None: 0}
+        self._start = 0
+        self._stop = 0
+        self._is_view = False
+        # 샘플링된 배치면 본/남긴/버린 이벤트 수 (log_sampling.LogSampler.summary)
+        self.sampling: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_events(
+        cls,
+        events: Iterable[Dict[str, Any]],
+        source: Optional[Tuple[str, str]] = None
+    ) -> "LogBatch":
+        """filter_log_events 원본 이벤트들로 배치를 만듭니다. (중간 딕셔너리를 만들지 않음)"""
+        batch = cls()
+        for event in events:
+            batch.append(event['timestamp'], event['message'], event.get('logStreamName'), source)
+        return batch
+
+    @classmethod
+    def merge(
+        cls,
+        batches: List["LogBatch"],
+        max_rows: Optional[int] = None,
+        sources: Optional[List[Tuple[str, str]]] = None
+    ) -> "LogBatch":
+        """
+        타임스탬프 순으로 정렬된 배치들을 하나의 정렬된 배치로 병합합니다.
+
+        Args:
+            batches: 각각 타임스탬프 순으로 정렬된 배치
+            max_rows: 최대 행 수 (None이면 제한 없음)
+            sources: 배치별 (region, log_group) 태그 (None이면 각 행의 기존 태그 유지)
+        """
+        merged = cls()
+        rows = heapq.merge(
+            *[batch._iter_keyed(k) for k, batch in enumerate(batches)],
+            key=lambda item: item[0]
+        )
+        for timestamp_ms, k, batch, i in rows:
+            if max_rows is not None and len(merged) >= max_rows:
+                break
+            merged._append_raw(
+                timestamp_ms,
+                batch._message_bytes(i),
+                batch._streams[batch._stream_ids[i]],
+                sources[k] if sources else batch._sources[batch._source_ids[i]]
+            )
+        return merged
+
+    def _iter_keyed(self, k: int) -> Iterator[Tuple[int, int, "LogBatch", int]]:
+        for i in range(self._start, self._stop):
+            yield self._timestamps[i], k, self, i
+
+    def _intern(self, table: List, index: Dict, value) -> int:
+        interned = index.get(value)
+        if interned is None:
+            interned = len(table)
+            table.append(value)
+            index[value] = interned
+        return interned
+
+    def append(
+        self,
+        timestamp_ms: int,
+        message: str,
+        log_stream: Optional[str] = None,
+        source: Optional[Tuple[str, str]] = None
+    ):
+        """이벤트 하나를 추가합니다. (뷰에는 추가할 수 없음)"""
+        self._append_raw(timestamp_ms, message.strip().encode("utf-8"), log_stream or 'unknown', source)
+
+    def _append_raw(self, timestamp_ms: int, message: bytes, log_stream: str, source):
+        if self._is_view:
+            raise ValueError("Cannot append to a LogBatch view")
+
+        self._timestamps.append(timestamp_ms)
+        self._stream_ids.append(self._intern(self._streams, self._stream_index, log_stream))
+        self._source_ids.append(self._intern(self._sources, self._source_index, source))
+        self._messages += message
+        self._offsets.append(len(self._messages))
+        self._stop += 1
+
+    def _message_bytes(self, index: int) -> bytes:
+        # memoryview를 밖으로 내보내면 살아 있는 동안 버퍼 크기를 바꿀 수 없어 이후 append가 BufferError로 실패함
+        return bytes(memoryview(self._messages)[self._offsets[index]:self._offsets[index + 1]])
+
+    def _view(self, start: int, stop: int) -> "LogBatch":
+        view = LogBatch.__new__(LogBatch)
+        view.__dict__.update(self.__dict__)
+        view._start = start
+        view._stop = stop
+        view._is_view = True
+        return view
+
+    def __len__(self) -> int:
+        return self._stop - self._start
+
+    def __bool__(self) -> bool:
+        return self._stop > self._start
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[LogRow, "LogBatch"]:
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step != 1:
+                raise ValueError("LogBatch slices must be contiguous")
+            return self._view(self._start + start, self._start + max(start, stop))
+
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError("LogBatch index out of range")
+        return LogRow(self, self._start + key)
+
+    def __iter__(self) -> Iterator[LogRow]:
+        for i in range(self._start, self._stop):
+            yield LogRow(self, i)
+
+    @property
+    def timestamps(self) -> array:
+        """epoch 밀리초 타임스탬프 컬럼 (복사본 - 이후 append와 충돌하지 않도록 버퍼를 공유하지 않음)"""
+        return self._timestamps[self._start:self._stop]
+
+    @property
+    def message_buffer(self) -> bytes:
+        """이 배치 구간의 메시지들이 이어 붙은 UTF-8 버퍼 (복사본)"""
+        return bytes(memoryview(self._messages)[self._offsets[self._start]:self._offsets[self._stop]])
+
+    def message_bytes(self, index: int) -> bytes:
+        """index번째 메시지의 UTF-8 바이트 (복사본)"""
+        return self._message_bytes(self._start + index)
+
+    @property
+    def nbytes(self) -> int:
+        """메시지 바이트 합계"""
+        return self._offsets[self._stop] - self._offsets[self._start]
+
+    def iter_lines(self) -> Iterator[str]:
+        """행 객체를 만들지 않고 "[timestamp] message" 형식의 줄을 생성합니다."""
+        for i in range(self._start, self._stop):
+            timestamp = datetime.fromtimestamp(self._timestamps[i] / 1000).isoformat()
+            yield f"[{timestamp}] {self._message_bytes(i).decode('utf-8')}"
+
+    def iter_records(self) -> Iterator[Tuple[int, str]]:
+        """행 객체를 만들지 않고 (epoch 밀리초, 메시지)를 생성합니다. (템플릿 마이닝 등 스트리밍 소비자용)"""
+        for i in range(self._start, self._stop):
+            yield self._timestamps[i], self._message_bytes(i).decode("utf-8")
+
+    def group_by_stream(self) -> Dict[str, "LogBatch"]:
+        """로그 스트림별 배치로 나눕니다. (각 배치 안의 순서는 유지)"""
+        groups: Dict[str, LogBatch] = {}
+        for i in range(self._start, self._stop):
+            log_stream = self._streams[self._stream_ids[i]]
+            group = groups.get(log_stream)
+            if group is None:
+                group = groups[log_stream] = LogBatch()
+            group._append_raw(self._timestamps[i], self._message_bytes(i), log_stream, self._sources[self._source_ids[i]])
+        return groups
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """JSON 직렬화 등을 위해 딕셔너리 리스트로 변환합니다."""
+        return [row.to_dict() for row in self]
+
+    def __repr__(self) -> str:
+        return f"LogBatch(rows={len(self)}, bytes={self.nbytes}, streams={len(self._streams)})"
+
+
+def format_log_lines(logs: Union[LogBatch, List[Dict[str, Any]]], limit: Optional[int] = None) -> List[str]:
+    """
+    분석 프롬프트용 "[timestamp] message" 줄 리스트
+
+    LogBatch면 컬럼에서 바로 포맷하고, 딕셔너리 리스트(Insights 집계 결과 등)도 그대로 지원합니다.
+    """
+    if limit is not None:
+        logs = logs[:limit]
+    if isinstance(logs, LogBatch):
+        return list(logs.iter_lines())
+    return [f"[{log.get('timestamp', 'unknown')}] {log.get('message', '')}" for log in logs]
+
+
+def describe_sampling(logs: Union[LogBatch, List[Dict[str, Any]]]) -> str:
+    """
+    샘플링된 배치면 분석 프롬프트에 넣을 표본 설명 한 줄, 아니면 빈 문자열
+
+    Gemini가 표본만 보고 빈도를 과소평가하지 않도록 층별 전체 건수를 함께 알려줍니다.
+    """
+    sampling = getattr(logs, "sampling", None)
+    if not sampling or not sampling["dropped"]:
+        return ""
+
+    strata = ", ".join(
+        f"{stratum} {counts['seen']}건 중 {counts['kept']}건"
+        for stratum, counts in list(sampling["strata"].items())[:10]
+    )
+    truncated = " (스캔 상한 도달, 실제 건수는 더 많음)" if sampling.get("scan_truncated") else ""
+    return (
+        f"아래 로그는 전체 {sampling['seen']}건 중 {sampling['kept']}건을 "
+        f"{sampling['strategy']} 방식으로 샘플링한 것입니다{truncated}. 층별: {strata}"
+    )
+
@@ -0,0 +1,251 @@
+"""
+Log Cursor Store - 로그 그룹별 증분 조회 상태
+(region, log_group, filter_pattern)마다 high-water mark와 최근 윈도우 버퍼를 유지하여
+반복 분석 시 CloudWatch에서 새로 들어온 이벤트만 가져오도록 합니다.
+"""
+
+import heapq
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import List, Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class LogCursorStore:
+    """
+    증분 로그 조회를 위한 커서 저장소
+
+    특징:
+    - high-water mark (마지막 타임스탬프 + 그 시각의 eventId 집합)를 JSON 파일에 영속화
+    - 최근 이벤트를 메모리 윈도우 버퍼에 보관하여 같은 구간 재조회 시 delta만 요청
+    - 늦게 수집된 이벤트를 놓치지 않도록 delta 조회 구간을 약간 겹치고 eventId로 중복 제거
+    - 버퍼가 이어서 덮는 구간(covered_from ~ covered_until)과 커서를 따로 관리하고, 커서는 뒤로 돌리지 않음
+      (예산에 잘린 재조회가 커서를 되돌리면 get_new_error_logs가 이미 보낸 이벤트를 다시 보고함)
+    - 스레드 안전 (백그라운드 태스크 동시 실행 대응)
+    """
+
+    # 버퍼 보관 구간 (/slack/command 최대 구간과 동일)
+    BUFFER_HORIZON_MINUTES = 120
+    # CloudWatch 수집 지연을 고려해 delta 조회 시 high-water mark 이전으로 겹쳐 읽는 구간
+    INGESTION_LAG_MS = 30 * 1000
+
+    def __init__(self, state_path: Optional[str] = None, max_buffer_events: int = 50000):
+        """
+        Args:
+            state_path: 커서를 저장할 JSON 파일 경로 (None이면 메모리에만 유지)
+            max_buffer_events: 키별 버퍼 최대 이벤트 수
+        """
+        self.state_path = state_path
+        self.max_buffer_events = max_buffer_events
+        self._lock = threading.Lock()
+        self._cursors: Dict[str, Dict[str, Any]] = {}
+        self._buffers: Dict[str, deque] = {}
+        self._covered_from: Dict[str, int] = {}
+        # 버퍼에 이어서 들어 있는 마지막 조회 이벤트의 타임스탬프 (delta 조회 시작점)
+        self._covered_until: Dict[str, int] = {}
+
+        self._load()
+
+    @staticmethod
+    def _key(region: str, log_group_name: str, filter_pattern: str) -> str:
+        return f"{region}|{log_group_name}|{filter_pattern}"
+
+    def _load(self):
+        if not self.state_path or not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                self._cursors = json.load(f)
+            logger.info(f"📌 Loaded {len(self._cursors)} log cursors from {self.state_path}")
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Failed to load log cursors, starting fresh: {str(e)}")
+            self._cursors = {}
+
+    def _persist(self):
+        """커서를 임시 파일에 쓴 뒤 교체하여 부분 기록을 방지합니다. (락 보유 상태에서 호출)"""
+        if not self.state_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+            tmp_path = f"{self.state_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._cursors, f)
+            os.replace(tmp_path, self.state_path)
+        except OSError as e:
+            logger.warning(f"⚠️ Failed to persist log cursors: {str(e)}")
+
+    def get_cursor(self, region: str, log_group_name: str, filter_pattern: str) -> Optional[Dict[str, Any]]:
+        """저장된 high-water mark ({"last_timestamp": ..., "event_ids": [...]}) 또는 None"""
+        with self._lock:
+            cursor = self._cursors.get(self._key(region, log_group_name, filter_pattern))
+            return dict(cursor) if cursor else None
+
+    def plan_fetch(self, region: str, log_group_name: str, filter_pattern: str, window_start_ms: int) -> Tuple[int, bool]:
+        """
+        윈도우 조회를 위해 CloudWatch에 요청할 시작 시각을 결정합니다.
+
+        버퍼가 윈도우 시작 시각부터 이어져 있으면 버퍼 끝부터 delta만 (수집 지연을 고려해
+        INGESTION_LAG_MS만큼 겹쳐서), 그렇지 않으면 윈도우 전체를 다시 조회해야 합니다.
+
+        Returns:
+            (조회 시작 시각, delta 조회 여부)
+        """
+        key = self._key(region, log_group_name, filter_pattern)
+        with self._lock:
+            covered_from = self._covered_from.get(key)
+            covered_until = self._covered_until.get(key)
+            if key in self._buffers and covered_from is not None and covered_from <= window_start_ms:
+                return max(covered_until - self.INGESTION_LAG_MS, window_start_ms), True
+            return window_start_ms, False
+
+    def known_since(self, region: str, log_group_name: str, filter_pattern: str, fetch_start_ms: int) -> int:
+        """
+        fetch_start_ms부터 조회하면 이미 알고 있어 merge에서 중복 제거될 이벤트 수
+
+        조회 limit을 (필요한 새 이벤트 수 + 이 값)으로 잡아야 겹쳐 읽는 구간의 기존 이벤트가
+        limit을 다 써 버려 새 이벤트 없이 같은 구간에서 멈추는 일이 없습니다.
+        """
+        key = self._key(region, log_group_name, filter_pattern)
+        with self._lock:
+            if self._covers(key, fetch_start_ms):
+                return sum(1 for event in self._buffers[key] if event['timestamp'] >= fetch_start_ms)
+            cursor = self._cursors.get(key)
+            if cursor is not None and fetch_start_ms == cursor['last_timestamp']:
+                return len(cursor['event_ids'])
+            return 0
+
+    def _covers(self, key: str, fetch_start_ms: int) -> bool:
+        """버퍼가 fetch_start_ms까지 끊김 없이 이어져 있는지 (락 보유 상태에서 호출)"""
+        covered_from = self._covered_from.get(key)
+        return (
+            key in self._buffers
+            and covered_from is not None
+            and covered_from <= fetch_start_ms <= self._covered_until[key]
+        )
+
+    def count_in_window(self, region: str, log_group_name: str, filter_pattern: str, start_ms: int, end_ms: int) -> int:
+        """버퍼에 있는 [start_ms, end_ms] 구간 이벤트 수"""
+        with self._lock:
+            buffer = self._buffers.get(self._key(region, log_group_name, filter_pattern), ())
+            return sum(1 for event in buffer if start_ms <= event['timestamp'] <= end_ms)
+
+    def merge(
+        self,
+        region: str,
+        log_group_name: str,
+        filter_pattern: str,
+        events: List[Dict[str, Any]],
+        fetch_start_ms: int
+    ) -> List[Dict[str, Any]]:
+        """
+        fetch_start_ms부터 조회한 이벤트를 버퍼에 병합하고 커서를 갱신합니다.
+
+        - 버퍼가 fetch_start_ms까지 이어져 있으면: 버퍼에 이미 있는 eventId를 제거하고 병합 (delta)
+        - 커서부터 조회했으면: 커서의 eventId를 제거하고 버퍼를 새로 시작 (재시작 후 delta)
+        - 그 외: 버퍼를 새 조회 결과로 교체
+        커서는 max(기존, 새 마지막 타임스탬프)로만 움직입니다.
+
+        Returns:
+            새로 추가된 이벤트 리스트 (타임스탬프 순)
+        """
+        key = self._key(region, log_group_name, filter_pattern)
+        events = sorted(events, key=lambda event: event['timestamp'])
+
+        with self._lock:
+            cursor = self._cursors.get(key)
+            buffer = self._buffers.get(key)
+
+            if self._covers(key, fetch_start_ms):
+                seen_ids = set()
+                for event in reversed(buffer):
+                    if event['timestamp'] < fetch_start_ms:
+                        break
+                    seen_ids.add(event.get('eventId'))
+            else:
+                if cursor is not None and fetch_start_ms == cursor['last_timestamp']:
+                    seen_ids = set(cursor['event_ids'])
+                else:
+                    seen_ids = set()
+                buffer = deque()
+                self._covered_from[key] = fetch_start_ms
+                self._covered_until[key] = fetch_start_ms
+
+            if events:
+                # 중복 제거 전 마지막 조회 이벤트까지는 버퍼가 이어서 덮음
+                self._covered_until[key] = max(self._covered_until[key], events[-1]['timestamp'])
+            events = [event for event in events if event.get('eventId') not in seen_ids]
+
+            # 수집 지연으로 늦게 도착한 이벤트는 정렬 순서를 유지하며 끼워 넣음
+            if buffer and events and events[0]['timestamp'] < buffer[-1]['timestamp']:
+                buffer = deque(heapq.merge(buffer, events, key=lambda event: event['timestamp']))
+            else:
+                buffer.extend(events)
+            self._buffers[key] = buffer
+
+            if events:
+                last_timestamp = events[-1]['timestamp']
+                event_ids = [event.get('eventId') for event in events if event['timestamp'] == last_timestamp]
+                if cursor and cursor['last_timestamp'] >= last_timestamp:
+                    if cursor['last_timestamp'] == last_timestamp:
+                        cursor['event_ids'] = list(dict.fromkeys(cursor['event_ids'] + event_ids))
+                else:
+                    self._cursors[key] = {'last_timestamp': last_timestamp, 'event_ids': event_ids}
+            elif cursor is None:
+                self._cursors[key] = {'last_timestamp': fetch_start_ms, 'event_ids': []}
+
+            self._trim(key)
+            self._persist()
+
+        return events
+
+    def _trim(self, key: str):
+        """보관 구간과 최대 개수를 넘는 오래된 이벤트를 버립니다. (락 보유 상태에서 호출)"""
+        buffer = self._buffers[key]
+        horizon_start = int(time.time() * 1000) - self.BUFFER_HORIZON_MINUTES * 60 * 1000
+
+        while buffer and (buffer[0]['timestamp'] < horizon_start or len(buffer) > self.max_buffer_events):
+            dropped = buffer.popleft()
+            self._covered_from[key] = max(self._covered_from[key], dropped['timestamp'] + 1)
+
+        self._covered_from[key] = max(self._covered_from[key], horizon_start)
+
+    def window(
+        self,
+        region: str,
+        log_group_name: str,
+        filter_pattern: str,
+        start_ms: int,
+        end_ms: int,
+        max_events: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """버퍼에서 [start_ms, end_ms] 구간 이벤트를 오래된 순으로 반환합니다."""
+        with self._lock:
+            buffer = self._buffers.get(self._key(region, log_group_name, filter_pattern), ())
+            events = []
+            for event in buffer:
+                if event['timestamp'] < start_ms:
+                    continue
+                if event['timestamp'] > end_ms:
+                    break
+                events.append(event)
+                if max_events is not None and len(events) >= max_events:
+                    break
+            return events
+
+    def stats(self) -> Dict[str, Any]:
+        """키별 커서와 버퍼 크기 (모니터링용)"""
+        with self._lock:
+            return {
+                key: {
+                    "last_timestamp": cursor['last_timestamp'],
+                    "buffered_events": len(self._buffers.get(key, ())),
+                    "covered_from": self._covered_from.get(key),
+                    "covered_until": self._covered_until.get(key)
+                }
+                for key, cursor in self._cursors.items()
+            }
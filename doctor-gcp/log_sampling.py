@@ -0,0 +1,161 @@
+"""
+Log Sampling - 조회 이벤트 스트리밍 샘플링
+"처음 N개"만 가져오면 윈도우 앞쪽(오래된) 에러에 편향되므로, 페이지네이션 결과를 한 번 훑으며
+O(k) 메모리로 대표 표본을 뽑고 버려진 이벤트 수를 정확히 집계합니다.
+"""
+
+import random
+import re
+from typing import List, Dict, Any, Optional, Callable
+
+SAMPLING_STRATEGIES = ("reservoir", "stream", "severity")
+
+# 심각도 판별 (위에서부터 먼저 매칭되는 등급)
+SEVERITY_PATTERNS = [
+    ("CRITICAL", re.compile(r"\b(CRITICAL|FATAL|PANIC|EMERG(ENCY)?)\b", re.IGNORECASE)),
+    ("ERROR", re.compile(r"\b(ERROR|EXCEPTION|ERR)\b", re.IGNORECASE)),
+    ("WARNING", re.compile(r"\b(WARN(ING)?)\b", re.IGNORECASE)),
+]
+
+# 층이 너무 많으면 (스트림 수천 개 등) 나머지는 하나의 층으로 묶음
+OTHER_STRATUM = "__other__"
+
+
+def detect_severity(message: str) -> str:
+    """메시지의 심각도 등급 (CRITICAL, ERROR, WARNING, OTHER)"""
+    for severity, pattern in SEVERITY_PATTERNS:
+        if pattern.search(message):
+            return severity
+    return "OTHER"
+
+
+class ReservoirSampler:
+    """
+    균등 확률 reservoir 샘플러 (Algorithm R)
+
+    n개를 본 시점에 각 이벤트가 표본에 있을 확률은 항상 k/n입니다.
+    """
+
+    def __init__(self, k: int, rng: Optional[random.Random] = None):
+        self.k = k
+        self.rng = rng or random.Random()
+        self.items: List[Any] = []
+        self.seen = 0
+
+    def offer(self, item: Any):
+        self.seen += 1
+        if len(self.items) < self.k:
+            self.items.append(item)
+            return
+
+        slot = self.rng.randrange(self.seen)
+        if slot < self.k:
+            self.items[slot] = item
+
+    def shrink(self, k: int):
+        """표본 크기를 k로 줄입니다. (균등 표본에서 무작위로 덜어내도 균등 표본이 유지됨)"""
+        if k >= self.k:
+            return
+        self.k = k
+        if len(self.items) > k:
+            self.items = self.rng.sample(self.items, k)
+
+
+class LogSampler:
+    """
+    원본 이벤트 스트림 샘플러
+
+    전략:
+    - reservoir: 윈도우 전체에서 균등 무작위 k개
+    - stream: 로그 스트림별 층화 (스트림마다 같은 몫, 조용한 스트림도 대표됨)
+    - severity: 심각도별 층화 (CRITICAL이 대량 WARNING에 묻히지 않음)
+
+    층화 전략은 층이 새로 나타날 때마다 층별 몫(k // 층 수)을 줄이고 기존 표본을 무작위로 덜어내므로
+    전체 메모리는 항상 O(k)입니다. 층별 본 개수/남긴 개수를 정확히 집계합니다.
+    몫보다 적은 층은 전부 남기므로 전체 표본은 k보다 작을 수 있습니다.
+    """
+
+    def __init__(self, strategy: str, k: int, seed: Optional[int] = None):
+        """
+        Args:
+            strategy: "reservoir", "stream", "severity"
+            k: 최대 표본 크기
+            seed: 난수 시드 (재현용, None이면 무작위)
+        """
+        if strategy not in SAMPLING_STRATEGIES:
+            raise ValueError(f"strategy must be one of {SAMPLING_STRATEGIES}, got '{strategy}'")
+
+        self.strategy = strategy
+        self.k = k
+        self.rng = random.Random(seed)
+        self._stratum_of: Callable[[Dict[str, Any]], str] = {
+            "reservoir": lambda event: "all",
+            "stream": lambda event: event.get('logStreamName') or 'unknown',
+            "severity": lambda event: detect_severity(event['message'])
+        }[strategy]
+        self._reservoirs: Dict[str, ReservoirSampler] = {}
+
+    def _quota(self, strata_count: int) -> int:
+        return max(1, self.k // max(1, strata_count))
+
+    def offer(self, event: Dict[str, Any]):
+        stratum = self._stratum_of(event)
+        reservoir = self._reservoirs.get(stratum)
+
+        if reservoir is None:
+            # 층별 몫이 1 미만이 되지 않도록 한 자리를 남겨 두고 나머지 새 층은 OTHER_STRATUM으로
+            if len(self._reservoirs) >= max(1, self.k - 1):
+                stratum = OTHER_STRATUM
+                reservoir = self._reservoirs.get(stratum)
+
+        if reservoir is None:
+            quota = self._quota(len(self._reservoirs) + 1)
+            for existing in self._reservoirs.values():
+                existing.shrink(quota)
+            reservoir = self._reservoirs[stratum] = ReservoirSampler(quota, self.rng)
+
+        reservoir.offer(event)
+
+    def sample(self) -> List[Dict[str, Any]]:
+        """표본을 타임스탬프 순으로 반환합니다."""
+        events = [event for reservoir in self._reservoirs.values() for event in reservoir.items]
+        events.sort(key=lambda event: event['timestamp'])
+        return events
+
+    def summary(self) -> Dict[str, Any]:
+        """본/남긴/버린 이벤트 수 (전체 및 층별)"""
+        seen = sum(reservoir.seen for reservoir in self._reservoirs.values())
+        kept = sum(len(reservoir.items) for reservoir in self._reservoirs.values())
+        return {
+            "strategy": self.strategy,
+            "seen": seen,
+            "kept": kept,
+            "dropped": seen - kept,
+            "strata": {
+                stratum: {"seen": reservoir.seen, "kept": len(reservoir.items)}
+                for stratum, reservoir in sorted(self._reservoirs.items(), key=lambda item: -item[1].seen)
+            }
+        }
+
+
+def merge_sampling_summaries(summaries: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """여러 대상의 샘플링 요약을 합칩니다. (다중 대상 조회용)"""
+    summaries = [summary for summary in summaries if summary]
+    if not summaries:
+        return None
+
+    strata: Dict[str, Dict[str, int]] = {}
+    for summary in summaries:
+        for stratum, counts in summary["strata"].items():
+            merged = strata.setdefault(stratum, {"seen": 0, "kept": 0})
+            merged["seen"] += counts["seen"]
+            merged["kept"] += counts["kept"]
+
+    return {
+        "strategy": summaries[0]["strategy"],
+        "seen": sum(summary["seen"] for summary in summaries),
+        "kept": sum(summary["kept"] for summary in summaries),
+        "dropped": sum(summary["dropped"] for summary in summaries),
+        "scan_truncated": any(summary.get("scan_truncated") for summary in summaries),
+        "strata": strata
+    }
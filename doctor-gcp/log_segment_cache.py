@@ -0,0 +1,249 @@
+"""
+Log Segment Cache - CloudWatch 이벤트 로컬 디스크 캐시
+조회한 이벤트를 시간 단위 append-only 세그먼트 파일에 저장하고,
+(region, log_group, filter_pattern, 분 버킷) → 세그먼트 오프셋 인덱스로 겹치는 구간을 디스크에서 바로 제공합니다.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import List, Dict, Any, Optional, Iterator, Callable
+
+logger = logging.getLogger(__name__)
+
+BUCKET_MS = 60 * 1000            # 인덱스 단위: 1분
+SEGMENT_MS = 60 * 60 * 1000      # 세그먼트 파일 단위: 1시간
+
+
+class LogSegmentCache:
+    """
+    분 단위 버킷 인덱스를 가진 append-only 세그먼트 캐시
+
+    특징:
+    - 완전히 조회된(=수집 지연 구간을 지난) 분 버킷만 캐시하여 부분 결과가 섞이지 않음
+    - 빈 버킷도 인덱스에 기록하여 에러가 없던 구간도 다시 조회하지 않음
+    - 캐시에 없는 구간(gap)만 AWS에서 조회
+    - fetch 함수를 주입받으므로 녹화된 응답으로 오프라인 테스트 가능
+    """
+
+    # 이 시간보다 최근 버킷은 늦게 수집되는 이벤트가 있을 수 있어 캐시하지 않음
+    SETTLE_MS = 2 * 60 * 1000
+
+    def __init__(self, cache_dir: str, retention_hours: int = 3):
+        """
+        Args:
+            cache_dir: 세그먼트/인덱스 파일을 저장할 디렉터리
+            retention_hours: 세그먼트 보관 시간 (초과분은 쓰기 시 정리)
+        """
+        self.cache_dir = cache_dir
+        self.retention_ms = retention_hours * 60 * 60 * 1000
+        self._lock = threading.Lock()
+        self._indexes: Dict[str, Dict[str, List]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _key_dir(self, region: str, log_group_name: str, filter_pattern: str) -> str:
+        digest = hashlib.sha1(f"{region}|{log_group_name}|{filter_pattern}".encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.cache_dir, digest)
+
+    def _load_index(self, key_dir: str) -> Dict[str, List]:
+        """{"<버킷 시작 ms>": [세그먼트 파일명, 오프셋, 길이, 이벤트 수]} (락 보유 상태에서 호출)"""
+        if key_dir in self._indexes:
+            return self._indexes[key_dir]
+
+        index = {}
+        index_path = os.path.join(key_dir, "index.json")
+        if os.path.exists(index_path):
+            try:
+                with open(index_path, "r", encoding="utf-8") as f:
+                    index = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"⚠️ Corrupt segment index, ignoring: {str(e)}")
+
+        self._indexes[key_dir] = index
+        return index
+
+    def _save_index(self, key_dir: str, index: Dict[str, List]):
+        tmp_path = os.path.join(key_dir, "index.json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, os.path.join(key_dir, "index.json"))
+
+    def _read_bucket(self, key_dir: str, entry: List) -> List[Dict[str, Any]]:
+        segment_name, offset, length, count = entry
+        if count == 0:
+            return []
+        with open(os.path.join(key_dir, segment_name), "rb") as f:
+            f.seek(offset)
+            data = f.read(length)
+        return [json.loads(line) for line in data.splitlines() if line]
+
+    def _write_buckets(
+        self,
+        key_dir: str,
+        index: Dict[str, List],
+        events: List[Dict[str, Any]],
+        buckets: List[int]
+    ):
+        """완전히 조회된 버킷들을 세그먼트에 append 하고 인덱스에 기록합니다. (락 보유 상태에서 호출)"""
+        os.makedirs(key_dir, exist_ok=True)
+
+        by_bucket: Dict[int, List[Dict[str, Any]]] = {bucket: [] for bucket in buckets}
+        for event in events:
+            bucket = event['timestamp'] - event['timestamp'] % BUCKET_MS
+            if bucket in by_bucket:
+                by_bucket[bucket].append(event)
+
+        for bucket in buckets:
+            if str(bucket) in index:
+                continue
+
+            segment_name = f"{bucket - bucket % SEGMENT_MS}.jsonl"
+            lines = b"".join(
+                json.dumps({
+                    'timestamp': event['timestamp'],
+                    'message': event['message'],
+                    'logStreamName': event.get('logStreamName'),
+                    'eventId': event.get('eventId')
+                }, ensure_ascii=False).encode("utf-8") + b"\n"
+                for event in by_bucket[bucket]
+            )
+
+            with open(os.path.join(key_dir, segment_name), "ab") as f:
+                offset = f.tell()
+                f.write(lines)
+
+            index[str(bucket)] = [segment_name, offset, len(lines), len(by_bucket[bucket])]
+
+        self._prune(key_dir, index)
+        self._save_index(key_dir, index)
+
+    def _prune(self, key_dir: str, index: Dict[str, List]):
+        """보관 기간이 지난 세그먼트 파일과 인덱스 항목을 삭제합니다. (락 보유 상태에서 호출)"""
+        cutoff = int(time.time() * 1000) - self.retention_ms
+        expired = [bucket for bucket in index if int(bucket) + BUCKET_MS < cutoff]
+        if not expired:
+            return
+
+        expired_segments = {index[bucket][0] for bucket in expired}
+        for bucket in expired:
+            del index[bucket]
+
+        live_segments = {entry[0] for entry in index.values()}
+        for segment_name in expired_segments - live_segments:
+            try:
+                os.remove(os.path.join(key_dir, segment_name))
+            except OSError:
+                pass
+
+    def iter_events(
+        self,
+        fetch_range: Callable[[int, int, Optional[int]], List[Dict[str, Any]]],
+        region: str,
+        log_group_name: str,
+        filter_pattern: str,
+        start_ms: int,
+        end_ms: int,
+        max_events: Optional[int] = None,
+        cancel_event: Optional[threading.Event] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        [start_ms, end_ms] 구간 이벤트를 타임스탬프 순으로 yield 합니다.
+
+        캐시된 버킷은 디스크에서 읽고, 연속된 미캐시 구간(gap)만 fetch_range로 조회한 뒤
+        완전히 조회된 버킷을 세그먼트에 기록합니다.
+
+        Args:
+            fetch_range: (start_ms, end_ms, max_events) -> 타임스탬프 순 원본 이벤트 리스트
+            region: AWS 리전 (같은 이름의 로그 그룹이라도 리전별로 따로 캐시)
+            log_group_name: CloudWatch Log Group 이름
+            filter_pattern: CloudWatch Logs 필터 패턴
+            start_ms: 검색 시작 시각 (epoch 밀리초)
+            end_ms: 검색 종료 시각 (epoch 밀리초)
+            max_events: 최대 이벤트 수 (None이면 제한 없음)
+            cancel_event: set 되면 더 이상 조회/기록하지 않음
+
+        Yields:
+            filter_log_events 형식의 원본 이벤트 딕셔너리
+        """
+        key_dir = self._key_dir(region, log_group_name, filter_pattern)
+        settled_before = int(time.time() * 1000) - self.SETTLE_MS
+
+        with self._lock:
+            index = dict(self._load_index(key_dir))
+
+        first_bucket = start_ms - start_ms % BUCKET_MS
+        buckets = list(range(first_bucket, end_ms + 1, BUCKET_MS))
+
+        # 버킷을 (캐시 여부, 연속 구간) 단위로 묶음
+        runs = []
+        for bucket in buckets:
+            cached = str(bucket) in index
+            if runs and runs[-1][0] == cached:
+                runs[-1][1].append(bucket)
+            else:
+                runs.append((cached, [bucket]))
+
+        emitted = 0
+        for cached, run in runs:
+            if cancel_event is not None and cancel_event.is_set():
+                return
+
+            if cached:
+                # 필요한 만큼만 버킷을 하나씩 읽음
+                for bucket in run:
+                    with self._lock:
+                        self.hits += 1
+                    events = self._read_bucket(key_dir, index[str(bucket)])
+                    events.sort(key=lambda event: event['timestamp'])
+                    for event in events:
+                        if event['timestamp'] < start_ms or event['timestamp'] > end_ms:
+                            continue
+                        yield event
+                        emitted += 1
+                        if max_events is not None and emitted >= max_events:
+                            return
+                continue
+
+            with self._lock:
+                self.misses += len(run)
+            fetch_start = max(run[0], start_ms)
+            fetch_end = min(run[-1] + BUCKET_MS - 1, end_ms)
+            remaining = None if max_events is None else max_events - emitted
+            events = fetch_range(fetch_start, fetch_end, remaining)
+
+            # 버킷 전체가 조회 구간 안에 있고 수집 지연 구간을 지난 경우만 캐시
+            complete = [
+                bucket for bucket in run
+                if bucket >= fetch_start and bucket + BUCKET_MS - 1 <= fetch_end
+                and bucket + BUCKET_MS <= settled_before
+            ]
+            if remaining is not None and len(events) >= remaining and events:
+                # 이벤트 수 제한으로 잘렸으면 마지막 이벤트 버킷 이전까지만 완전함
+                last_bucket = events[-1]['timestamp'] - events[-1]['timestamp'] % BUCKET_MS
+                complete = [bucket for bucket in complete if bucket < last_bucket]
+
+            if complete and not (cancel_event is not None and cancel_event.is_set()):
+                with self._lock:
+                    shared_index = self._load_index(key_dir)
+                    try:
+                        self._write_buckets(key_dir, shared_index, events, complete)
+                    except OSError as e:
+                        logger.warning(f"⚠️ Failed to write log segment cache: {str(e)}")
+
+            for event in events:
+                if event['timestamp'] < start_ms or event['timestamp'] > end_ms:
+                    continue
+                yield event
+                emitted += 1
+                if max_events is not None and emitted >= max_events:
+                    return
+
+    def stats(self) -> Dict[str, int]:
+        """버킷 단위 캐시 적중/미적중 횟수"""
+        with self._lock:
+            return {"bucket_hits": self.hits, "bucket_misses": self.misses}
+
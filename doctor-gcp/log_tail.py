@@ -0,0 +1,217 @@
+"""
+Log Tail Buffer - 실시간 수집 이벤트의 메모리 링 버퍼
+백그라운드 수집기(Live Tail 세션 또는 짧은 주기 폴링)가 채운 최근 이벤트를 분 단위로 색인하여,
+버퍼 구간 안의 분석 요청은 CloudWatch 왕복 없이 메모리에서 바로 응답합니다.
+"""
+
+import bisect
+import logging
+import threading
+import time
+from typing import List, Dict, Any, Optional, Tuple
+
+from log_cursor import LogCursorStore
+
+logger = logging.getLogger(__name__)
+
+BUCKET_MS = 60 * 1000            # 시간 색인 단위: 1분
+EVENT_OVERHEAD_BYTES = 96        # 이벤트당 튜플/문자열 객체 오버헤드 추정치
+
+
+class RecentEventsBuffer:
+    """
+    (region, log_group, filter_pattern)별 최근 이벤트를 보관하는 바이트 상한 링 버퍼
+
+    특징:
+    - 분 버킷 단위 시간 색인 (구간 조회 시 필요한 버킷만 순회)
+    - 메시지 바이트 + 객체 오버헤드 합계가 max_bytes를 넘으면 가장 오래된 버킷부터 제거
+    - 키별로 "빠짐없이 수집된 구간" [covered_from, covered_until]을 이벤트 시각 기준으로 추적하여
+      그 구간 안의 요청만 버퍼에서 응답 (샘플링/재연결/제거로 생긴 구멍은 커버리지에서 제외)
+    - 수신 시각 T까지 받았어도 CloudWatch 수집 지연 때문에 이벤트 시각 T - INGESTION_LAG_MS 이후는
+      늦게 도착할 수 있으므로 그 이전까지만 커버리지로 인정
+    - 스레드 안전 (수집 스레드와 요청 처리 스레드가 동시에 접근)
+    """
+
+    # 이벤트 시각 기준 커버리지에서 빼 두는 수집 지연 여유 (증분 조회의 겹침 구간과 동일)
+    INGESTION_LAG_MS = LogCursorStore.INGESTION_LAG_MS
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        horizon_minutes: int = 120,
+        max_staleness_seconds: float = 30
+    ):
+        """
+        Args:
+            max_bytes: 버퍼 전체 메모리 상한 (바이트)
+            horizon_minutes: 이보다 오래된 이벤트는 버림
+            max_staleness_seconds: 커버리지 끝이 요청 종료 시각의 수집 지연 경계보다 이만큼 이상 뒤처지면 버퍼를 사용하지 않음
+        """
+        self.max_bytes = max_bytes
+        self.horizon_ms = horizon_minutes * 60 * 1000
+        self.max_staleness_ms = int(max_staleness_seconds * 1000)
+        self._lock = threading.Lock()
+        self._buckets: Dict[Tuple[str, str, str], Dict[int, List[Tuple]]] = {}
+        self._bucket_keys: Dict[Tuple[str, str, str], List[int]] = {}
+        self._bucket_ids: Dict[Tuple[str, str, str], Dict[int, set]] = {}
+        self._covered_from: Dict[Tuple[str, str, str], int] = {}
+        self._covered_until: Dict[Tuple[str, str, str], int] = {}
+        self._evicted_until: Dict[Tuple[str, str, str], int] = {}
+        self.total_bytes = 0
+        self.total_events = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _event_bytes(message: str) -> int:
+        return len(message.encode('utf-8')) + EVENT_OVERHEAD_BYTES
+
+    def add(self, key: Tuple[str, str, str], events: List[Dict[str, Any]]):
+        """
+        원본 이벤트 (timestamp, message, logStreamName, eventId)를 버퍼에 추가합니다.
+        폴링 구간이 겹쳐 같은 eventId가 다시 들어오면 무시합니다.
+        """
+        if not events:
+            return
+
+        with self._lock:
+            buckets = self._buckets.setdefault(key, {})
+            bucket_keys = self._bucket_keys.setdefault(key, [])
+            bucket_ids = self._bucket_ids.setdefault(key, {})
+
+            for event in events:
+                timestamp = event['timestamp']
+                bucket = timestamp - timestamp % BUCKET_MS
+                rows = buckets.get(bucket)
+                if rows is None:
+                    rows = buckets[bucket] = []
+                    bucket_ids[bucket] = set()
+                    bisect.insort(bucket_keys, bucket)
+
+                event_id = event.get('eventId')
+                if event_id is not None:
+                    if event_id in bucket_ids[bucket]:
+                        continue
+                    bucket_ids[bucket].add(event_id)
+
+                row = (timestamp, event['message'], event.get('logStreamName'), event_id)
+                # 수집 지연으로 늦게 도착한 이벤트도 버킷 안 정렬 순서를 유지
+                if rows and timestamp < rows[-1][0]:
+                    bisect.insort(rows, row, key=lambda r: r[0])
+                else:
+                    rows.append(row)
+
+                self.total_bytes += self._event_bytes(row[1])
+                self.total_events += 1
+
+            self._evict()
+
+    def _evict(self):
+        """보관 구간/바이트 상한을 넘는 가장 오래된 버킷을 제거합니다. (락 보유 상태에서 호출)"""
+        horizon_start = int(time.time() * 1000) - self.horizon_ms
+
+        while True:
+            oldest_key = None
+            for key, bucket_keys in self._bucket_keys.items():
+                if bucket_keys and (oldest_key is None or bucket_keys[0] < self._bucket_keys[oldest_key][0]):
+                    oldest_key = key
+            if oldest_key is None:
+                return
+
+            oldest_bucket = self._bucket_keys[oldest_key][0]
+            if self.total_bytes <= self.max_bytes and oldest_bucket + BUCKET_MS > horizon_start:
+                return
+
+            self._bucket_keys[oldest_key].pop(0)
+            rows = self._buckets[oldest_key].pop(oldest_bucket)
+            del self._bucket_ids[oldest_key][oldest_bucket]
+            self.total_bytes -= sum(self._event_bytes(row[1]) for row in rows)
+            self.total_events -= len(rows)
+            # 제거된 버킷 이전 구간은 더 이상 완전하지 않음
+            self._evicted_until[oldest_key] = oldest_bucket + BUCKET_MS
+            if oldest_key in self._covered_from:
+                self._covered_from[oldest_key] = max(self._covered_from[oldest_key], oldest_bucket + BUCKET_MS)
+
+    def mark_covered(self, key: Tuple[str, str, str], from_ms: int, until_ms: int):
+        """
+        이벤트 시각 from_ms 이후, 수신 시각 until_ms까지 도착한 이벤트를 모두 받았음을 기록합니다.
+
+        이벤트 시각 기준으로는 until_ms - INGESTION_LAG_MS까지만 완전한 것으로 봅니다.
+        이전 커버리지와 이어지면 (from_ms <= covered_until) 커버리지를 연장하고,
+        재연결 등으로 끊긴 구간이 있으면 from_ms부터 새로 시작합니다.
+        """
+        settled_until = until_ms - self.INGESTION_LAG_MS
+        with self._lock:
+            covered_until = self._covered_until.get(key)
+            if covered_until is None or from_ms > covered_until:
+                self._covered_from[key] = from_ms
+            # 방금 추가하면서 제거된 구간은 커버리지에 포함하지 않음
+            self._covered_from[key] = max(self._covered_from[key], self._evicted_until.get(key, 0))
+            self._covered_until[key] = settled_until if covered_until is None else max(settled_until, covered_until)
+
+    def reset_coverage(self, key: Tuple[str, str, str], from_ms: int):
+        """from_ms 이전 구간을 불완전한 것으로 표시합니다. (Live Tail 샘플링 발생 시)"""
+        with self._lock:
+            self._covered_from[key] = max(from_ms, self._covered_from.get(key, from_ms))
+            self._covered_until[key] = max(from_ms - self.INGESTION_LAG_MS, self._covered_until.get(key, from_ms))
+
+    def window(
+        self,
+        key: Tuple[str, str, str],
+        start_ms: int,
+        end_ms: int,
+        max_events: Optional[int] = None
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        [start_ms, end_ms] 구간이 버퍼 커버리지 안이면 오래된 순 원본 이벤트를, 아니면 None을 반환합니다.
+        마지막 INGESTION_LAG_MS 구간은 CloudWatch에서도 아직 수집 중일 수 있으므로 커버리지를 요구하지 않습니다.
+        """
+        with self._lock:
+            covered_from = self._covered_from.get(key)
+            covered_until = self._covered_until.get(key)
+            if (
+                covered_from is None or covered_until is None or covered_from > start_ms
+                or covered_until < end_ms - self.INGESTION_LAG_MS - self.max_staleness_ms
+            ):
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            buckets = self._buckets.get(key, {})
+            bucket_keys = self._bucket_keys.get(key, [])
+
+            events = []
+            first = bisect.bisect_left(bucket_keys, start_ms - start_ms % BUCKET_MS)
+            for bucket in bucket_keys[first:]:
+                if bucket > end_ms:
+                    break
+                for timestamp, message, log_stream, event_id in buckets[bucket]:
+                    if timestamp < start_ms or timestamp > end_ms:
+                        continue
+                    events.append({
+                        'timestamp': timestamp,
+                        'message': message,
+                        'logStreamName': log_stream,
+                        'eventId': event_id
+                    })
+                    if max_events is not None and len(events) >= max_events:
+                        return events
+            return events
+
+    def stats(self) -> Dict[str, Any]:
+        """버퍼 크기, 적중률, 키별 커버리지 (모니터링용)"""
+        with self._lock:
+            return {
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "events": self.total_events,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coverage": {
+                    "|".join(key): {
+                        "covered_from": self._covered_from.get(key),
+                        "covered_until": self._covered_until.get(key)
+                    }
+                    for key in self._covered_until
+                }
+            }
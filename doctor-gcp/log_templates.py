@@ -0,0 +1,209 @@
+"""
+Log Templates - Drain 방식 스트리밍 로그 템플릿 마이닝
+IP, 숫자, ID만 다른 같은 모양의 메시지 수천 개를 (템플릿, 건수, 처음/마지막 발생 시각, 예시 파라미터)로
+묶어 분석 프롬프트가 로그 양과 무관하게 수십 줄로 유지되도록 합니다.
+"""
+
+import re
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+
+WILDCARD = "<*>"
+
+# 토큰화 전에 값이 바뀌는 부분을 가리는 규칙 (앞쪽 규칙이 우선)
+MASKING_RULES = [
+    ("TIME", r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:Z|[+-]\d{2}:?\d{2})?"),
+    ("UUID", r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b"),
+    ("IP", r"\b\d{1,3}(?:\.\d{1,3}){3}(?::\d{1,5})?\b"),
+    ("HEX", r"\b0x[0-9a-fA-F]+\b|\b[0-9a-fA-F]{16,}\b"),
+    ("NUM", r"(?<![A-Za-z])[-+]?\d+(?:\.\d+)?(?:ms|s|MB|KB|GB|%)?(?![A-Za-z])"),
+]
+# 모든 규칙을 하나의 정규식으로 합쳐 메시지를 한 번만 훑음 (파라미터도 등장 순서대로 수집)
+_MASKING_PATTERN = re.compile("|".join(f"(?P<{name}>{pattern})" for name, pattern in MASKING_RULES))
+PLACEHOLDERS = {WILDCARD} | {f"<{name}>" for name, _ in MASKING_RULES}
+
+
+def mask_message(message: str) -> Tuple[str, List[str]]:
+    """가변 값을 <IP>, <NUM> 등으로 바꾼 메시지와 가려진 원래 값 목록 (등장 순서)"""
+    params: List[str] = []
+
+    def replace(match):
+        params.append(match.group(0))
+        return f"<{match.lastgroup}>"
+
+    return _MASKING_PATTERN.sub(replace, message), params
+
+
+class LogCluster:
+    """하나의 로그 템플릿과 그 발생 통계"""
+
+    __slots__ = ("tokens", "count", "first_seen", "last_seen", "example", "example_params")
+
+    MAX_EXAMPLE_PARAMS = 3
+
+    def __init__(self, tokens: List[str], message: str, timestamp_ms: Optional[int]):
+        self.tokens = tokens
+        self.count = 0
+        self.first_seen = timestamp_ms
+        self.last_seen = timestamp_ms
+        self.example = message
+        self.example_params: List[List[str]] = []
+
+    @property
+    def template(self) -> str:
+        return " ".join(self.tokens)
+
+    def add(self, timestamp_ms: Optional[int], params: List[str], count: int = 1):
+        self.count += count
+        if timestamp_ms is not None:
+            self.first_seen = timestamp_ms if self.first_seen is None else min(self.first_seen, timestamp_ms)
+            self.last_seen = timestamp_ms if self.last_seen is None else max(self.last_seen, timestamp_ms)
+        if params and len(self.example_params) < self.MAX_EXAMPLE_PARAMS and params not in self.example_params:
+            self.example_params.append(params)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "template": self.template,
+            "count": self.count,
+            "first_seen": _format_ms(self.first_seen),
+            "last_seen": _format_ms(self.last_seen),
+            "example": self.example,
+            "example_params": self.example_params
+        }
+
+
+def _format_ms(timestamp_ms: Optional[int]) -> Optional[str]:
+    if timestamp_ms is None:
+        return None
+    return datetime.fromtimestamp(timestamp_ms / 1000).isoformat()
+
+
+class TemplateMiner:
+    """
+    Drain 알고리즘 기반 스트리밍 템플릿 마이너
+
+    특징:
+    - 고정 깊이 파스 트리: 토큰 수 → 앞쪽 (depth - 2)개 토큰 → 리프의 클러스터 목록
+    - 숫자가 들어간 토큰이나 자식 수 상한(max_children)을 넘는 토큰은 <*> 가지로 보냄
+    - 리프에서 유사도(같은 위치의 같은 토큰 비율)가 가장 높은 클러스터가 임계값 이상이면 합치고
+      다른 위치는 <*>로 일반화, 아니면 새 클러스터 생성
+    - 이벤트당 O(depth + 리프 클러스터 수), 메모리는 템플릿 수에 비례
+    """
+
+    def __init__(self, depth: int = 4, similarity_threshold: float = 0.4, max_children: int = 100):
+        """
+        Args:
+            depth: 파스 트리 깊이 (최소 3)
+            similarity_threshold: 기존 클러스터에 합칠 최소 유사도 (0~1)
+            max_children: 노드별 최대 자식 수
+        """
+        self.depth = max(3, depth)
+        self.similarity_threshold = similarity_threshold
+        self.max_children = max_children
+        self._root: Dict[Any, Any] = {}
+        self.clusters: List[LogCluster] = []
+        self.total = 0
+
+    def add(self, message: str, timestamp_ms: Optional[int] = None, count: int = 1) -> LogCluster:
+        """메시지 하나를 템플릿에 반영하고 해당 클러스터를 반환합니다."""
+        self.total += count
+        masked, params = mask_message(message.strip())
+        tokens = masked.split()
+
+        leaf = self._leaf(tokens)
+        cluster, similarity = self._best_match(leaf, tokens)
+
+        if cluster is None or similarity < self.similarity_threshold:
+            cluster = LogCluster(tokens, message.strip(), timestamp_ms)
+            leaf.append(cluster)
+            self.clusters.append(cluster)
+        else:
+            changed = [i for i, (old, new) in enumerate(zip(cluster.tokens, tokens)) if old != new and old != WILDCARD]
+            if changed:
+                cluster.tokens = [WILDCARD if i in changed else token for i, token in enumerate(cluster.tokens)]
+            params = params + [new for old, new in zip(cluster.tokens, tokens) if old == WILDCARD and new not in PLACEHOLDERS]
+
+        cluster.add(timestamp_ms, params, count)
+        return cluster
+
+    def _leaf(self, tokens: List[str]) -> List[LogCluster]:
+        node = self._root.setdefault(len(tokens), {})
+
+        for token in tokens[:self.depth - 2]:
+            if any(char.isdigit() for char in token):
+                token = WILDCARD
+            if token not in node:
+                if len(node) >= self.max_children:
+                    token = WILDCARD
+            node = node.setdefault(token, {})
+
+        return node.setdefault(None, [])
+
+    @staticmethod
+    def _best_match(leaf: List[LogCluster], tokens: List[str]) -> Tuple[Optional[LogCluster], float]:
+        best, best_similarity, best_wildcards = None, -1.0, 0
+        for cluster in leaf:
+            same = 0
+            wildcards = 0
+            for old, new in zip(cluster.tokens, tokens):
+                if old == WILDCARD:
+                    wildcards += 1
+                elif old == new:
+                    same += 1
+            similarity = same / len(tokens) if tokens else 1.0
+            if similarity > best_similarity or (similarity == best_similarity and wildcards > best_wildcards):
+                best, best_similarity, best_wildcards = cluster, similarity, wildcards
+        return best, best_similarity
+
+    def templates(self, limit: Optional[int] = None) -> List[LogCluster]:
+        """건수가 많은 순으로 클러스터 목록을 반환합니다."""
+        clusters = sorted(self.clusters, key=lambda cluster: -cluster.count)
+        return clusters[:limit] if limit is not None else clusters
+
+    def partition(self, size: int) -> List["TemplateMiner"]:
+        """
+        건수 순으로 size개씩 템플릿을 나눈 부분 마이너 목록 (청크 분석 프롬프트용, 읽기 전용)
+        """
+        clusters = self.templates()
+        return [self.subset(clusters[start:start + size]) for start in range(0, len(clusters), size)]
+
+    def subset(self, clusters: List[LogCluster]) -> "TemplateMiner":
+        """주어진 템플릿만 담은 부분 마이너 (증분 분석/청크 프롬프트용, 읽기 전용)"""
+        part = TemplateMiner(self.depth, self.similarity_threshold, self.max_children)
+        part.clusters = list(clusters)
+        part.total = sum(cluster.count for cluster in part.clusters)
+        return part
+
+
+def mine_templates(records: Iterable[Tuple[Optional[int], str]], **kwargs) -> TemplateMiner:
+    """(timestamp_ms, message) 스트림으로 템플릿 마이너를 만듭니다."""
+    miner = TemplateMiner(**kwargs)
+    for timestamp_ms, message in records:
+        miner.add(message, timestamp_ms)
+    return miner
+
+
+def format_template_line(cluster: LogCluster) -> str:
+    """템플릿 하나의 프롬프트 줄 ([x건수] 처음~마지막 템플릿 (예: 파라미터...))"""
+    seen = ""
+    if cluster.first_seen is not None:
+        seen = f"{_format_ms(cluster.first_seen)}~{_format_ms(cluster.last_seen)} "
+    example = ""
+    if cluster.example_params:
+        example = " (예: " + " | ".join(", ".join(params[:6]) for params in cluster.example_params) + ")"
+    return f"[x{cluster.count}] {seen}{cluster.template}{example}"
+
+
+def format_template_lines(miner: TemplateMiner, limit: int = 50) -> List[str]:
+    """
+    분석 프롬프트용 템플릿 요약 줄
+
+    "[x건수] 처음~마지막 템플릿 (예: 파라미터...)" 형식이며, 상위 limit개 밖의 템플릿은 한 줄로 합칩니다.
+    """
+    clusters = miner.templates()
+    lines = [format_template_line(cluster) for cluster in clusters[:limit]]
+
+    rest = clusters[limit:]
+    if rest:
+        lines.append(f"[x{sum(cluster.count for cluster in rest)}] 기타 {len(rest)}개 템플릿")
+    return lines
@@ -5,6 +5,7 @@ Uses GCP credits! Vertex AI for Gemini + Claude API for Terraform generation
 
 import os
 import logging
+import threading
 from datetime import datetime
 from typing import Dict, Any, Optional
 
@@ -14,6 +15,15 @@ import uvicorn
 
 # SlackNotifier만 상단에서 import (가벼운 모듈)
 from slack_notifier import SlackNotifier
+from log_cursor import LogCursorStore
+from log_segment_cache import LogSegmentCache
+from log_tail import RecentEventsBuffer
+from analysis_cache import create_analysis_cache
+from scenario_classifier import ScenarioClassifier
+from vertex_models import registry_stats
+from analysis_cascade import get_cascade_stats, parse_cascade_tiers
+from incident_state import IncidentStateStore
+from circuit_breaker import CircuitBreaker
 
 # 무거운 모듈들은 필요한 함수 안에서만 lazy import
 # - AWSClientDirect, LogAnalyzer, TerraformGenerator
@@ -41,6 +51,226 @@ SLACK_WEBHOOK_URL = os.getenv("SLACK_WEBHOOK_URL")
 AWS_ROLE_ARN = os.getenv("AWS_ROLE_ARN")  # e.g., arn:aws:iam::123456789012:role/CloudDoctorRole
 AWS_REGION = os.getenv("AWS_REGION", "ap-northeast-2")
 LOG_GROUP_NAME = os.getenv("LOG_GROUP_NAME", "/ecs/patient-zone")
+# 긴 구간(60~120분) 조회 시 병렬로 나눌 시간 샤드 수 (1이면 순차 조회)
+LOG_FETCH_SHARDS = int(os.getenv("LOG_FETCH_SHARDS", "4"))
+# CloudWatch 조회 타임아웃 (초) - 조회는 전용 스레드 풀에서 실행되어 이벤트 루프를 막지 않음
+LOG_FETCH_TIMEOUT_SECONDS = float(os.getenv("LOG_FETCH_TIMEOUT_SECONDS", "60"))
+# 로그 수집 방식: "events" (원본 이벤트) 또는 "insights" (Logs Insights 서버 측 집계)
+LOG_FETCH_MODE = os.getenv("LOG_FETCH_MODE", "events")
+# insights 모드 집계 기준: "pattern", "bin", "stream"
+LOG_INSIGHTS_GROUP_BY = os.getenv("LOG_INSIGHTS_GROUP_BY", "pattern")
+# 증분 조회: 로그 그룹별 high-water mark 이후 delta만 CloudWatch에서 가져옴
+LOG_INCREMENTAL_FETCH = os.getenv("LOG_INCREMENTAL_FETCH", "true").lower() == "true"
+LOG_CURSOR_STATE_PATH = os.getenv("LOG_CURSOR_STATE_PATH", "/tmp/cloud-doctor/log_cursors.json")
+
+# 로컬 디스크 세그먼트 캐시: 이미 조회한 분 버킷은 CloudWatch 대신 디스크에서 읽음
+# (기본 비활성, 사용하려면 디렉터리 지정 - 예: /tmp/cloud-doctor/segments)
+LOG_SEGMENT_CACHE_DIR = os.getenv("LOG_SEGMENT_CACHE_DIR", "")
+LOG_SEGMENT_CACHE_RETENTION_HOURS = int(os.getenv("LOG_SEGMENT_CACHE_RETENTION_HOURS", "3"))
+
+
+def parse_log_targets(value: str):
+    """"region:log_group,region:log_group" 형식의 LOG_TARGETS를 [(region, log_group), ...]로 변환"""
+    targets = []
+    for item in value.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        region, _, log_group = item.partition(":")
+        if not log_group:
+            logger.warning(f"Ignoring malformed LOG_TARGETS entry: {item}")
+            continue
+        targets.append((region.strip(), log_group.strip()))
+    return targets
+
+
+# 다중 대상 동시 조회 (비어 있으면 AWS_REGION + LOG_GROUP_NAME 단일 대상)
+LOG_TARGETS = parse_log_targets(os.getenv("LOG_TARGETS", ""))
+# 대상별 타임아웃 (초) - 느린 리전이 전체 분석을 지연시키지 않도록
+LOG_TARGET_TIMEOUT_SECONDS = float(os.getenv("LOG_TARGET_TIMEOUT_SECONDS", "30"))
+
+# 샘플링: "none" (윈도우 앞쪽 max_logs개), "reservoir", "stream" (스트림별 층화), "severity" (심각도별 층화)
+LOG_SAMPLING = os.getenv("LOG_SAMPLING", "none").lower()
+# 샘플링 시 훑을 최대 이벤트 수 - 증분 조회(커서 버퍼)와 함께 쓰면 버퍼 상한(50000)으로 제한되며,
+# 순차 스트리밍 조회가 아니면 훑는 이벤트가 그만큼 메모리에 올라감
+LOG_SAMPLING_SCAN_LIMIT = int(os.getenv("LOG_SAMPLING_SCAN_LIMIT", "100000"))
+
+# 실시간 수집: "off", "live" (StartLiveTail 세션), "poll" (짧은 주기 폴링)
+# 버퍼 구간 안의 분석은 CloudWatch 왕복 없이 메모리에서 응답
+LOG_LIVE_TAIL_MODE = os.getenv("LOG_LIVE_TAIL_MODE", "off").lower()
+LOG_LIVE_TAIL_MAX_MB = int(os.getenv("LOG_LIVE_TAIL_MAX_MB", "64"))
+LOG_LIVE_TAIL_POLL_SECONDS = float(os.getenv("LOG_LIVE_TAIL_POLL_SECONDS", "15"))
+LOG_LIVE_TAIL_BACKFILL_MINUTES = int(os.getenv("LOG_LIVE_TAIL_BACKFILL_MINUTES", "30"))
+
+# 분석 결과 캐시: 로그 템플릿 지문이 같으면 Gemini 호출 없이 저장된 분석 반환
+# 백엔드: "memory", "sqlite" (재시작 후에도 유지), "off"
+ANALYSIS_CACHE_BACKEND = os.getenv("ANALYSIS_CACHE_BACKEND", "memory").lower()
+ANALYSIS_CACHE_TTL_SECONDS = int(os.getenv("ANALYSIS_CACHE_TTL_SECONDS", "600"))
+ANALYSIS_CACHE_MAX_ENTRIES = int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "256"))
+ANALYSIS_CACHE_PATH = os.getenv("ANALYSIS_CACHE_PATH", "/tmp/cloud-doctor/analysis_cache.sqlite3")
+# 규칙 기반 분류 신뢰도가 높고 시나리오가 직전 Gemini 분석과 같으면 Gemini 호출 생략
+ANALYSIS_RULES_FAST_PATH = os.getenv("ANALYSIS_RULES_FAST_PATH", "true").lower() == "true"
+# Gemini 응답 마감 시간 (초) - 넘기면 규칙 기반 대체 분석 반환
+ANALYSIS_DEADLINE_SECONDS = float(os.getenv("ANALYSIS_DEADLINE_SECONDS", "45"))
+# 첫 요청이 최근 p95 지연을 넘기면 헤지 요청을 하나 더 보내 먼저 끝난 쪽 사용 (p99 지연 단축)
+ANALYSIS_HEDGE = os.getenv("ANALYSIS_HEDGE", "true").lower() == "true"
+# 한 프롬프트를 넘는 로그는 청크로 나눠 동시에 분석 후 병합: "template", "stream", "off"
+ANALYSIS_CHUNK_BY = os.getenv("ANALYSIS_CHUNK_BY", "template").lower()
+ANALYSIS_CHUNK_CONCURRENCY = int(os.getenv("ANALYSIS_CHUNK_CONCURRENCY", "4"))
+# 청크 결과를 결정적으로 병합한 뒤 Gemini로 한 번 더 통합
+ANALYSIS_LLM_REDUCE = os.getenv("ANALYSIS_LLM_REDUCE", "false").lower() == "true"
+# 프롬프트 로그 구간 토큰 예산 (추정치): 심각도/새로움/희소성 순으로 채우고, 긴 줄은 앞/뒤만 남김
+ANALYSIS_PROMPT_TOKEN_BUDGET = int(os.getenv("ANALYSIS_PROMPT_TOKEN_BUDGET", "6000"))
+ANALYSIS_MAX_LINE_TOKENS = int(os.getenv("ANALYSIS_MAX_LINE_TOKENS", "256"))
+# 계층 분석: 작은 모델부터 "model[:max_output_tokens]" 쉼표 구분, 마지막은 항상 gemini-2.0-flash-exp ("off"면 바로 큰 모델)
+# 하위 계층 결과의 confidence가 ANALYSIS_CASCADE_CONFIDENCE보다 낮거나, 출력 검증에 실패했거나,
+# 직전 분석/규칙 기반 분류에 없던 시나리오가 나오면 다음 계층으로 승격
+ANALYSIS_CASCADE = parse_cascade_tiers(os.getenv("ANALYSIS_CASCADE", "gemini-2.0-flash-lite-001:1024"))
+ANALYSIS_CASCADE_CONFIDENCE = float(os.getenv("ANALYSIS_CASCADE_CONFIDENCE", "0.7"))
+# 진행 중인 장애 상태: 반복 분석 시 새로 나타났거나 건수가 바뀐 템플릿과 이전 결론 요약만 Gemini에 전송
+# 감지된 시나리오가 없는 분석이 나오거나 ANALYSIS_INCIDENT_IDLE_CLOSE_SECONDS 동안 분석이 없으면 장애 종료
+ANALYSIS_INCIDENT_STATE = os.getenv("ANALYSIS_INCIDENT_STATE", "true").lower() == "true"
+ANALYSIS_INCIDENT_IDLE_CLOSE_SECONDS = int(os.getenv("ANALYSIS_INCIDENT_IDLE_CLOSE_SECONDS", "1800"))
+ANALYSIS_INCIDENT_STATE_PATH = os.getenv("ANALYSIS_INCIDENT_STATE_PATH", "/tmp/cloud-doctor/incidents.json")
+# Gemini 단계 차단기: 최근 호출의 오류율 또는 p95 지연이 임계값을 넘으면 일정 시간 Vertex AI 호출 없이
+# 규칙 기반 분석(degraded)으로 바로 응답하고, 이후 시험 호출로 복구 확인
+ANALYSIS_BREAKER = os.getenv("ANALYSIS_BREAKER", "true").lower() == "true"
+ANALYSIS_BREAKER_WINDOW = int(os.getenv("ANALYSIS_BREAKER_WINDOW", "20"))
+ANALYSIS_BREAKER_MIN_CALLS = int(os.getenv("ANALYSIS_BREAKER_MIN_CALLS", "5"))
+ANALYSIS_BREAKER_ERROR_RATE = float(os.getenv("ANALYSIS_BREAKER_ERROR_RATE", "0.5"))
+ANALYSIS_BREAKER_P95_SECONDS = float(os.getenv("ANALYSIS_BREAKER_P95_SECONDS", "20"))
+ANALYSIS_BREAKER_OPEN_SECONDS = float(os.getenv("ANALYSIS_BREAKER_OPEN_SECONDS", "30"))
+
+# 프로세스 전역 커서 저장소 / 세그먼트 캐시 (요청 간 공유)
+log_cursor_store = LogCursorStore(state_path=LOG_CURSOR_STATE_PATH) if LOG_INCREMENTAL_FETCH else None
+log_segment_cache = LogSegmentCache(
+    cache_dir=LOG_SEGMENT_CACHE_DIR,
+    retention_hours=LOG_SEGMENT_CACHE_RETENTION_HOURS
+) if LOG_SEGMENT_CACHE_DIR else None
+log_tail_buffer = RecentEventsBuffer(
+    max_bytes=LOG_LIVE_TAIL_MAX_MB * 1024 * 1024,
+    max_staleness_seconds=max(30, LOG_LIVE_TAIL_POLL_SECONDS * 2)
+) if LOG_LIVE_TAIL_MODE in ("live", "poll") else None
+log_tail_ingester = None
+analysis_cache = create_analysis_cache(
+    ANALYSIS_CACHE_BACKEND,
+    ttl_seconds=ANALYSIS_CACHE_TTL_SECONDS,
+    max_entries=ANALYSIS_CACHE_MAX_ENTRIES,
+    path=ANALYSIS_CACHE_PATH
+)
+# 직전 Gemini 분석의 시나리오 집합을 요청 간에 기억하도록 프로세스 전역으로 공유
+scenario_classifier = ScenarioClassifier()
+incident_store = IncidentStateStore(
+    state_path=ANALYSIS_INCIDENT_STATE_PATH,
+    idle_close_seconds=ANALYSIS_INCIDENT_IDLE_CLOSE_SECONDS
+) if ANALYSIS_INCIDENT_STATE else None
+# 요청 간에 오류율/지연을 함께 보도록 프로세스 전역으로 공유
+gemini_breaker = CircuitBreaker(
+    "gemini",
+    window=ANALYSIS_BREAKER_WINDOW,
+    min_calls=ANALYSIS_BREAKER_MIN_CALLS,
+    error_rate_threshold=ANALYSIS_BREAKER_ERROR_RATE,
+    p95_latency_threshold=ANALYSIS_BREAKER_P95_SECONDS,
+    open_seconds=ANALYSIS_BREAKER_OPEN_SECONDS
+) if ANALYSIS_BREAKER else None
+
+
+def create_log_fetcher():
+    """LOG_TARGETS 설정에 따라 단일 또는 다중 대상 로그 수집기를 생성합니다."""
+    from aws_client import AWSLogFetcher, MultiTargetLogFetcher
+
+    if LOG_TARGETS:
+        return MultiTargetLogFetcher(
+            role_arn=AWS_ROLE_ARN,
+            targets=LOG_TARGETS,
+            shard_count=LOG_FETCH_SHARDS,
+            cursor_store=log_cursor_store,
+            segment_cache=log_segment_cache,
+            tail_buffer=log_tail_buffer,
+            sampling=None if LOG_SAMPLING == "none" else LOG_SAMPLING,
+            sample_scan_limit=LOG_SAMPLING_SCAN_LIMIT,
+            target_timeout=LOG_TARGET_TIMEOUT_SECONDS
+        )
+
+    return AWSLogFetcher(
+        role_arn=AWS_ROLE_ARN,
+        region=AWS_REGION,
+        shard_count=LOG_FETCH_SHARDS,
+        cursor_store=log_cursor_store,
+        segment_cache=log_segment_cache,
+        tail_buffer=log_tail_buffer,
+        sampling=None if LOG_SAMPLING == "none" else LOG_SAMPLING,
+        sample_scan_limit=LOG_SAMPLING_SCAN_LIMIT
+    )
+
+
+def create_log_analyzer():
+    """프로세스 전역 캐시/분류기를 공유하는 로그 분석기를 생성합니다."""
+    from log_analyzer_vertex import LogAnalyzer
+
+    return LogAnalyzer(
+        project_id=GCP_PROJECT_ID,
+        location=GCP_LOCATION,
+        cache=analysis_cache,
+        classifier=scenario_classifier,
+        rules_fast_path=ANALYSIS_RULES_FAST_PATH,
+        chunk_by=None if ANALYSIS_CHUNK_BY == "off" else ANALYSIS_CHUNK_BY,
+        chunk_concurrency=ANALYSIS_CHUNK_CONCURRENCY,
+        llm_reduce=ANALYSIS_LLM_REDUCE,
+        prompt_token_budget=ANALYSIS_PROMPT_TOKEN_BUDGET,
+        max_line_tokens=ANALYSIS_MAX_LINE_TOKENS,
+        cascade=ANALYSIS_CASCADE,
+        cascade_confidence=ANALYSIS_CASCADE_CONFIDENCE,
+        incidents=incident_store,
+        breaker=gemini_breaker
+    )
+
+
+def analysis_incident_key() -> str:
+    """장애 상태를 구분할 분석 대상 키 (단일 로그 그룹 또는 다중 대상 목록)"""
+    targets = LOG_TARGETS or [(AWS_REGION, LOG_GROUP_NAME)]
+    return ",".join(f"{region}:{log_group}" for region, log_group in targets)
+
+
+async def fetch_patient_logs(aws_client, time_range_minutes: int, max_logs: int, fetch_mode: str = LOG_FETCH_MODE):
+    """
+    fetch_mode에 따라 CloudWatch 로그를 분석기 입력 형식으로 가져옵니다.
+
+    - events: 원본 에러 이벤트 (최대 max_logs개)
+    - insights: Logs Insights 집계 결과 (그룹별 건수 + 대표 예시)
+
+    다중 대상(LOG_TARGETS)이면 모든 대상을 동시에 조회하여 병합합니다.
+    """
+    if LOG_TARGETS:
+        if fetch_mode == "insights":
+            result = await aws_client.aggregate_error_logs_async(
+                minutes=time_range_minutes,
+                group_by=LOG_INSIGHTS_GROUP_BY,
+                max_groups=max_logs
+            )
+        else:
+            result = await aws_client.get_error_logs_async(
+                minutes=time_range_minutes,
+                max_logs=max_logs
+            )
+        return result["logs"]
+
+    if fetch_mode == "insights":
+        aggregated = await aws_client.aggregate_error_logs_async(
+            log_group_name=LOG_GROUP_NAME,
+            minutes=time_range_minutes,
+            group_by=LOG_INSIGHTS_GROUP_BY,
+            timeout=LOG_FETCH_TIMEOUT_SECONDS,
+            max_groups=max_logs
+        )
+        return aggregated["logs"]
+
+    return await aws_client.get_error_logs_async(
+        log_group_name=LOG_GROUP_NAME,
+        minutes=time_range_minutes,
+        max_logs=max_logs,
+        timeout=LOG_FETCH_TIMEOUT_SECONDS
+    )
 
 
 def check_environment():
@@ -74,10 +304,54 @@ async def startup_event():
     logger.info("   Uses GCP Credits!")
     logger.info("=" * 60)
     check_environment()
+    start_live_tail()
+    warm_vertex_models()
     logger.info("Doctor Zone Ready")
     logger.info("=" * 60)
 
 
+def warm_vertex_models():
+    """Gemini 모델 핸들을 백그라운드에서 미리 만들어 첫 분석 요청의 초기화 지연을 없앱니다."""
+    if not GCP_PROJECT_ID:
+        return
+
+    def warm():
+        from log_analyzer_vertex import LogAnalyzer
+        from vertex_models import warm_models
+        warm_models(GCP_PROJECT_ID, GCP_LOCATION, [model_name for model_name, _ in ANALYSIS_CASCADE] + [LogAnalyzer.MODEL_NAME])
+
+    threading.Thread(target=warm, name="vertex-warmup", daemon=True).start()
+
+
+def start_live_tail():
+    """LOG_LIVE_TAIL_MODE가 설정되어 있으면 백그라운드 실시간 수집을 시작합니다."""
+    global log_tail_ingester
+
+    if not log_tail_buffer or not AWS_ROLE_ARN:
+        return
+
+    from aws_client import LiveTailIngester
+
+    try:
+        log_tail_ingester = LiveTailIngester(
+            role_arn=AWS_ROLE_ARN,
+            targets=LOG_TARGETS or [(AWS_REGION, LOG_GROUP_NAME)],
+            buffer=log_tail_buffer,
+            mode=LOG_LIVE_TAIL_MODE,
+            poll_interval_seconds=LOG_LIVE_TAIL_POLL_SECONDS,
+            backfill_minutes=LOG_LIVE_TAIL_BACKFILL_MINUTES
+        )
+        log_tail_ingester.start()
+    except Exception as e:
+        logger.error(f"Failed to start live-tail ingester: {str(e)}")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if log_tail_ingester:
+        log_tail_ingester.stop()
+
+
 @app.get("/")
 async def root():
     """Health check endpoint"""
@@ -90,6 +364,7 @@ async def root():
             "log_analysis": "Vertex AI Gemini 2.0 Flash",
             "terraform_generation": "Claude Sonnet 4.5",
             "slack_notifications": bool(SLACK_WEBHOOK_URL),
+            "live_tail": log_tail_ingester.stats() if log_tail_ingester else LOG_LIVE_TAIL_MODE,
             "uses_gcp_credits": True
         }
     }
@@ -101,6 +376,22 @@ async def health_check():
     return {"status": "ok"}
 
 
+@app.get("/metrics")
+async def metrics():
+    """캐시/버퍼 적중률 등 운영 지표"""
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "analysis_cache": analysis_cache.stats() if analysis_cache else None,
+        "log_cursor_store": log_cursor_store.stats() if log_cursor_store else None,
+        "log_segment_cache": log_segment_cache.stats() if log_segment_cache else None,
+        "log_tail_buffer": log_tail_buffer.stats() if log_tail_buffer else None,
+        "vertex_models": registry_stats(),
+        "analysis_cascade": get_cascade_stats().stats(),
+        "incidents": incident_store.stats() if incident_store else None,
+        "gemini_breaker": gemini_breaker.stats() if gemini_breaker else None
+    }
+
+
 @app.post("/analyze")
 async def analyze_patient_zone(
     request: Request,
@@ -113,6 +404,7 @@ async def analyze_patient_zone(
     {
         "time_range_minutes": 30,
         "max_logs": 100,
+        "fetch_mode": "events",
         "generate_terraform": true,
         "send_to_slack": true
     }
@@ -123,14 +415,13 @@ async def analyze_patient_zone(
 
         time_range = body.get("time_range_minutes", 30)
         max_logs = body.get("max_logs", 100)
+        fetch_mode = body.get("fetch_mode", LOG_FETCH_MODE)
         generate_terraform = body.get("generate_terraform", True)
         send_to_slack = body.get("send_to_slack", bool(SLACK_WEBHOOK_URL))
 
         logger.info(f"Starting analysis (last {time_range} minutes, max {max_logs} logs)")
 
         # Lazy import - 필요할 때만 로드
-        from aws_client import AWSLogFetcher
-        from log_analyzer_vertex import LogAnalyzer
         from terraform_generator import TerraformGenerator
 
         # Step 1: Fetch CloudWatch Logs (OIDC Keyless)
@@ -142,20 +433,21 @@ async def analyze_patient_zone(
                 detail="AWS_ROLE_ARN not configured for OIDC Keyless authentication"
             )
 
-        aws_client = AWSLogFetcher(
-            role_arn=AWS_ROLE_ARN,
-            region=AWS_REGION
-        )
+        aws_client = create_log_fetcher()
 
-        logs = aws_client.get_error_logs(
-            log_group_name=LOG_GROUP_NAME,
-            minutes=time_range,
-            max_logs=max_logs
+        logs = await fetch_patient_logs(
+            aws_client,
+            time_range_minutes=time_range,
+            max_logs=max_logs,
+            fetch_mode=fetch_mode
         )
 
         logger.info(f"Fetched {len(logs)} logs")
 
         if not logs:
+            # 에러 로그가 없는 윈도우는 진행 중인 장애의 종료
+            if incident_store:
+                incident_store.close(analysis_incident_key())
             return {
                 "status": "no_errors",
                 "message": "No error logs found in the specified time range",
@@ -171,11 +463,13 @@ async def analyze_patient_zone(
                 detail="GCP_PROJECT_ID not configured"
             )
 
-        analyzer = LogAnalyzer(
-            project_id=GCP_PROJECT_ID,
-            location=GCP_LOCATION
+        analyzer = create_log_analyzer()
+        analysis = await analyzer.analyze_logs_async(
+            logs,
+            deadline_seconds=ANALYSIS_DEADLINE_SECONDS,
+            hedge=ANALYSIS_HEDGE,
+            incident_key=analysis_incident_key()
         )
-        analysis = analyzer.analyze_logs(logs)
 
         logger.info(f"Analysis completed - Severity: {analysis['severity']}")
         logger.info(f"   Detected issues: {analysis['detected_issues']}")
@@ -355,8 +649,6 @@ async def analyze_and_send_to_slack(time_range_minutes: int, triggered_by: str,
 
         # Lazy import - 백그라운드 태스크에서만 로드
         import_start = datetime.utcnow()
-        from aws_client import AWSLogFetcher
-        from log_analyzer_vertex import LogAnalyzer
         from terraform_generator import TerraformGenerator
         import_duration = (datetime.utcnow() - import_start).total_seconds()
         logger.info(f"[REQ-{request_id}] Module imports took {import_duration:.2f}s")
@@ -364,21 +656,20 @@ async def analyze_and_send_to_slack(time_range_minutes: int, triggered_by: str,
         # Step 1: CloudWatch Logs 조회 (OIDC Keyless)
         step1_start = datetime.utcnow()
         logger.info(f"[REQ-{request_id}] Step 1: Fetching CloudWatch logs (OIDC Keyless)...")
-        aws_client = AWSLogFetcher(
-            role_arn=AWS_ROLE_ARN,
-            region=AWS_REGION
-        )
+        aws_client = create_log_fetcher()
 
-        logs = aws_client.get_error_logs(
-            log_group_name=LOG_GROUP_NAME,
-            minutes=time_range_minutes,
+        logs = await fetch_patient_logs(
+            aws_client,
+            time_range_minutes=time_range_minutes,
             max_logs=100
         )
         step1_duration = (datetime.utcnow() - step1_start).total_seconds()
         logger.info(f"[REQ-{request_id}] Fetched {len(logs)} logs in {step1_duration:.2f}s")
 
-        # 로그 없으면 정상 메시지 전송
+        # 로그 없으면 진행 중인 장애를 종료하고 정상 메시지 전송
         if not logs:
+            if incident_store:
+                incident_store.close(analysis_incident_key())
             if SLACK_WEBHOOK_URL:
                 slack_start = datetime.utcnow()
                 logger.info(f"[REQ-{request_id}] No errors found, sending normal status to Slack...")
@@ -395,11 +686,13 @@ async def analyze_and_send_to_slack(time_range_minutes: int, triggered_by: str,
         # Step 2: Gemini 분석
         step2_start = datetime.utcnow()
         logger.info(f"[REQ-{request_id}] Step 2: Analyzing logs with Vertex AI Gemini...")
-        analyzer = LogAnalyzer(
-            project_id=GCP_PROJECT_ID,
-            location=GCP_LOCATION
+        analyzer = create_log_analyzer()
+        analysis = await analyzer.analyze_logs_async(
+            logs,
+            deadline_seconds=ANALYSIS_DEADLINE_SECONDS,
+            hedge=ANALYSIS_HEDGE,
+            incident_key=analysis_incident_key()
         )
-        analysis = analyzer.analyze_logs(logs)
         step2_duration = (datetime.utcnow() - step2_start).total_seconds()
         logger.info(f"[REQ-{request_id}] Analysis completed in {step2_duration:.2f}s - Severity: {analysis.get('severity', 'unknown')}")
 
@@ -449,8 +742,6 @@ async def generate_terraform_and_send_to_slack(time_range_minutes: int, triggere
 
         # Lazy import - 백그라운드 태스크에서만 로드
         import_start = datetime.utcnow()
-        from aws_client import AWSLogFetcher
-        from log_analyzer_vertex import LogAnalyzer
         from terraform_generator import TerraformGenerator
         import_duration = (datetime.utcnow() - import_start).total_seconds()
         logger.info(f"[REQ-{request_id}] Module imports took {import_duration:.2f}s")
@@ -458,21 +749,20 @@ async def generate_terraform_and_send_to_slack(time_range_minutes: int, triggere
         # Step 1: CloudWatch Logs 조회 (OIDC Keyless)
         step1_start = datetime.utcnow()
         logger.info(f"[REQ-{request_id}] Step 1: Fetching CloudWatch logs (OIDC Keyless)...")
-        aws_client = AWSLogFetcher(
-            role_arn=AWS_ROLE_ARN,
-            region=AWS_REGION
-        )
+        aws_client = create_log_fetcher()
 
-        logs = aws_client.get_error_logs(
-            log_group_name=LOG_GROUP_NAME,
-            minutes=time_range_minutes,
+        logs = await fetch_patient_logs(
+            aws_client,
+            time_range_minutes=time_range_minutes,
             max_logs=100
         )
         step1_duration = (datetime.utcnow() - step1_start).total_seconds()
         logger.info(f"[REQ-{request_id}] Fetched {len(logs)} logs in {step1_duration:.2f}s")
 
-        # 로그 없으면 정상 메시지 전송
+        # 로그 없으면 진행 중인 장애를 종료하고 정상 메시지 전송
         if not logs:
+            if incident_store:
+                incident_store.close(analysis_incident_key())
             if SLACK_WEBHOOK_URL:
                 slack_start = datetime.utcnow()
                 logger.info(f"[REQ-{request_id}] No errors found, sending normal status to Slack...")
@@ -489,11 +779,13 @@ async def generate_terraform_and_send_to_slack(time_range_minutes: int, triggere
         # Step 2: Gemini 분석
         step2_start = datetime.utcnow()
         logger.info(f"[REQ-{request_id}] Step 2: Analyzing logs with Vertex AI Gemini...")
-        analyzer = LogAnalyzer(
-            project_id=GCP_PROJECT_ID,
-            location=GCP_LOCATION
+        analyzer = create_log_analyzer()
+        analysis = await analyzer.analyze_logs_async(
+            logs,
+            deadline_seconds=ANALYSIS_DEADLINE_SECONDS,
+            hedge=ANALYSIS_HEDGE,
+            incident_key=analysis_incident_key()
         )
-        analysis = analyzer.analyze_logs(logs)
         step2_duration = (datetime.utcnow() - step2_start).total_seconds()
         logger.info(f"[REQ-{request_id}] Analysis completed in {step2_duration:.2f}s - Severity: {analysis.get('severity', 'unknown')}")
 
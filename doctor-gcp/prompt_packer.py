@@ -0,0 +1,210 @@
+"""
+Prompt Packer - 토큰 예산 기반 분석 프롬프트 패킹
+"처음 100줄"처럼 줄 수로 자르면 스택 트레이스가 많은 윈도우는 컨텍스트를 넘기고 짧은 줄만 있는 윈도우는
+예산 대부분을 버리므로, 줄마다 토큰 수를 로컬 휴리스틱으로 추정하고 정보 가치(심각도, 새로움, 희소성) 순으로
+예산을 채웁니다. 긴 메시지는 앞/뒤만 남기고 가운데를 생략하며, 무엇을 넣고 뺐는지 보고합니다.
+"""
+
+import math
+from collections import Counter
+from typing import List, Dict, Any, Optional, Tuple
+
+from log_sampling import detect_severity
+from log_templates import TemplateMiner, format_template_line, mask_message
+
+# 영문/숫자/기호는 평균 약 3.5자당 1토큰 (스택 트레이스, ID처럼 기호가 많은 로그 기준으로 보수적으로)
+CHARS_PER_TOKEN = 3.5
+# 생략 표시 줄 등을 위해 남겨 두는 토큰
+RESERVED_TOKENS = 32
+
+SEVERITY_WEIGHTS = {"CRITICAL": 4.0, "ERROR": 3.0, "WARNING": 2.0, "OTHER": 1.0}
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    토크나이저 없이 토큰 수를 추정합니다. (줄바꿈 포함)
+
+    비ASCII 문자(한글 등)는 UTF-8로 3바이트이고 대략 1자 1토큰이므로
+    UTF-8 길이와 문자 수의 차이로 개수를 구해 따로 셉니다.
+    """
+    chars = len(text)
+    wide = (len(text.encode("utf-8")) - chars) // 2
+    return math.ceil((chars - wide) / CHARS_PER_TOKEN + wide) + 1
+
+
+def trim_middle(text: str, max_tokens: int) -> Tuple[str, bool]:
+    """
+    max_tokens를 넘는 줄은 앞 2/3, 뒤 1/3만 남기고 가운데를 생략합니다.
+    (예외 메시지는 앞쪽에, Caused by 등 근본 원인은 뒤쪽에 있는 경우가 많음)
+
+    Returns:
+        (줄, 잘렸는지 여부)
+    """
+    tokens = estimate_tokens(text)
+    if tokens <= max_tokens:
+        return text, False
+
+    # 생략 표시(비ASCII 포함)의 토큰도 max_tokens 안에 들어가도록 먼저 빼고 남길 글자 수를 계산
+    marker_tokens = estimate_tokens(f" …({len(text)}자 생략)… ")
+    keep = max(1, int(len(text) * (max_tokens - marker_tokens) / tokens))
+    while True:
+        head = keep * 2 // 3
+        tail = keep - head
+        trimmed = f"{text[:head]} …({len(text) - keep}자 생략)… {text[len(text) - tail:]}"
+        # 남긴 앞/뒤에 한글 등 넓은 문자가 평균보다 많으면 넘친 토큰만큼 더 줄임
+        excess = estimate_tokens(trimmed) - max_tokens
+        if excess <= 0 or keep <= 1:
+            return trimmed, True
+        keep = max(1, keep - math.ceil(excess * CHARS_PER_TOKEN))
+
+
+class PackedLines:
+    """패킹 결과: 원래 순서를 유지한 줄들과 넣은/뺀 항목 보고"""
+
+    __slots__ = ("lines", "total", "packed", "trimmed", "used_tokens", "budget_tokens", "dropped_by_severity",
+                 "dropped_count")
+
+    def __init__(self, budget_tokens: int, total: int):
+        self.lines: List[str] = []
+        self.total = total
+        self.packed = 0
+        self.trimmed = 0
+        self.used_tokens = 0
+        self.budget_tokens = budget_tokens
+        self.dropped_by_severity: Counter = Counter()
+        # 뺀 항목이 나타내는 로그 건수 (템플릿이면 건수 합)
+        self.dropped_count = 0
+
+    @property
+    def dropped(self) -> int:
+        return self.total - self.packed
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "budget_tokens": self.budget_tokens,
+            "used_tokens": self.used_tokens,
+            "total": self.total,
+            "packed": self.packed,
+            "dropped": self.dropped,
+            "trimmed": self.trimmed,
+            "dropped_by_severity": dict(self.dropped_by_severity)
+        }
+
+
+def combine_pack_reports(reports: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """청크별 패킹 보고를 합칩니다. (보고가 없으면 None)"""
+    if not reports:
+        return None
+    dropped_by_severity: Counter = Counter()
+    for report in reports:
+        dropped_by_severity.update(report["dropped_by_severity"])
+    combined = {
+        key: sum(report[key] for report in reports)
+        for key in ("budget_tokens", "used_tokens", "total", "packed", "dropped", "trimmed")
+    }
+    combined["dropped_by_severity"] = dict(dropped_by_severity)
+    combined["chunks"] = len(reports)
+    return combined
+
+
+class PromptPacker:
+    """
+    정보 가치 순 greedy 토큰 예산 패킹
+
+    가치 = 심각도 가중치 x (1 + 새로움 + 희소성)
+    - 심각도: CRITICAL > ERROR > WARNING > 기타 (log_sampling.detect_severity)
+    - 새로움: 템플릿은 윈도우 안에서 늦게 처음 나타날수록, 원본 줄은 같은 모양 줄 중 앞쪽일수록 높음
+    - 희소성: 윈도우에서 같은 모양이 차지하는 비율이 작을수록 높음 (-log p 정규화)
+    건수 상위 pinned개 템플릿은 가치와 무관하게 먼저 넣습니다. (장애의 주 증상)
+    넣은 줄은 원래 순서(템플릿은 건수 순, 원본 로그는 시간 순)로 출력합니다.
+    """
+
+    def __init__(self, token_budget: int = 6000, max_line_tokens: int = 256, pinned: int = 5):
+        """
+        Args:
+            token_budget: 로그 구간에 쓸 최대 토큰 수 (추정치)
+            max_line_tokens: 줄 하나의 최대 토큰 수 (넘으면 가운데 생략)
+            pinned: 가치와 무관하게 먼저 넣을 건수 상위 템플릿 수
+        """
+        self.token_budget = max(RESERVED_TOKENS * 2, token_budget)
+        self.max_line_tokens = max(16, max_line_tokens)
+        self.pinned = pinned
+
+    def pack_templates(self, miner: TemplateMiner) -> PackedLines:
+        """템플릿 요약 줄들을 예산 안에 패킹합니다. (miner.templates() 건수 순)"""
+        clusters = miner.templates()
+        total = sum(cluster.count for cluster in clusters) or 1
+        first_seen = [cluster.first_seen for cluster in clusters if cluster.first_seen is not None]
+        window_start = min(first_seen, default=0)
+        window_span = max(max(first_seen, default=0) - window_start, 1)
+
+        texts, severities, values, counts = [], [], [], []
+        for cluster in clusters:
+            severity = detect_severity(cluster.template)
+            novelty = (cluster.first_seen - window_start) / window_span if cluster.first_seen is not None else 0.0
+            texts.append(format_template_line(cluster))
+            severities.append(severity)
+            values.append(self._value(severity, novelty, cluster.count / total, total))
+            counts.append(cluster.count)
+
+        return self._pack(texts, severities, values, counts, pinned=min(self.pinned, len(clusters)))
+
+    def pack_logs(self, lines: List[str], messages: List[str]) -> PackedLines:
+        """
+        원본 로그 줄들을 예산 안에 패킹합니다.
+
+        Args:
+            lines: 프롬프트에 넣을 줄 ("[timestamp] message")
+            messages: 줄별 메시지 (심각도/모양 판별용)
+        """
+        signatures = [mask_message(message)[0] for message in messages]
+        signature_counts = Counter(signatures)
+        seen: Counter = Counter()
+        total = len(messages) or 1
+
+        severities, values = [], []
+        for message, signature in zip(messages, signatures):
+            seen[signature] += 1
+            severity = detect_severity(message)
+            severities.append(severity)
+            values.append(self._value(severity, 1.0 / seen[signature], signature_counts[signature] / total, total))
+
+        return self._pack(lines, severities, values, [1] * len(lines), pinned=0)
+
+    @staticmethod
+    def _value(severity: str, novelty: float, share: float, total: int) -> float:
+        rarity = -math.log(share) / math.log(total + 1) if share > 0 else 1.0
+        return SEVERITY_WEIGHTS[severity] * (1.0 + novelty + min(rarity, 1.0))
+
+    def _pack(
+        self,
+        texts: List[str],
+        severities: List[str],
+        values: List[float],
+        counts: List[int],
+        pinned: int
+    ) -> PackedLines:
+        packed = PackedLines(self.token_budget, len(texts))
+        budget = self.token_budget - RESERVED_TOKENS
+        order = list(range(pinned)) + sorted(range(pinned, len(texts)), key=lambda i: (-values[i], i))
+
+        chosen: Dict[int, str] = {}
+        for i in order:
+            if budget - packed.used_tokens < 8:
+                # 예산이 거의 남지 않으면 나머지는 모두 생략
+                break
+            text, trimmed = trim_middle(texts[i], self.max_line_tokens)
+            tokens = estimate_tokens(text)
+            if packed.used_tokens + tokens > budget:
+                continue
+            chosen[i] = text
+            packed.used_tokens += tokens
+            packed.trimmed += trimmed
+
+        packed.lines = [chosen[i] for i in sorted(chosen)]
+        packed.packed = len(chosen)
+        for i in range(len(texts)):
+            if i not in chosen:
+                packed.dropped_by_severity[severities[i]] += 1
+                packed.dropped_count += counts[i]
+        return packed
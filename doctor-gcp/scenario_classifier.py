@@ -0,0 +1,273 @@
+"""
+Scenario Classifier - 규칙 기반 장애 시나리오 분류기
+로그 줄을 7개 FAILURE_SCENARIOS에 신뢰도와 함께 결정적으로 매핑합니다.
+키워드 규칙 표를 접두사 트리 형태의 단일 정규식으로 한 번만 컴파일하여 메시지당 한 번만 훑으므로,
+확실한 경우 Gemini 호출을 건너뛰고 Vertex AI 장애 시에는 대체 분석으로 사용합니다.
+"""
+
+import re
+import threading
+from collections import Counter
+from typing import List, Dict, Any, Optional, Iterable, Union, Tuple
+
+from log_batch import LogBatch
+from log_templates import TemplateMiner
+
+# (시나리오, 가중치, 소문자 키워드 구문) - 가중치는 해당 구문 하나만으로 시나리오라고 볼 수 있는 정도 (0~1)
+SCENARIO_RULES: List[Tuple[str, float, str]] = [
+    ("db-failure", 0.9, "er_access_denied_error"),
+    ("db-failure", 0.9, "er_bad_db_error"),
+    ("db-failure", 0.9, "protocol_connection_lost"),
+    ("db-failure", 0.8, "database connection failed"),
+    ("db-failure", 0.8, "db connection failed"),
+    ("db-failure", 0.8, "connection to database"),
+    ("db-failure", 0.5, "econnrefused"),
+    ("db-failure", 0.5, "getaddrinfo enotfound"),
+
+    ("pool-exhaustion", 0.95, "er_con_count_error"),
+    ("pool-exhaustion", 0.95, "too many connections"),
+    ("pool-exhaustion", 0.9, "pool exhausted"),
+    ("pool-exhaustion", 0.9, "pool is full"),
+    ("pool-exhaustion", 0.9, "queue limit reached"),
+    ("pool-exhaustion", 0.9, "no connections available"),
+    ("pool-exhaustion", 0.7, "timeout acquiring connection"),
+
+    ("memory-leak", 0.95, "heap out of memory"),
+    ("memory-leak", 0.95, "allocation failed"),
+    ("memory-leak", 0.95, "outofmemory"),
+    ("memory-leak", 0.9, "out of memory"),
+    ("memory-leak", 0.9, "oomkilled"),
+    ("memory-leak", 0.9, "exit code 137"),
+    ("memory-leak", 0.7, "memory usage increasing"),
+    ("memory-leak", 0.7, "memory leak"),
+
+    ("slow-query", 0.9, "slow query"),
+    ("slow-query", 0.9, "n+1 query"),
+    ("slow-query", 0.6, "query took"),
+    ("slow-query", 0.5, "full table scan"),
+    ("slow-query", 0.5, "using filesort"),
+
+    ("api-timeout", 0.9, "etimedout"),
+    ("api-timeout", 0.9, "esockettimedout"),
+    ("api-timeout", 0.9, "econnaborted"),
+    ("api-timeout", 0.8, "ms exceeded"),
+    ("api-timeout", 0.7, "gateway timeout"),
+    ("api-timeout", 0.7, "gateway time-out"),
+    ("api-timeout", 0.7, "external api timeout"),
+
+    ("jwt-expiry", 0.95, "tokenexpirederror"),
+    ("jwt-expiry", 0.95, "jwt expired"),
+    ("jwt-expiry", 0.7, "token expired"),
+    ("jwt-expiry", 0.6, "jsonwebtokenerror"),
+
+    ("high-cpu", 0.9, "high cpu"),
+    ("high-cpu", 0.7, "event loop lag"),
+    ("high-cpu", 0.7, "event loop blocked"),
+    ("high-cpu", 0.7, "cpu throttl"),
+]
+
+
+def _trie_pattern(phrases: Iterable[str]) -> str:
+    """
+    키워드 구문들을 공통 접두사 트리 형태의 정규식으로 만듭니다.
+    ("pool exhausted|pool is full" → "pool (?:exhausted|is full)")
+    위치마다 첫 글자 하나로 가지를 고르므로 구문 수가 늘어도 탐색 비용이 거의 늘지 않습니다.
+    """
+    trie: Dict[str, Dict] = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict[str, Dict]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # 구문이 여기서 끝날 수도 있으면 나머지는 선택 (탐욕적이므로 더 긴 구문 우선)
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+# 시나리오별 심각도 (감지된 시나리오 중 가장 높은 것이 전체 심각도)
+SCENARIO_SEVERITY = {
+    "db-failure": "critical",
+    "pool-exhaustion": "critical",
+    "memory-leak": "critical",
+    "slow-query": "warning",
+    "api-timeout": "warning",
+    "jwt-expiry": "warning",
+    "high-cpu": "warning",
+}
+SEVERITY_ORDER = {"info": 0, "warning": 1, "critical": 2}
+
+SCENARIO_RECOMMENDATIONS = {
+    "db-failure": ["RDS 엔드포인트와 보안 그룹/네트워크 설정 확인", "DB 자격 증명과 데이터베이스 이름 확인"],
+    "pool-exhaustion": ["커넥션 풀 크기와 RDS max_connections 설정 검토", "커넥션 반환 누락(release) 여부 확인"],
+    "memory-leak": ["ECS 태스크 메모리 사용 추이 확인 및 메모리 상향", "힙 스냅샷으로 누수 객체 확인"],
+    "slow-query": ["느린 쿼리에 인덱스 추가", "N+1 쿼리를 조인/일괄 조회로 변경"],
+    "api-timeout": ["외부 API 타임아웃과 재시도 설정 검토", "외부 API 호출에 서킷 브레이커 적용"],
+    "jwt-expiry": ["JWT 만료 시간과 토큰 갱신 로직 확인", "서버 간 시계 동기화 확인"],
+    "high-cpu": ["CPU 집약 연산을 워커로 분리", "ECS 태스크 CPU 상향 또는 오토스케일링 설정"],
+}
+
+
+class ScenarioClassification:
+    """분류 결과: 시나리오별 신뢰도(0~1)와 매칭된 줄 수"""
+
+    __slots__ = ("confidence", "hits", "lines", "detect_threshold", "high_confidence")
+
+    def __init__(self, confidence: Dict[str, float], hits: Dict[str, int], lines: int,
+                 detect_threshold: float, high_confidence: float):
+        self.confidence = confidence
+        self.hits = hits
+        self.lines = lines
+        self.detect_threshold = detect_threshold
+        self.high_confidence = high_confidence
+
+    @property
+    def detected(self) -> List[str]:
+        """detect_threshold 이상인 시나리오 (신뢰도 높은 순)"""
+        return sorted(
+            (scenario for scenario, confidence in self.confidence.items() if confidence >= self.detect_threshold),
+            key=lambda scenario: -self.confidence[scenario]
+        )
+
+    @property
+    def is_confident(self) -> bool:
+        """감지된 시나리오가 있고 모두 high_confidence 이상인지"""
+        detected = self.detected
+        return bool(detected) and all(self.confidence[scenario] >= self.high_confidence for scenario in detected)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "detected": self.detected,
+            "confidence": {scenario: round(confidence, 3) for scenario, confidence in self.confidence.items()},
+            "hits": self.hits,
+            "lines": self.lines
+        }
+
+
+class ScenarioClassifier:
+    """
+    규칙 기반 장애 시나리오 분류기
+
+    특징:
+    - 키워드 규칙 표 전체를 접두사 트리 정규식 하나로 한 번만 컴파일 (대소문자는 메시지를 소문자로 바꿔 처리)
+    - 같은 메시지는 한 번만 훑고, 템플릿 마이너가 있으면 템플릿 예시 메시지를 건수만큼 가중
+    - 시나리오 신뢰도 = 매칭된 서로 다른 구문 가중치의 noisy-OR (1 - Π(1 - w))
+    - 분석 대상(로그 그룹 키)별로 마지막 Gemini 분석의 시나리오 집합을 기억하여,
+      같은 대상에서 같은 집합이 높은 신뢰도로 다시 감지되면 LLM 생략 가능
+    """
+
+    def __init__(
+        self,
+        rules: List[Tuple[str, float, str]] = SCENARIO_RULES,
+        detect_threshold: float = 0.5,
+        high_confidence: float = 0.9
+    ):
+        """
+        Args:
+            rules: (시나리오, 가중치, 소문자 키워드 구문) 목록
+            detect_threshold: 시나리오로 감지할 최소 신뢰도
+            high_confidence: LLM을 생략할 수 있는 최소 신뢰도
+        """
+        self.detect_threshold = detect_threshold
+        self.high_confidence = high_confidence
+        self._rules = {phrase: (scenario, weight) for scenario, weight, phrase in rules}
+        self._pattern = re.compile(_trie_pattern(self._rules))
+        # 분석 대상 키 → 마지막 Gemini 분석의 시나리오 집합 (다른 대상의 진단을 재사용하지 않도록)
+        self._last_llm_scenarios: Dict[Optional[str], frozenset] = {}
+        self._lock = threading.Lock()
+
+    def classify_counts(self, messages: Iterable[Tuple[str, int]], lines: int) -> ScenarioClassification:
+        """(메시지, 건수) 목록을 분류합니다."""
+        findall = self._pattern.findall
+        rules = self._rules
+        matched = set()
+        hits: Dict[str, int] = {}
+        for message, count in messages:
+            phrases = findall(message.lower())
+            if not phrases:
+                continue
+            matched.update(phrases)
+            # 한 줄에 같은 시나리오 구문이 여러 개 있어도 한 건으로 집계
+            scenarios = {rules[phrase][0] for phrase in phrases} if len(phrases) > 1 else (rules[phrases[0]][0],)
+            for scenario in scenarios:
+                hits[scenario] = hits.get(scenario, 0) + count
+
+        misses: Dict[str, float] = {}
+        for phrase in matched:
+            scenario, weight = rules[phrase]
+            misses[scenario] = misses.get(scenario, 1.0) * (1.0 - weight)
+
+        confidence = {scenario: 1.0 - miss for scenario, miss in misses.items()}
+        return ScenarioClassification(confidence, hits, lines, self.detect_threshold, self.high_confidence)
+
+    def classify_lines(self, lines: Iterable[str]) -> ScenarioClassification:
+        counts = Counter(lines)
+        return self.classify_counts(counts.items(), sum(counts.values()))
+
+    def classify(self, logs: Union[LogBatch, List[Dict]], miner: Optional[TemplateMiner] = None) -> ScenarioClassification:
+        """
+        LogBatch 또는 로그 딕셔너리 리스트를 분류합니다.
+        같은 로그로 만든 템플릿 마이너가 있으면 원본 줄 대신 템플릿별 예시 메시지만 훑습니다.
+        """
+        if miner is not None:
+            return self.classify_counts(((cluster.example, cluster.count) for cluster in miner.clusters), miner.total)
+        if isinstance(logs, LogBatch):
+            return self.classify_lines(message for _, message in logs.iter_records())
+        return self.classify_lines(log.get('message', '') for log in logs)
+
+    def record_llm_result(self, detected_issues: List[str], key: Optional[str] = None):
+        """분석 대상 key의 Gemini 분석 결과 시나리오 집합을 기억합니다."""
+        scenarios = frozenset(issue for issue in detected_issues if issue in SCENARIO_SEVERITY)
+        with self._lock:
+            self._last_llm_scenarios[key] = scenarios
+
+    def last_llm_scenarios(self, key: Optional[str] = None) -> Optional[frozenset]:
+        """분석 대상 key의 마지막 Gemini 분석 시나리오 집합 (없으면 None)"""
+        with self._lock:
+            return self._last_llm_scenarios.get(key)
+
+    def can_skip_llm(self, classification: ScenarioClassification, key: Optional[str] = None) -> bool:
+        """신뢰도가 높고 시나리오 집합이 같은 분석 대상의 마지막 Gemini 분석과 같으면 True"""
+        last_scenarios = self.last_llm_scenarios(key)
+        return (
+            classification.is_confident
+            and last_scenarios is not None
+            and frozenset(classification.detected) == last_scenarios
+        )
+
+    @staticmethod
+    def build_analysis(classification: ScenarioClassification, note: str = "") -> Dict[str, Any]:
+        """분류 결과로 LogAnalyzer.analyze_logs와 같은 형식의 분석 딕셔너리를 만듭니다."""
+        detected = classification.detected
+        severity = max(
+            (SCENARIO_SEVERITY[scenario] for scenario in detected),
+            key=lambda level: SEVERITY_ORDER[level],
+            default="info"
+        )
+
+        if detected:
+            summary = "규칙 기반 분류 결과 " + ", ".join(
+                f"{scenario}({classification.hits[scenario]}건, 신뢰도 {classification.confidence[scenario]:.2f})"
+                for scenario in detected
+            ) + " 패턴이 감지되었습니다."
+        else:
+            summary = "알려진 장애 패턴이 감지되지 않았습니다."
+        if note:
+            summary = f"{summary} {note}"
+
+        recommendations = [rec for scenario in detected for rec in SCENARIO_RECOMMENDATIONS[scenario]]
+        return {
+            "detected_issues": detected,
+            "severity": severity,
+            "summary": summary,
+            "recommendations": recommendations,
+            "affected_resources": [],
+            "analysis_source": "rules",
+            "classification": classification.to_dict()
+        }
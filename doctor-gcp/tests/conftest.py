@@ -0,0 +1,104 @@
+"""
+테스트 공통 설정
+doctor-gcp 모듈은 패키지가 아닌 평면 모듈이므로 상위 디렉터리를 import 경로에 추가합니다.
+"""
+
+import asyncio
+import os
+import sys
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class FakeLogsClient:
+    """
+    filter_log_events만 흉내 내는 CloudWatch Logs 클라이언트 (오프라인 테스트용)
+    events: (timestamp, eventId, message) 목록, page_size 단위로 nextToken 페이지네이션
+    """
+
+    class meta:
+        region_name = "test-region"
+
+    def __init__(self, events, page_size=3):
+        self.events = sorted(events)
+        self.page_size = page_size
+        self.requests = []
+
+    def filter_log_events(self, logGroupName, startTime, endTime, filterPattern, limit=None, nextToken=None):
+        self.requests.append({"startTime": startTime, "endTime": endTime, "limit": limit})
+        matching = [
+            {"timestamp": ts, "eventId": event_id, "message": message, "logStreamName": "stream"}
+            for ts, event_id, message in self.events
+            if startTime <= ts <= endTime
+        ]
+        offset = int(nextToken or 0)
+        size = min(self.page_size, limit) if limit else self.page_size
+        page = matching[offset:offset + size]
+        response = {"events": page}
+        if offset + len(page) < len(matching):
+            response["nextToken"] = str(offset + len(page))
+        return response
+
+
+class FakeModel:
+    """
+    generate_content(_async)만 흉내 내는 Gemini 모델 (오프라인 테스트용)
+    responses: 호출 순서대로 돌려줄 응답 텍스트 (예외면 발생, 모자라면 마지막 응답 반복)
+    delays: 호출 순서대로 비동기 응답 전에 기다릴 초
+    """
+
+    def __init__(self, *responses, delays=()):
+        self.responses = list(responses)
+        self.delays = list(delays)
+        self.prompts = []
+        self.cancelled = 0
+
+    def _respond(self, index):
+        response = self.responses[min(index, len(self.responses) - 1)]
+        if isinstance(response, BaseException):
+            raise response
+        return types.SimpleNamespace(text=response)
+
+    def generate_content(self, prompt, generation_config=None):
+        self.prompts.append(prompt)
+        return self._respond(len(self.prompts) - 1)
+
+    async def generate_content_async(self, prompt, generation_config=None):
+        index = len(self.prompts)
+        self.prompts.append(prompt)
+        if index < len(self.delays):
+            try:
+                await asyncio.sleep(self.delays[index])
+            except asyncio.CancelledError:
+                self.cancelled += 1
+                raise
+        return self._respond(index)
+
+
+def make_analyzer(**attrs):
+    """
+    __init__(Vertex AI 초기화)을 거치지 않은 LogAnalyzer (오프라인 테스트용)
+    attrs로 tiers, classifier 등 필요한 속성만 덮어씁니다.
+    """
+    import pytest
+
+    pytest.importorskip("vertexai")
+    from log_analyzer_vertex import LogAnalyzer
+    from prompt_packer import PromptPacker
+
+    analyzer = LogAnalyzer.__new__(LogAnalyzer)
+    analyzer.cache = None
+    analyzer.classifier = None
+    analyzer.rules_fast_path = True
+    analyzer.chunk_by = None
+    analyzer.chunk_concurrency = 4
+    analyzer.llm_reduce = False
+    analyzer.packer = PromptPacker()
+    analyzer.cascade_confidence = LogAnalyzer.DEFAULT_CASCADE_CONFIDENCE
+    analyzer.incidents = None
+    analyzer.breaker = None
+    analyzer.tiers = []
+    for name, value in attrs.items():
+        setattr(analyzer, name, value)
+    return analyzer
@@ -0,0 +1,61 @@
+import time
+
+from analysis_cache import AnalysisCache, MemoryCacheBackend, SQLiteCacheBackend, count_bucket, fingerprint_templates
+from log_templates import TemplateMiner
+
+ANALYSIS = {"detected_issues": ["pool-exhaustion"], "severity": "critical"}
+
+
+def _miner(count, host="10.0.0.1"):
+    miner = TemplateMiner()
+    for _ in range(count):
+        miner.add(f"ERROR Too many connections from {host}")
+    miner.add("WARN slow query took 1200ms")
+    return miner
+
+
+def test_fingerprint_ignores_values_and_small_count_changes():
+    assert fingerprint_templates(_miner(20)) == fingerprint_templates(_miner(25, host="10.0.0.9"))
+    # 건수 구간이 바뀌거나 네임스페이스(모델 등)가 다르면 다른 지문
+    assert fingerprint_templates(_miner(20)) != fingerprint_templates(_miner(40))
+    assert fingerprint_templates(_miner(20)) != fingerprint_templates(_miner(20), namespace="other-model")
+    assert [count_bucket(n) for n in (0, 1, 3, 4, 7, 8)] == [-1, 0, 1, 2, 2, 3]
+
+
+def test_entries_expire_after_ttl():
+    cache = AnalysisCache(MemoryCacheBackend(), ttl_seconds=0.05)
+    cache.set("k", ANALYSIS)
+    assert cache.get("k") == ANALYSIS
+
+    time.sleep(0.06)
+    assert cache.get("k") is None
+    assert len(cache.backend) == 0
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_memory_backend_evicts_least_recently_used():
+    cache = AnalysisCache(MemoryCacheBackend(max_entries=2))
+    cache.set("a", ANALYSIS)
+    cache.set("b", ANALYSIS)
+    cache.get("a")
+    cache.set("c", ANALYSIS)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == ANALYSIS
+    assert cache.get("c") == ANALYSIS
+
+
+def test_sqlite_backend_survives_restart_and_evicts(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = AnalysisCache(SQLiteCacheBackend(path, max_entries=2))
+    cache.set("a", ANALYSIS)
+    time.sleep(0.01)
+    cache.set("b", ANALYSIS)
+    time.sleep(0.01)
+    cache.set("c", ANALYSIS)
+
+    reopened = AnalysisCache(SQLiteCacheBackend(path, max_entries=2))
+    assert len(reopened.backend) == 2
+    assert reopened.get("a") is None
+    assert reopened.get("c") == ANALYSIS
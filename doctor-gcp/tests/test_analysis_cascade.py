@@ -0,0 +1,117 @@
+import asyncio
+import itertools
+import json
+
+import pytest
+
+from analysis_cascade import escalation_reason, get_cascade_stats, parse_cascade_tiers
+from conftest import FakeModel, make_analyzer
+from scenario_classifier import ScenarioClassifier
+
+_names = itertools.count()
+
+
+def _answer(issues=(), confidence=0.9, severity="warning"):
+    return json.dumps({
+        "detected_issues": list(issues),
+        "severity": severity,
+        "summary": "분석",
+        "recommendations": [],
+        "affected_resources": [],
+        "confidence": confidence
+    })
+
+
+def _cascade(small, large):
+    """하위 계층 small, 마지막 계층 large인 분석기 (계층 이름은 전역 지표가 섞이지 않게 테스트마다 새로)"""
+    analyzer = make_analyzer()
+    from log_analyzer_vertex import _ModelTier, _PreparedAnalysis
+
+    suffix = next(_names)
+    analyzer.tiers = [_ModelTier(f"small-{suffix}", small, None), _ModelTier(f"large-{suffix}", large, None)]
+    return analyzer, _PreparedAnalysis(prompt="logs")
+
+
+def _run(analyzer, prepared, deadline_seconds=5.0):
+    async def run():
+        deadline_at = asyncio.get_running_loop().time() + deadline_seconds
+        return await analyzer._analyze_cascade(prepared.prompt, prepared, deadline_at, hedge=False)
+
+    return asyncio.run(run())
+
+
+def _escalations(analyzer):
+    return get_cascade_stats().stats()["tiers"][analyzer.tiers[0].name]["escalated"]
+
+
+def test_parse_cascade_tiers():
+    assert parse_cascade_tiers("gemini-lite:512, gemini-flash") == [("gemini-lite", 512), ("gemini-flash", 1024)]
+    assert parse_cascade_tiers("off") == []
+    assert parse_cascade_tiers("") == []
+
+
+def test_escalation_reasons():
+    confident = {"detected_issues": ["high-cpu"], "confidence": 0.9}
+
+    assert escalation_reason(confident, False, 0.7, ["high-cpu"]) == "invalid_output"
+    assert escalation_reason({"detected_issues": ["high-cpu"]}, True, 0.7, ["high-cpu"]) == "low_confidence"
+    assert escalation_reason(confident, True, 0.7, ["pool-exhaustion"]) == "new_scenario"
+    assert escalation_reason(confident, True, 0.7, ["high-cpu"]) is None
+
+
+def test_confident_small_tier_answer_is_accepted():
+    small, large = FakeModel(_answer()), FakeModel(_answer())
+    analyzer, prepared = _cascade(small, large)
+
+    result = _run(analyzer, prepared)
+
+    assert result["analysis_model"] == analyzer.tiers[0].name
+    assert large.prompts == []
+
+
+@pytest.mark.parametrize("response, reason", [
+    (_answer(confidence=0.3), "low_confidence"),
+    (_answer(issues=["high-cpu"]), "new_scenario"),
+    (_answer()[:40], "invalid_output"),
+    (RuntimeError("quota exceeded"), "error"),
+])
+def test_small_tier_escalates_to_final_tier(response, reason):
+    small, large = FakeModel(response), FakeModel(_answer(issues=["high-cpu"], severity="critical"))
+    analyzer, prepared = _cascade(small, large)
+
+    result = _run(analyzer, prepared)
+
+    assert result["analysis_model"] == analyzer.tiers[1].name
+    assert result["severity"] == "critical"
+    assert large.prompts == ["logs"]
+    assert _escalations(analyzer) == {reason: 1}
+
+
+def test_scenario_seen_by_rules_is_not_new():
+    small, large = FakeModel(_answer(issues=["pool-exhaustion"])), FakeModel(_answer())
+    analyzer, prepared = _cascade(small, large)
+    prepared.classification = ScenarioClassifier().classify_lines(["ERROR ER_CON_COUNT_ERROR: Too many connections"] * 5)
+
+    assert _run(analyzer, prepared)["analysis_model"] == analyzer.tiers[0].name
+
+
+def test_slow_small_tier_leaves_deadline_for_final_tier():
+    small, large = FakeModel(_answer(), delays=[10]), FakeModel(_answer(confidence=0.3))
+    analyzer, prepared = _cascade(small, large)
+
+    # 하위 계층은 마감 시간의 CASCADE_DEADLINE_SHARE만 쓰고 취소됨, 마지막 계층 결과는 confidence와 무관하게 채택
+    result = _run(analyzer, prepared, deadline_seconds=0.5)
+
+    assert result["analysis_model"] == analyzer.tiers[1].name
+    assert small.cancelled == 1
+    assert _escalations(analyzer) == {"error": 1}
+
+
+def test_sync_cascade_escalates_the_same_way():
+    small, large = FakeModel(_answer(confidence=0.1)), FakeModel(_answer())
+    analyzer, prepared = _cascade(small, large)
+
+    result = analyzer._analyze_cascade_sync(prepared)
+
+    assert result["analysis_model"] == analyzer.tiers[1].name
+    assert _escalations(analyzer) == {"low_confidence": 1}
@@ -0,0 +1,70 @@
+import json
+
+import pytest
+
+from analysis_schema import SchemaValidator, build_log_analysis_schema, parse_json_response, repair_truncated_json
+
+SCENARIOS = ["pool-exhaustion", "high-cpu"]
+VALIDATOR = SchemaValidator(build_log_analysis_schema(SCENARIOS), fallbacks={"severity": "warning"})
+
+
+def test_validator_fills_required_fields_and_canonicalizes_enums():
+    result = VALIDATOR.validate({
+        "detected_issues": ["HIGH-CPU", "disk-full"],
+        "severity": "Critical",
+        "recommendations": "인스턴스 확장",
+        "confidence": "0.8"
+    })
+
+    # enum 대소문자 정규화, 알 수 없는 시나리오 제거, 단일 값은 배열로, 누락 필드는 빈 값
+    assert result["detected_issues"] == ["high-cpu"]
+    assert result["severity"] == "critical"
+    assert result["recommendations"] == ["인스턴스 확장"]
+    assert result["confidence"] == 0.8
+    assert result["summary"] == ""
+    assert result["affected_resources"] == []
+
+
+def test_unknown_severity_uses_fallback():
+    assert VALIDATOR.validate({"severity": "fatal"})["severity"] == "warning"
+    assert VALIDATOR.validate({})["severity"] == "warning"
+
+
+def test_complete_json_in_code_fence_is_not_marked_repaired():
+    text = '```json\n{"detected_issues": ["pool-exhaustion"], "severity": "critical"}\n```'
+
+    result, repaired = parse_json_response(text, VALIDATOR)
+
+    assert result["detected_issues"] == ["pool-exhaustion"]
+    assert not repaired
+
+
+def test_truncated_response_is_repaired_without_retry():
+    full = json.dumps({
+        "detected_issues": ["pool-exhaustion"],
+        "severity": "critical",
+        "summary": "커넥션 풀 고갈",
+        "recommendations": ["풀 크기 확대", "느린 쿼리 확인"]
+    }, ensure_ascii=False)
+    # 두 번째 권장 조치 문자열 중간에서 잘린 응답
+    truncated = full[:full.index("느린") + 2]
+
+    result, repaired = parse_json_response(truncated, VALIDATOR)
+
+    assert repaired
+    assert result["severity"] == "critical"
+    assert result["recommendations"][0] == "풀 크기 확대"
+    assert result["affected_resources"] == []
+
+
+def test_truncation_after_key_drops_back_to_last_complete_value():
+    repaired = json.loads(repair_truncated_json('{"severity": "info", "summary": "ok", "recommendations": [1, {"a"'))
+    assert repaired["severity"] == "info"
+    assert repaired["summary"] == "ok"
+
+
+def test_non_json_and_non_object_responses_raise():
+    with pytest.raises(ValueError):
+        parse_json_response("Gemini could not analyze these logs", VALIDATOR)
+    with pytest.raises(ValueError):
+        parse_json_response('["pool-exhaustion"]', VALIDATOR)
@@ -0,0 +1,33 @@
+import threading
+import time
+
+from aws_throttle import AdaptiveRateLimiter
+
+
+def test_acquire_completes_at_min_rate():
+    limiter = AdaptiveRateLimiter(rate=5.0, max_rate=10.0)
+    for _ in range(10):
+        limiter.on_throttle()
+    assert limiter.rate == AdaptiveRateLimiter.MIN_RATE
+
+    acquired = threading.Event()
+    thread = threading.Thread(target=lambda: (limiter.acquire(), acquired.set()), daemon=True)
+    started = time.monotonic()
+    thread.start()
+
+    # 0.5 TPS에서는 약 2초 뒤 토큰 하나가 모여야 함 (전에는 토큰이 1.0에 닿지 못해 무한 대기)
+    assert acquired.wait(timeout=5.0)
+    assert time.monotonic() - started >= 1.5
+
+
+def test_burst_is_limited_to_one_second():
+    limiter = AdaptiveRateLimiter(rate=4.0, max_rate=4.0)
+    time.sleep(1.5)
+
+    started = time.monotonic()
+    for _ in range(4):
+        limiter.acquire()
+    assert time.monotonic() - started < 0.1
+
+    limiter.acquire()
+    assert time.monotonic() - started >= 0.2
@@ -0,0 +1,106 @@
+import asyncio
+import time
+
+import pytest
+
+from circuit_breaker import CircuitBreaker, CLOSED, HALF_OPEN, OPEN
+
+
+def _tripped(**kwargs):
+    breaker = CircuitBreaker("test", min_calls=2, open_seconds=0.05, **kwargs)
+    for _ in range(2):
+        breaker.record_failure(breaker.allow(), 0.1)
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    time.sleep(0.06)
+    return breaker
+
+
+def test_half_open_allows_one_probe_and_closes_on_success():
+    breaker = _tripped()
+    probe = breaker.allow()
+    assert probe
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+    breaker.record_success(probe, 0.1)
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+
+
+def test_cancelled_probe_releases_its_slot():
+    breaker = _tripped()
+    breaker.record_cancelled(breaker.allow())
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+
+
+def test_unresolved_probe_slot_expires():
+    breaker = _tripped(probe_timeout_seconds=0.05)
+    assert breaker.allow()
+    assert not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.allow()
+
+
+def test_late_pre_trip_calls_do_not_change_half_open_state():
+    breaker = CircuitBreaker("test", min_calls=2, open_seconds=0.05)
+    slow_success = breaker.allow()
+    slow_failure = breaker.allow()
+    for _ in range(2):
+        breaker.record_failure(breaker.allow(), 0.1)
+    assert breaker.state == OPEN
+    time.sleep(0.06)
+
+    probe = breaker.allow()
+    assert breaker.state == HALF_OPEN
+    # 차단 전에 허용된 느린 호출은 시험 호출이 아니므로 상태를 바꾸지 않음
+    breaker.record_success(slow_success, 25.0)
+    assert breaker.state == HALF_OPEN
+    breaker.record_failure(slow_failure, 25.0)
+    assert breaker.state == HALF_OPEN
+
+    breaker.record_success(probe, 0.1)
+    assert breaker.state == CLOSED
+    assert breaker.stats()["calls"] == 1
+
+
+def test_expired_probe_result_is_ignored():
+    breaker = _tripped(probe_timeout_seconds=0.05)
+    stale = breaker.allow()
+    time.sleep(0.06)
+    probe = breaker.allow()
+    assert probe
+
+    breaker.record_failure(stale, 0.1)
+    assert breaker.state == HALF_OPEN
+    breaker.record_success(probe, 0.1)
+    assert breaker.state == CLOSED
+
+
+def test_cancelled_analysis_does_not_leave_breaker_stuck():
+    pytest.importorskip("vertexai")
+    from log_analyzer_vertex import LogAnalyzer, _PreparedAnalysis
+
+    breaker = _tripped()
+    analyzer = LogAnalyzer.__new__(LogAnalyzer)
+    analyzer.chunk_by = None
+    analyzer.breaker = breaker
+    analyzer._prepare = lambda logs, chunked, incident_key: _PreparedAnalysis(prompt="logs")
+    started = asyncio.Event()
+
+    async def hang(*args):
+        started.set()
+        await asyncio.sleep(60)
+
+    analyzer._analyze_cascade = hang
+
+    async def run():
+        task = asyncio.ensure_future(analyzer.analyze_logs_async([]))
+        await started.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
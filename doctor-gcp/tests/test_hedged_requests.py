@@ -0,0 +1,84 @@
+import asyncio
+import itertools
+import time
+
+import pytest
+
+from conftest import FakeModel, make_analyzer
+from vertex_models import get_latency_tracker
+
+_names = itertools.count()
+
+
+def _hedging(model, samples=20):
+    """최근 지연 표본이 samples개(0.01초) 쌓인 단일 계층 분석기 (헤지 지연은 HEDGE_MIN_DELAY_SECONDS)"""
+    analyzer = make_analyzer()
+    from log_analyzer_vertex import _ModelTier
+
+    tier = _ModelTier(f"hedge-{next(_names)}", model, None)
+    analyzer.tiers = [tier]
+    analyzer.HEDGE_MIN_DELAY_SECONDS = 0.05
+    tracker = get_latency_tracker(tier.name)
+    for _ in range(samples):
+        tracker.record(0.01)
+    return analyzer
+
+
+def _generate(analyzer, deadline_seconds=2.0, hedge=True):
+    return asyncio.run(analyzer._generate_hedged("logs", deadline_seconds, hedge))
+
+
+def test_slow_first_attempt_is_hedged_and_loser_cancelled():
+    model = FakeModel("first", "hedged", delays=[1.0, 0.0])
+    analyzer = _hedging(model)
+
+    started = time.monotonic()
+    assert _generate(analyzer) == "hedged"
+
+    assert time.monotonic() - started < 0.5
+    assert len(model.prompts) == 2
+    assert model.cancelled == 1
+
+
+@pytest.mark.parametrize("samples, hedge", [(5, True), (20, False)])
+def test_no_hedge_without_enough_samples_or_when_disabled(samples, hedge):
+    model = FakeModel("first", delays=[0.2])
+    analyzer = _hedging(model, samples=samples)
+
+    assert _generate(analyzer, hedge=hedge) == "first"
+    assert len(model.prompts) == 1
+
+
+def test_failed_first_attempt_waits_for_hedge():
+    model = FakeModel(RuntimeError("503"), "hedged", delays=[0.1, 0.1])
+    analyzer = _hedging(model)
+
+    assert _generate(analyzer) == "hedged"
+
+
+def test_error_is_raised_when_every_attempt_fails():
+    analyzer = _hedging(FakeModel(RuntimeError("503"), delays=[0.1, 0.1]))
+
+    with pytest.raises(RuntimeError, match="503"):
+        _generate(analyzer)
+
+
+def test_deadline_cancels_outstanding_attempts():
+    model = FakeModel("late", delays=[10, 10])
+    analyzer = _hedging(model)
+
+    with pytest.raises(asyncio.TimeoutError):
+        _generate(analyzer, deadline_seconds=0.2)
+    assert model.cancelled == 2
+
+
+def test_missed_deadline_returns_failed_analysis():
+    analyzer = _hedging(FakeModel("late", delays=[10, 10]))
+    from log_analyzer_vertex import _PreparedAnalysis
+
+    analyzer._prepare = lambda logs, chunked, incident_key: _PreparedAnalysis(prompt="logs")
+
+    result = asyncio.run(analyzer.analyze_logs_async([], deadline_seconds=0.2))
+
+    assert result["detected_issues"] == ["analysis-error"]
+    assert "0.2s" in result["summary"]
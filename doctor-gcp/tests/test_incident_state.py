@@ -0,0 +1,56 @@
+import time
+
+from incident_state import IncidentStateStore
+from log_templates import TemplateMiner
+
+ANALYSIS = {
+    "detected_issues": ["db-connection-failure"],
+    "severity": "critical",
+    "summary": "DB 연결 실패",
+    "recommendations": [],
+    "affected_resources": []
+}
+
+
+def _miner(messages):
+    miner = TemplateMiner()
+    for i, message in enumerate(messages):
+        miner.add(message, 1_700_000_000_000 + i)
+    return miner
+
+
+def test_unchanged_templates_are_skipped():
+    store = IncidentStateStore()
+    miner = _miner(["ERROR db timeout after 30s"] * 3)
+    store.update("g", miner, ANALYSIS)
+
+    changed, unchanged = store.get("g").diff(_miner(["ERROR db timeout after 31s"] * 3))
+    assert changed == []
+    assert unchanged == 1
+
+    changed, _ = store.get("g").diff(_miner(["ERROR db timeout after 30s"] * 3 + ["CRITICAL disk full on /var"]))
+    assert [cluster.count for cluster in changed] == [1]
+
+
+def test_zero_delta_runs_do_not_extend_the_incident():
+    store = IncidentStateStore(idle_close_seconds=1800)
+    store.update("g", _miner(["ERROR db timeout after 30s"]), ANALYSIS)
+    store.get("g").updated_at = time.time() - 1700
+
+    store.record_delta("g", 0, 1)
+    store.get("g").updated_at -= 200
+
+    # 변화 없음 재사용은 idle 시간을 초기화하지 않으므로 마지막 Gemini 분석 후 1800초가 지나면 종료
+    assert store.get("g") is None
+    assert store.stats()["unchanged_runs"] == 1
+
+
+def test_no_issue_analysis_closes_and_persists(tmp_path):
+    path = str(tmp_path / "incidents.json")
+    store = IncidentStateStore(state_path=path)
+    store.update("g", _miner(["ERROR db timeout after 30s"]), ANALYSIS)
+    assert IncidentStateStore(state_path=path).get("g").runs == 1
+
+    store.update("g", _miner(["ERROR db timeout after 30s"]), dict(ANALYSIS, detected_issues=[]))
+    assert store.get("g") is None
+    assert IncidentStateStore(state_path=path).get("g") is None
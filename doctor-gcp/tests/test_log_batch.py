@@ -0,0 +1,46 @@
+from log_batch import LogBatch
+
+
+def _batch(count):
+    batch = LogBatch()
+    for i in range(count):
+        batch.append(1_700_000_000_000 + i, f"  ERROR message {i}  ", "stream-a" if i % 2 else "stream-b")
+    return batch
+
+
+def test_rows_decode_lazily_like_dicts():
+    batch = _batch(3)
+    row = batch[1]
+    assert row["message"] == "ERROR message 1"
+    assert row.get("log_stream") == "stream-a"
+    assert row.get("region") is None
+    assert [log["message"] for log in batch[1:]] == ["ERROR message 1", "ERROR message 2"]
+
+
+def test_append_after_reading_columns():
+    batch = _batch(2)
+    timestamps = batch.timestamps
+    buffer = batch.message_buffer
+    first = batch.message_bytes(0)
+
+    # 반환된 컬럼/바이트를 들고 있어도 이후 append가 BufferError 없이 동작해야 함
+    batch.append(1_700_000_000_100, "ERROR late", "stream-a")
+
+    assert len(batch) == 3
+    assert list(timestamps) == [1_700_000_000_000, 1_700_000_000_001]
+    assert buffer == b"ERROR message 0ERROR message 1"
+    assert first == b"ERROR message 0"
+    assert batch[2]["message"] == "ERROR late"
+
+
+def test_merge_orders_by_timestamp_and_limits_rows():
+    a = LogBatch()
+    b = LogBatch()
+    for ts in (1, 4, 6):
+        a.append(ts, f"a{ts}")
+    for ts in (2, 3, 5):
+        b.append(ts, f"b{ts}")
+
+    merged = LogBatch.merge([a, b], max_rows=5, sources=[("r1", "g1"), ("r2", "g2")])
+    assert [row["message"] for row in merged] == ["a1", "b2", "b3", "a4", "b5"]
+    assert merged[1]["region"] == "r2"
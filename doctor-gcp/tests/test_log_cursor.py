@@ -0,0 +1,91 @@
+import time
+
+from conftest import FakeLogsClient
+from log_cursor import LogCursorStore
+
+
+def _event(ts, event_id):
+    return {"timestamp": ts, "eventId": event_id, "message": f"ERROR {event_id}"}
+
+
+def _now_ms():
+    return int(time.time() * 1000)
+
+
+def test_delta_fetch_appends_only_new_events():
+    store = LogCursorStore()
+    base = _now_ms() - 60_000
+    store.merge("r", "g", "f", [_event(base + i, f"e{i}") for i in range(5)], base)
+
+    fetch_start, is_delta = store.plan_fetch("r", "g", "f", base)
+    assert is_delta
+    assert store.known_since("r", "g", "f", fetch_start) == 5
+
+    new = store.merge("r", "g", "f", [_event(base + i, f"e{i}") for i in range(7)], fetch_start)
+    assert [event["eventId"] for event in new] == ["e5", "e6"]
+    assert store.get_cursor("r", "g", "f")["last_timestamp"] == base + 6
+
+
+def test_truncated_refetch_does_not_move_cursor_backwards():
+    store = LogCursorStore()
+    base = _now_ms() - 60_000
+    store.merge("r", "g", "f", [_event(base + i, f"e{i}") for i in range(10)], base)
+    assert store.get_cursor("r", "g", "f")["last_timestamp"] == base + 9
+
+    # 버퍼가 덮지 않는 더 이른 구간부터 예산에 잘린 전체 재조회
+    earlier = base - 30_000
+    store.merge("r", "g", "f", [_event(earlier + i, f"old{i}") for i in range(3)], earlier)
+
+    assert store.get_cursor("r", "g", "f")["last_timestamp"] == base + 9
+    # 버퍼 끝은 잘린 조회의 마지막 이벤트이므로 다음 delta는 그 이후를 다시 채움
+    fetch_start, is_delta = store.plan_fetch("r", "g", "f", earlier)
+    assert is_delta
+    assert fetch_start == earlier
+
+
+def test_restart_delta_skips_cursor_event_ids(tmp_path):
+    path = str(tmp_path / "cursors.json")
+    base = _now_ms() - 60_000
+    LogCursorStore(path).merge("r", "g", "f", [_event(base, "a"), _event(base + 5, "b"), _event(base + 5, "c")], base)
+
+    store = LogCursorStore(path)
+    cursor = store.get_cursor("r", "g", "f")
+    assert cursor["last_timestamp"] == base + 5
+    assert store.known_since("r", "g", "f", cursor["last_timestamp"]) == 2
+
+    new = store.merge("r", "g", "f", [_event(base + 5, "b"), _event(base + 5, "c"), _event(base + 6, "d")], base + 5)
+    assert [event["eventId"] for event in new] == ["d"]
+
+
+def test_incremental_window_fills_max_logs_past_overlap():
+    import aws_client
+
+    base = _now_ms() - 10 * 60_000
+    events = [(base + i * 1000, f"e{i}", f"ERROR {i}") for i in range(20)]
+    client = FakeLogsClient(events)
+    fetcher = aws_client.AWSLogFetcher("arn:aws:iam::123456789012:role/test", cursor_store=LogCursorStore())
+    fetcher._get_logs_client = lambda: client
+
+    first = fetcher._window_events_incremental("g", 30, 5, "f", None, None)
+    assert [event["eventId"] for event in first] == [f"e{i}" for i in range(5)]
+
+    # 겹쳐 읽는 30초 구간의 기존 5건이 limit을 다 쓰지 않고 새 이벤트까지 채워야 함
+    second = fetcher._window_events_incremental("g", 30, 10, "f", None, None)
+    assert [event["eventId"] for event in second] == [f"e{i}" for i in range(10)]
+
+
+def test_new_error_logs_are_not_reported_twice():
+    import aws_client
+
+    base = _now_ms() - 10 * 60_000
+    events = [(base + i * 1000, f"e{i}", f"ERROR {i}") for i in range(12)]
+    fetcher = aws_client.AWSLogFetcher("arn:aws:iam::123456789012:role/test", cursor_store=LogCursorStore())
+    fetcher._get_logs_client = lambda: FakeLogsClient(events)
+
+    first = fetcher.get_new_error_logs("g", minutes=30, max_logs=6, filter_pattern="f")
+    # 예산에 잘린 윈도우 재조회가 끼어들어도 커서는 뒤로 가지 않음
+    fetcher.cursor_store.merge(fetcher.region, "g", "f", [_event(base - 1000, "x")], base - 1000)
+    second = fetcher.get_new_error_logs("g", minutes=30, max_logs=6, filter_pattern="f")
+
+    delivered = [row["message"] for row in first] + [row["message"] for row in second]
+    assert len(delivered) == len(set(delivered)) == 12
@@ -0,0 +1,80 @@
+import random
+from collections import Counter
+
+from log_sampling import LogSampler, OTHER_STRATUM, ReservoirSampler, detect_severity, merge_sampling_summaries
+
+
+def _event(ts, stream, message="ERROR failed"):
+    return {"timestamp": ts, "message": message, "logStreamName": stream}
+
+
+def test_stream_strategy_keeps_a_quiet_stream():
+    sampler = LogSampler("stream", 10, seed=1)
+    for i in range(1000):
+        sampler.offer(_event(i, "noisy"))
+    sampler.offer(_event(1000, "quiet"))
+
+    kept = Counter(event["logStreamName"] for event in sampler.sample())
+    assert kept["quiet"] == 1
+    assert kept["noisy"] == 5
+
+
+def test_new_strata_shrink_existing_quotas_to_keep_memory_bounded():
+    sampler = LogSampler("stream", 12, seed=1)
+    for stream in ("a", "b", "c"):
+        for i in range(100):
+            sampler.offer(_event(i, stream))
+
+    summary = sampler.summary()
+    assert summary["kept"] == 12
+    assert {stratum: counts["kept"] for stratum, counts in summary["strata"].items()} == {"a": 4, "b": 4, "c": 4}
+    assert summary["seen"] == 300
+    assert summary["dropped"] == 288
+
+
+def test_strata_beyond_the_sample_size_share_one_bucket():
+    sampler = LogSampler("stream", 4, seed=1)
+    for i in range(10):
+        sampler.offer(_event(i, f"stream-{i}"))
+
+    strata = sampler.summary()["strata"]
+    assert len(strata) == 4
+    assert strata[OTHER_STRATUM]["seen"] == 7
+    assert sum(counts["kept"] for counts in strata.values()) <= 4
+
+
+def test_severity_strategy_keeps_rare_critical_events():
+    sampler = LogSampler("severity", 6, seed=1)
+    for i in range(500):
+        sampler.offer(_event(i, "s", "WARNING slow response"))
+    sampler.offer(_event(500, "s", "FATAL heap out of memory"))
+
+    sample = sampler.sample()
+    assert "FATAL heap out of memory" in [event["message"] for event in sample]
+    assert [event["timestamp"] for event in sample] == sorted(event["timestamp"] for event in sample)
+
+
+def test_reservoir_sample_is_uniform_over_the_window():
+    late = 0
+    for seed in range(400):
+        reservoir = ReservoirSampler(10, random.Random(seed))
+        for i in range(100):
+            reservoir.offer(i)
+        late += sum(1 for item in reservoir.items if item >= 50)
+    # 앞쪽에 편향되지 않음: 뒤쪽 절반이 표본의 절반 정도
+    assert 0.45 < late / (400 * 10) < 0.55
+
+
+def test_detect_severity_and_merge_summaries():
+    assert detect_severity("panic: runtime error") == "CRITICAL"
+    assert detect_severity("Unhandled Exception") == "ERROR"
+    assert detect_severity("warn: retrying") == "WARNING"
+    assert detect_severity("started") == "OTHER"
+
+    first, second = LogSampler("stream", 2, seed=1), LogSampler("stream", 2, seed=1)
+    for i in range(5):
+        first.offer(_event(i, "a"))
+        second.offer(_event(i, "a"))
+    merged = merge_sampling_summaries([first.summary(), None, second.summary()])
+    assert merged["seen"] == 10
+    assert merged["strata"]["a"] == {"seen": 10, "kept": 4}
@@ -0,0 +1,136 @@
+import os
+import threading
+import time
+
+from log_segment_cache import LogSegmentCache, BUCKET_MS
+
+
+def _bucket_start(ms):
+    return ms - ms % BUCKET_MS
+
+
+class RecordedFetch:
+    """녹화된 이벤트로 fetch_range를 흉내 내고 요청 구간을 기록"""
+
+    def __init__(self, events):
+        self.events = sorted(events, key=lambda event: event["timestamp"])
+        self.calls = []
+
+    def __call__(self, start_ms, end_ms, max_events):
+        self.calls.append((start_ms, end_ms, max_events))
+        events = [event for event in self.events if start_ms <= event["timestamp"] <= end_ms]
+        return events[:max_events] if max_events is not None else events
+
+
+def _events(first_ms, count, step_ms=BUCKET_MS):
+    return [
+        {"timestamp": first_ms + i * step_ms, "message": f"[ERROR] sample {i}",
+         "logStreamName": "ecs/patient-zone/1", "eventId": str(i)}
+        for i in range(count)
+    ]
+
+
+def test_settled_buckets_are_served_from_disk(tmp_path):
+    now_ms = int(time.time() * 1000)
+    start_ms = _bucket_start(now_ms) - 30 * BUCKET_MS
+    end_ms = _bucket_start(now_ms) - 10 * BUCKET_MS - 1
+    fetch = RecordedFetch(_events(start_ms + 1000, 20))
+    cache = LogSegmentCache(str(tmp_path))
+
+    first = list(cache.iter_events(fetch, "r", "/ecs/patient-zone", "?ERROR", start_ms, end_ms))
+    second = list(cache.iter_events(fetch, "r", "/ecs/patient-zone", "?ERROR", start_ms, end_ms))
+
+    assert first == second
+    assert len(first) == 20
+    assert len(fetch.calls) == 1
+    assert cache.stats() == {"bucket_hits": 20, "bucket_misses": 20}
+
+
+def test_unsettled_buckets_are_refetched(tmp_path):
+    now_ms = int(time.time() * 1000)
+    start_ms = _bucket_start(now_ms) - 5 * BUCKET_MS
+    fetch = RecordedFetch(_events(start_ms + 1000, 5))
+    cache = LogSegmentCache(str(tmp_path))
+
+    list(cache.iter_events(fetch, "r", "g", "f", start_ms, now_ms))
+    list(cache.iter_events(fetch, "r", "g", "f", start_ms, now_ms))
+
+    # SETTLE_MS(2분) 안의 버킷은 늦게 수집되는 이벤트가 있을 수 있어 캐시하지 않음
+    settled_before = now_ms - LogSegmentCache.SETTLE_MS
+    second_fetch_start = fetch.calls[1][0]
+    assert second_fetch_start > start_ms
+    assert second_fetch_start + BUCKET_MS > settled_before
+
+
+def test_truncated_last_bucket_is_not_cached(tmp_path):
+    now_ms = int(time.time() * 1000)
+    start_ms = _bucket_start(now_ms) - 30 * BUCKET_MS
+    end_ms = start_ms + 10 * BUCKET_MS - 1
+    # 버킷마다 이벤트 3개, 이벤트 수 제한 7개면 세 번째 버킷 중간에서 잘림
+    fetch = RecordedFetch(_events(start_ms + 1000, 30, step_ms=BUCKET_MS // 3))
+    cache = LogSegmentCache(str(tmp_path))
+
+    limited = list(cache.iter_events(fetch, "r", "g", "f", start_ms, end_ms, max_events=7))
+    assert len(limited) == 7
+
+    full = list(cache.iter_events(fetch, "r", "g", "f", start_ms, end_ms))
+    assert [event["eventId"] for event in full] == [str(i) for i in range(30)]
+    # 완전한 앞 두 버킷만 캐시되어 두 번째 조회는 잘린 세 번째 버킷부터 다시 요청
+    assert fetch.calls[1][0] == start_ms + 2 * BUCKET_MS
+
+
+def test_expired_segments_are_pruned(tmp_path):
+    now_ms = int(time.time() * 1000)
+    old_start = _bucket_start(now_ms) - 5 * 60 * BUCKET_MS
+    recent_start = _bucket_start(now_ms) - 30 * BUCKET_MS
+    fetch = RecordedFetch(_events(old_start + 1000, 3) + _events(recent_start + 1000, 3))
+    # 보관 기간이 긴 인스턴스가 5시간 전 구간을 기록해 둔 디렉터리
+    list(LogSegmentCache(str(tmp_path), retention_hours=24).iter_events(
+        fetch, "r", "g", "f", old_start, old_start + 3 * BUCKET_MS - 1
+    ))
+    cache = LogSegmentCache(str(tmp_path), retention_hours=3)
+    key_dir = cache._key_dir("r", "g", "f")
+    old_segments = set(os.listdir(key_dir)) - {"index.json"}
+    assert old_segments
+
+    # 다음 쓰기에서 보관 기간(3시간)이 지난 버킷과 세그먼트 파일을 정리
+    list(cache.iter_events(fetch, "r", "g", "f", recent_start, recent_start + 3 * BUCKET_MS - 1))
+    remaining = set(os.listdir(key_dir)) - {"index.json"}
+    assert not old_segments & remaining
+    assert all(int(bucket) >= recent_start for bucket in cache._load_index(key_dir))
+
+
+def test_same_log_group_in_two_regions_is_cached_separately(tmp_path):
+    now_ms = int(time.time() * 1000)
+    start_ms = _bucket_start(now_ms) - 30 * BUCKET_MS
+    end_ms = _bucket_start(now_ms) - 10 * BUCKET_MS - 1
+    seoul = RecordedFetch(_events(start_ms + 1000, 5))
+    virginia = RecordedFetch(_events(start_ms + 2000, 3))
+    cache = LogSegmentCache(str(tmp_path))
+
+    list(cache.iter_events(seoul, "ap-northeast-2", "g", "f", start_ms, end_ms))
+    served = list(cache.iter_events(virginia, "us-east-1", "g", "f", start_ms, end_ms))
+
+    assert len(virginia.calls) == 1
+    assert [event["timestamp"] for event in served] == [event["timestamp"] for event in virginia.events]
+
+
+def test_hit_counts_are_exact_under_concurrent_reads(tmp_path):
+    now_ms = int(time.time() * 1000)
+    start_ms = _bucket_start(now_ms) - 30 * BUCKET_MS
+    end_ms = start_ms + 20 * BUCKET_MS - 1
+    cache = LogSegmentCache(str(tmp_path))
+    fetch = RecordedFetch([])
+    list(cache.iter_events(fetch, "r", "g", "f", start_ms, end_ms))
+
+    def read():
+        for _ in range(100):
+            list(cache.iter_events(fetch, "r", "g", "f", start_ms, end_ms))
+
+    threads = [threading.Thread(target=read) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert cache.stats() == {"bucket_hits": 8 * 100 * 20, "bucket_misses": 20}
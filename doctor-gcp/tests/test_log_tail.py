@@ -0,0 +1,65 @@
+import time
+
+from log_tail import RecentEventsBuffer, BUCKET_MS
+
+KEY = ("ap-northeast-2", "/ecs/patient-zone", "?ERROR")
+LAG = RecentEventsBuffer.INGESTION_LAG_MS
+
+
+def _now_ms():
+    return int(time.time() * 1000)
+
+
+def _event(ts, event_id):
+    return {"timestamp": ts, "message": f"ERROR {event_id}", "logStreamName": "s", "eventId": event_id}
+
+
+def test_coverage_is_event_time_minus_ingestion_lag():
+    buffer = RecentEventsBuffer()
+    now = _now_ms()
+    buffer.mark_covered(KEY, now - 10 * BUCKET_MS, now)
+
+    coverage = buffer.stats()["coverage"]["|".join(KEY)]
+    assert coverage["covered_from"] == now - 10 * BUCKET_MS
+    # 수신 시각 now까지 받았어도 now - LAG 이후 이벤트는 아직 늦게 도착할 수 있음
+    assert coverage["covered_until"] == now - LAG
+
+
+def test_overlapping_polls_keep_coverage_continuous_and_pick_up_late_events():
+    buffer = RecentEventsBuffer()
+    start = _now_ms() - 5 * BUCKET_MS
+    first_end = start + 2 * BUCKET_MS
+    buffer.add(KEY, [_event(start + 1000, "a")])
+    buffer.mark_covered(KEY, start, first_end)
+
+    # 다음 폴링은 수집 지연만큼 겹쳐서 시작하고, 그 사이 늦게 수집된 이벤트를 가져옴
+    late = _event(first_end - 5000, "late")
+    second_end = first_end + BUCKET_MS
+    buffer.add(KEY, [late, _event(first_end + 1000, "b")])
+    buffer.mark_covered(KEY, first_end - LAG, second_end)
+
+    events = buffer.window(KEY, start, second_end - LAG)
+    assert [event["eventId"] for event in events] == ["a", "late", "b"]
+    assert buffer.stats()["coverage"]["|".join(KEY)]["covered_from"] == start
+
+
+def test_window_is_not_served_past_settled_coverage():
+    buffer = RecentEventsBuffer(max_staleness_seconds=30)
+    now = _now_ms()
+    buffer.mark_covered(KEY, now - 10 * BUCKET_MS, now - 2 * BUCKET_MS)
+
+    assert buffer.window(KEY, now - 5 * BUCKET_MS, now) is None
+    assert buffer.window(KEY, now - 11 * BUCKET_MS, now - 3 * BUCKET_MS) is None
+    assert buffer.window(KEY, now - 5 * BUCKET_MS, now - 2 * BUCKET_MS) == []
+
+
+def test_sampling_reset_is_not_undone_by_session_coverage():
+    buffer = RecentEventsBuffer()
+    session_start = _now_ms() - 10_000
+    buffer.mark_covered(KEY, session_start, session_start)
+
+    sampled_at = session_start + 5000
+    buffer.reset_coverage(KEY, sampled_at)
+    buffer.mark_covered(KEY, sampled_at, session_start + 60_000)
+
+    assert buffer.stats()["coverage"]["|".join(KEY)]["covered_from"] == sampled_at
@@ -0,0 +1,61 @@
+from log_templates import TemplateMiner, format_template_lines, mask_message, mine_templates
+
+BASE_MS = 1_700_000_000_000
+
+
+def test_mask_message_hides_variable_values_in_order():
+    masked, params = mask_message("ERROR connect 10.0.1.5:3306 failed after 3000ms id=0xdeadbeef")
+
+    assert masked == "ERROR connect <IP> failed after <NUM> id=<HEX>"
+    assert params == ["10.0.1.5:3306", "3000ms", "0xdeadbeef"]
+
+
+def test_messages_differing_only_in_values_share_a_template():
+    miner = mine_templates(
+        (BASE_MS + i, f"ERROR Connection to 10.0.0.{i} timed out after {i * 100}ms")
+        for i in range(1, 200)
+    )
+
+    assert len(miner.clusters) == 1
+    cluster = miner.clusters[0]
+    assert cluster.template == "ERROR Connection to <IP> timed out after <NUM>"
+    assert cluster.count == miner.total == 199
+    assert (cluster.first_seen, cluster.last_seen) == (BASE_MS + 1, BASE_MS + 199)
+    assert len(cluster.example_params) == cluster.MAX_EXAMPLE_PARAMS
+
+
+def test_differing_words_are_generalized_to_wildcards():
+    miner = TemplateMiner()
+    miner.add("WARN user alice login failed")
+    miner.add("WARN user bob login failed")
+
+    assert [cluster.template for cluster in miner.clusters] == ["WARN user <*> login failed"]
+    assert ["bob"] in miner.clusters[0].example_params
+
+
+def test_different_shapes_stay_separate_and_are_ordered_by_count():
+    miner = TemplateMiner()
+    for _ in range(3):
+        miner.add("ERROR ER_CON_COUNT_ERROR Too many connections")
+    miner.add("FATAL JavaScript heap out of memory")
+    miner.add("ERROR ER_CON_COUNT_ERROR", count=5)
+
+    assert [(cluster.template, cluster.count) for cluster in miner.templates()] == [
+        ("ERROR ER_CON_COUNT_ERROR", 5),
+        ("ERROR ER_CON_COUNT_ERROR Too many connections", 3),
+        ("FATAL JavaScript heap out of memory", 1),
+    ]
+
+
+def test_partition_and_summary_lines_cover_every_event():
+    miner = TemplateMiner()
+    for i in range(6):
+        miner.add(f"ERROR job{chr(97 + i)} step failed", count=i + 1)
+
+    parts = miner.partition(4)
+    assert [len(part.clusters) for part in parts] == [4, 2]
+    assert sum(part.total for part in parts) == miner.total
+
+    lines = format_template_lines(miner, limit=2)
+    assert lines[0].startswith("[x6] ")
+    assert lines[-1] == "[x10] 기타 4개 템플릿"
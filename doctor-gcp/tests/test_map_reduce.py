@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+
+from analysis_cache import AnalysisCache, MemoryCacheBackend
+from conftest import make_analyzer
+
+
+def _partial(issues, severity, summary, recommendations=(), resources=()):
+    return {
+        "detected_issues": list(issues),
+        "severity": severity,
+        "summary": summary,
+        "recommendations": list(recommendations),
+        "affected_resources": list(resources)
+    }
+
+
+def test_merge_orders_issues_by_chunk_count_then_scenario_order():
+    pytest.importorskip("vertexai")
+    from log_analyzer_vertex import merge_partial_analyses
+
+    merged = merge_partial_analyses([
+        _partial(["high-cpu", "pool-exhaustion"], "warning", "a"),
+        _partial(["high-cpu", "analysis-error"], "info", "b"),
+        _partial(["memory-leak"], "warning", "c"),
+    ])
+
+    # high-cpu는 두 청크, 나머지는 한 청크씩이면 FAILURE_SCENARIOS 순서, analysis-error는 제외
+    assert merged["detected_issues"] == ["high-cpu", "pool-exhaustion", "memory-leak"]
+    assert merged["severity"] == "warning"
+
+
+def test_merge_prefers_severe_chunks_and_dedupes():
+    pytest.importorskip("vertexai")
+    from log_analyzer_vertex import merge_partial_analyses
+
+    merged = merge_partial_analyses([
+        _partial([], "info", "정상", ["로그 확인"], ["rds-a"]),
+        _partial(["pool-exhaustion"], "critical", "커넥션 고갈", ["풀 크기 확대", "로그 확인"], ["ecs-b", "rds-a"]),
+        _partial(["slow-query"], "warning", "느린 쿼리", ["인덱스 추가", "풀 크기 확대"]),
+    ], recommendation_limit=2)
+
+    assert merged["severity"] == "critical"
+    assert merged["summary"] == "3개 청크 분석 통합: 커넥션 고갈 / 느린 쿼리 / 정상"
+    # 권장 조치는 심각도 높은 청크부터 중복 없이, 영향 리소스는 등장 순서대로
+    assert merged["recommendations"] == ["풀 크기 확대", "로그 확인"]
+    assert merged["affected_resources"] == ["rds-a", "ecs-b"]
+
+
+def test_single_partial_keeps_its_summary():
+    pytest.importorskip("vertexai")
+    from log_analyzer_vertex import merge_partial_analyses
+
+    merged = merge_partial_analyses([_partial(["jwt-expiry"], "unknown", "토큰 만료")])
+    assert merged["summary"] == "토큰 만료"
+    assert merged["severity"] == "info"
+
+
+def _chunked_analyzer(failing):
+    analyzer = make_analyzer(cache=AnalysisCache(MemoryCacheBackend(), ttl_seconds=60))
+    from log_analyzer_vertex import _PreparedAnalysis
+
+    prepared = _PreparedAnalysis(chunk_prompts=["a", "b", "c"], cache_key="k", packing={"dropped": 0})
+
+    async def analyze(section, prepared, deadline_at, hedge):
+        if section in failing:
+            raise RuntimeError(f"chunk {section} failed")
+        return _partial(["high-cpu"], "warning", f"청크 {section}")
+
+    analyzer._analyze_cascade = analyze
+    return analyzer, prepared
+
+
+def _run_chunks(analyzer, prepared):
+    async def run():
+        return await analyzer._analyze_chunks(prepared, asyncio.get_running_loop().time() + 5, hedge=False)
+
+    return asyncio.run(run())
+
+
+def test_partial_chunk_failure_is_merged_but_not_cached():
+    analyzer, prepared = _chunked_analyzer(failing={"b"})
+
+    result = _run_chunks(analyzer, prepared)
+
+    assert result["detected_issues"] == ["high-cpu"]
+    assert result["chunks"] == {"total": 3, "failed": 1}
+    assert result["prompt_packing"] == {"dropped": 0}
+    # 일부 청크가 빠진 결과는 캐시하지 않아 다음 분석에서 다시 시도
+    assert analyzer.cache.get("k") is None
+
+
+def test_complete_chunk_analysis_is_cached():
+    analyzer, prepared = _chunked_analyzer(failing=set())
+
+    result = _run_chunks(analyzer, prepared)
+
+    assert result["chunks"] == {"total": 3, "failed": 0}
+    assert analyzer.cache.get("k")["summary"] == result["summary"]
+
+
+def test_all_chunks_failing_raises_first_error():
+    analyzer, prepared = _chunked_analyzer(failing={"a", "b", "c"})
+
+    with pytest.raises(RuntimeError, match="chunk a failed"):
+        _run_chunks(analyzer, prepared)
@@ -0,0 +1,39 @@
+import asyncio
+import time
+
+from conftest import FakeLogsClient
+from log_cursor import LogCursorStore
+
+LOG_GROUP = "/ecs/patient-zone"
+
+
+def _now_ms():
+    return int(time.time() * 1000)
+
+
+def test_same_log_group_in_two_regions_is_fetched_separately():
+    import aws_client
+
+    base = _now_ms() - 10 * 60_000
+    clients = {
+        "ap-northeast-2": FakeLogsClient([(base + i * 1000, f"seoul-{i}", f"ERROR seoul {i}") for i in range(3)]),
+        "us-east-1": FakeLogsClient([(base + i * 1000 + 500, f"virginia-{i}", f"ERROR virginia {i}") for i in range(3)]),
+    }
+    fetcher = aws_client.MultiTargetLogFetcher(
+        "arn:aws:iam::123456789012:role/test",
+        [("ap-northeast-2", LOG_GROUP), ("us-east-1", LOG_GROUP)],
+        cursor_store=LogCursorStore()
+    )
+    for region, region_fetcher in fetcher._fetchers.items():
+        region_fetcher._get_logs_client = lambda client=clients[region]: client
+
+    for _ in range(2):
+        logs = asyncio.run(fetcher.get_error_logs_async(minutes=30, max_logs=100, filter_pattern="?ERROR"))["logs"]
+        by_region = {}
+        for row in logs:
+            by_region.setdefault(row["region"], []).append(row["message"])
+        # 두 번째 호출(delta)에서도 리전마다 자기 이벤트만 한 번씩
+        assert by_region == {
+            "ap-northeast-2": [f"ERROR seoul {i}" for i in range(3)],
+            "us-east-1": [f"ERROR virginia {i}" for i in range(3)],
+        }
@@ -0,0 +1,95 @@
+from log_templates import TemplateMiner
+from prompt_packer import PromptPacker, combine_pack_reports, estimate_tokens, trim_middle
+
+
+def _pack(messages, **kwargs):
+    lines = [f"[{i:03d}] {message}" for i, message in enumerate(messages)]
+    return PromptPacker(**kwargs).pack_logs(lines, messages)
+
+
+def test_logs_fit_token_budget_and_keep_severe_lines_in_time_order():
+    messages = [f"INFO request {i} served" for i in range(100)]
+    for i in (10, 50, 90):
+        messages[i] = f"ERROR upstream {i} refused connection"
+
+    packed = _pack(messages, token_budget=200)
+
+    assert packed.used_tokens <= 200
+    assert sum(estimate_tokens(line) for line in packed.lines) == packed.used_tokens
+    assert 3 < packed.packed < 100
+    # 오류 줄이 먼저 들어가고 생략된 줄은 모두 기타 등급, 출력은 원래 순서
+    assert [line for line in packed.lines if "ERROR" in line] == [
+        "[010] ERROR upstream 10 refused connection",
+        "[050] ERROR upstream 50 refused connection",
+        "[090] ERROR upstream 90 refused connection",
+    ]
+    assert packed.lines == sorted(packed.lines)
+    assert packed.report()["dropped_by_severity"] == {"OTHER": packed.dropped}
+    assert packed.dropped_count == packed.dropped
+
+
+def test_rare_line_beats_repeated_lines_of_same_severity():
+    messages = [f"ERROR timeout after {i}ms" for i in range(60)] + ["ERROR disk /var full"]
+
+    packed = _pack(messages, token_budget=64)
+
+    assert any("disk /var full" in line for line in packed.lines)
+    assert packed.dropped > 0
+
+
+def test_long_line_is_trimmed_in_the_middle():
+    stack = "ERROR NullPointerException at " + " ".join(f"frame{i}" for i in range(400)) + " Caused by: pool closed"
+
+    packed = _pack([stack], max_line_tokens=64)
+
+    assert packed.trimmed == 1
+    line = packed.lines[0]
+    assert line.startswith("[000] ERROR NullPointerException")
+    assert line.endswith("Caused by: pool closed")
+    assert "자 생략" in line
+    assert estimate_tokens(line) <= 64
+
+
+def test_trimmed_line_stays_within_cap_when_kept_ends_are_wide():
+    # 앞부분이 한글이라 남긴 구간의 토큰 밀도가 줄 평균보다 높은 경우
+    text = "오류" * 150 + "x" * 3000
+
+    trimmed, was_trimmed = trim_middle(text, 128)
+
+    assert was_trimmed
+    assert estimate_tokens(trimmed) <= 128
+    assert trim_middle("ERROR short", 64) == ("ERROR short", False)
+
+
+def test_top_templates_are_pinned_before_higher_value_lines():
+    miner = TemplateMiner()
+    for i in range(50):
+        miner.add(f"INFO heartbeat {i} ok", timestamp_ms=1_700_000_000_000 + i)
+    for i in range(5):
+        miner.add(f"ERROR worker-{i} crashed with signal", timestamp_ms=1_700_000_060_000 + i)
+
+    packed = PromptPacker(token_budget=64, pinned=1).pack_templates(miner)
+
+    # 건수 상위 템플릿은 심각도가 낮아도 먼저 들어감
+    assert "heartbeat" in packed.lines[0]
+    assert packed.report()["total"] == len(miner.clusters)
+
+
+def test_korean_text_counts_about_one_token_per_character():
+    assert estimate_tokens("커넥션풀고갈") == 7
+    assert estimate_tokens("abcdefg") == 3
+
+
+def test_combined_report_sums_chunks():
+    reports = [
+        _pack(["ERROR a"] * 3, token_budget=64).report(),
+        _pack([f"INFO b {i}" for i in range(40)], token_budget=64).report(),
+    ]
+
+    combined = combine_pack_reports(reports)
+
+    assert combined["chunks"] == 2
+    assert combined["total"] == 43
+    assert combined["packed"] + combined["dropped"] == 43
+    assert combined["dropped_by_severity"] == {"OTHER": reports[1]["dropped"]}
+    assert combine_pack_reports([]) is None
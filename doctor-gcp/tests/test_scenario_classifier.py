@@ -0,0 +1,57 @@
+import pytest
+
+from log_batch import LogBatch
+from scenario_classifier import ScenarioClassifier
+
+POOL_LINES = ["ERROR ER_CON_COUNT_ERROR: Too many connections"] * 5
+
+
+def _batch(messages):
+    return LogBatch.from_events(
+        {"timestamp": 1_700_000_000_000 + i, "message": message, "logStreamName": "s"}
+        for i, message in enumerate(messages)
+    )
+
+
+def test_classifier_detects_scenarios_with_noisy_or_confidence():
+    classification = ScenarioClassifier().classify_lines(POOL_LINES + ["ERROR pool exhausted"])
+
+    assert classification.detected == ["pool-exhaustion"]
+    assert classification.hits["pool-exhaustion"] == 6
+    assert classification.is_confident
+
+
+def test_llm_skip_is_scoped_to_the_log_group():
+    classifier = ScenarioClassifier()
+    classification = classifier.classify_lines(POOL_LINES)
+
+    classifier.record_llm_result(["pool-exhaustion"], "ap-northeast-2:/ecs/a")
+
+    assert classifier.can_skip_llm(classification, "ap-northeast-2:/ecs/a")
+    assert not classifier.can_skip_llm(classification, "ap-northeast-2:/ecs/b")
+    assert classifier.last_llm_scenarios("ap-northeast-2:/ecs/b") is None
+
+
+def test_analyzer_does_not_reuse_another_log_groups_diagnosis():
+    pytest.importorskip("vertexai")
+    from log_analyzer_vertex import LogAnalyzer
+    from prompt_packer import PromptPacker
+
+    analyzer = LogAnalyzer.__new__(LogAnalyzer)
+    analyzer.cache = None
+    analyzer.classifier = ScenarioClassifier()
+    analyzer.rules_fast_path = True
+    analyzer.incidents = None
+    analyzer.chunk_by = None
+    analyzer.packer = PromptPacker()
+
+    first = analyzer._prepare(_batch(POOL_LINES), incident_key="ap-northeast-2:/ecs/a")
+    assert first.result is None
+    analyzer._remember({"detected_issues": ["pool-exhaustion"]}, first)
+
+    # 같은 로그 그룹은 직전 Gemini 분석과 같은 시나리오라 생략, 다른 로그 그룹은 Gemini로 분석
+    repeated = analyzer._prepare(_batch(POOL_LINES), incident_key="ap-northeast-2:/ecs/a")
+    assert repeated.result is not None
+    assert repeated.result["analysis_source"] == "rules"
+    other = analyzer._prepare(_batch(POOL_LINES), incident_key="ap-northeast-2:/ecs/b")
+    assert other.result is None
@@ -0,0 +1,116 @@
+"""
+Vertex Models - 프로세스 전역 Gemini 모델 핸들 레지스트리
+요청마다 vertexai.init()과 GenerativeModel 생성(클라이언트 구성, 인증 준비)을 반복하지 않도록
+(project, location, model_name)별 핸들을 한 번만 만들어 분석기들이 빌려 쓰게 합니다.
+모델별 최근 호출 지연 시간도 함께 집계합니다. (헤지 요청 지연 계산, /metrics)
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_models: Dict[Tuple[str, str, str], Any] = {}
+_models_lock = threading.Lock()
+_initialized_for: Optional[Tuple[str, str]] = None
+
+
+class LatencyTracker:
+    """최근 호출 지연 시간 창 (헤지 요청 지연 계산용 p95 등)"""
+
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """최근 창의 q 분위수 (표본이 없으면 None)"""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+_latency_trackers: Dict[str, LatencyTracker] = {}
+_latency_trackers_lock = threading.Lock()
+
+
+def get_latency_tracker(model_name: str) -> LatencyTracker:
+    """모델별 프로세스 전역 지연 시간 추적기를 반환합니다."""
+    with _latency_trackers_lock:
+        tracker = _latency_trackers.get(model_name)
+        if tracker is None:
+            tracker = _latency_trackers[model_name] = LatencyTracker()
+        return tracker
+
+
+def _init_vertex(project_id: str, location: str):
+    """_models_lock을 잡은 상태에서 호출: (project, location)이 바뀌었을 때만 vertexai.init()"""
+    global _initialized_for
+
+    if _initialized_for != (project_id, location):
+        import vertexai
+        vertexai.init(project=project_id, location=location)
+        _initialized_for = (project_id, location)
+
+
+def get_generative_model(project_id: str, location: str, model_name: str):
+    """
+    (project, location, model_name)별 GenerativeModel을 반환합니다. (처음 요청 시 생성)
+
+    vertexai.init()은 전역 설정을 바꾸고 GenerativeModel은 생성 시점의 project/location을 사용하므로
+    init과 생성을 같은 락 안에서 수행합니다.
+    """
+    key = (project_id, location, model_name)
+    model = _models.get(key)
+    if model is not None:
+        return model
+
+    with _models_lock:
+        model = _models.get(key)
+        if model is None:
+            # 무거운 모듈이므로 처음 모델을 만들 때 import
+            from vertexai.generative_models import GenerativeModel
+
+            started = time.time()
+            _init_vertex(project_id, location)
+            model = GenerativeModel(model_name)
+            _models[key] = model
+            logger.info(f"🤖 Vertex AI model ready: {model_name} ({location}, {time.time() - started:.2f}s)")
+        return model
+
+
+def warm_models(project_id: str, location: str, model_names: Iterable[str]):
+    """서버 시작 시 모델 핸들을 미리 만들어 첫 분석 요청의 초기화 지연을 없앱니다."""
+    for model_name in model_names:
+        try:
+            get_generative_model(project_id, location, model_name)
+        except Exception as e:
+            # 실패해도 첫 요청에서 다시 시도
+            logger.warning(f"⚠️ Vertex AI model warm-up failed ({model_name}): {str(e)}")
+
+
+def registry_stats() -> Dict[str, Any]:
+    """생성된 모델 핸들 목록과 모델별 지연 시간 분위수 (모니터링용)"""
+    return {
+        "models": ["/".join(key) for key in _models],
+        "latency_seconds": {
+            model_name: {
+                "samples": len(tracker),
+                "p50": tracker.percentile(0.5),
+                "p95": tracker.percentile(0.95),
+                "p99": tracker.percentile(0.99)
+            }
+            for model_name, tracker in list(_latency_trackers.items())
+        }
+    }